@@ -0,0 +1,68 @@
+import json
+import queries
+
+DEFAULT_ARCHIVE_AGE_DAYS = 90
+ARCHIVE_CHUNK_SIZE = 1000
+
+
+class Archiver:
+    """Moves long-delivered packages from the main database into the archive.
+
+    Each package goes with its tracking history and current state to the
+    archive database attached to every connection (see database.archive_path),
+    so the hot file's indexes and page cache only hold live shipments.
+    Tracking lookups in CourierController fall back to the archive on a miss,
+    and the KPI counters keep counting archived packages.
+
+    Work is done in chunks of ``chunk_size`` packages, each in two short
+    transactions: the first copies the chunk into the archive, the second
+    deletes it from the main file. SQLite does not commit attached WAL
+    databases atomically, so in this order a crash leaves a chunk in both
+    files (lookups read the main copy first) rather than in neither, and
+    the next run completes the move. A package is only deleted when its
+    archived copy is complete and unchanged.
+    """
+
+    def __init__(self, db, chunk_size=ARCHIVE_CHUNK_SIZE):
+        if not db.archive_attached:
+            raise ValueError("Archive database is not attached")
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def archive_delivered(self, older_than_days=DEFAULT_ARCHIVE_AGE_DAYS, limit=None, progress=None):
+        """Move packages delivered more than ``older_than_days`` ago.
+
+        Stops after ``limit`` packages if given; ``progress(moved)`` is
+        called after every chunk. Returns the number of packages moved.
+        """
+        age = f"-{int(older_than_days)} days"
+        moved = 0
+        while limit is None or moved < limit:
+            size = self.chunk_size if limit is None else min(self.chunk_size, limit - moved)
+            conn = self.db.get_connection()
+            package_ids = [row[0] for row in conn.execute(queries.SELECT_ARCHIVE_CANDIDATES, (age, size))]
+            if not package_ids:
+                break
+            chunk_moved = self.move(package_ids)
+            if not chunk_moved:
+                # Everything left changed under us; try again on the next run
+                break
+            moved += chunk_moved
+            if progress:
+                progress(moved)
+        return moved
+
+    def move(self, package_ids):
+        """Move the given packages to the archive; returns how many were removed from the main file"""
+        chunk = json.dumps(list(package_ids))
+        with self.db.transaction() as conn:
+            conn.execute(queries.COPY_PACKAGES_TO_ARCHIVE, (chunk,))
+            conn.execute(queries.COPY_TRACKING_HISTORY_TO_ARCHIVE, (chunk,))
+            conn.execute(queries.COPY_CURRENT_STATE_TO_ARCHIVE, (chunk,))
+
+        with self.db.transaction() as conn:
+            conn.execute(queries.MARK_PACKAGES_ARCHIVING, (chunk,))
+            conn.execute(queries.DELETE_ARCHIVED_TRACKING_HISTORY)
+            moved = conn.execute(queries.DELETE_ARCHIVED_PACKAGES).rowcount
+            conn.execute(queries.CLEAR_ARCHIVING_PACKAGES)
+        return moved
@@ -1,55 +1,132 @@
 from models import User, Customer, Courier
 from database import Database
+from cache import get_shared_cache
+from passwords import PBKDF2_ITERATIONS, hash_password, needs_rehash, verify_password
 import hashlib
+import secrets
+import time
+import queries
+
+SESSION_LIFETIME = 12 * 60 * 60
+SESSION_CACHE_SIZE = 10000
+SESSION_CACHE_TTL = 60
+
+
+def token_digest(token):
+    """The sessions table key for a token; tokens themselves are never stored"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
 
 class AuthController:
-    def __init__(self):
-        self.db = Database()
+    """Password login and opaque session tokens.
+
+    A login pays the password KDF once and issues a random token; only its
+    SHA-256 is stored in the sessions table. Later calls present the token
+    to validate_session, which is a shared in-process cache lookup until
+    the cache entry expires (SESSION_CACHE_TTL) and one indexed query
+    after that.
+    """
+    
+    def __init__(self, db=None, password_iterations=PBKDF2_ITERATIONS):
+        self.db = db or Database()
+        self.password_iterations = password_iterations
+        self.session_cache = get_shared_cache(self.db, 'sessions', SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
         self.current_user = None
+        self.session_token = None
     
     def hash_password(self, password):
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password with PBKDF2-SHA256 at this controller's cost"""
+        return hash_password(password, self.password_iterations)
     
     def login(self, username, password):
-        """Authenticate user"""
+        """Authenticate user and start a session"""
+        token = self.create_session(username, password)
+        if token is None:
+            return False
+        self.session_token = token
+        self.current_user = self.validate_session(token)
+        return True
+    
+    def create_session(self, username, password):
+        """Check credentials and return a new session token, or None"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        hashed_password = self.hash_password(password)
-        cursor.execute(
-            "SELECT * FROM users WHERE username=? AND password=?",
-            (username, hashed_password)
-        )
+        cursor.execute(queries.SELECT_USER_BY_USERNAME, (username,))
         user_data = cursor.fetchone()
+        if not user_data or not verify_password(password, user_data['password']):
+            return None
         
-        if user_data:
-            user_id, username, password, role, full_name, email, phone, created_at = user_data
-            
-            if role == 'customer':
-                cursor.execute("SELECT * FROM customers WHERE user_id=?", (user_id,))
-                customer_data = cursor.fetchone()
-                if customer_data:
-                    customer_id, user_id, address, city, state, zip_code = customer_data
-                    self.current_user = Customer(
-                        user_id, username, password, role, full_name, email, phone, 
-                        created_at, address, city, state, zip_code, customer_id
-                    )
-            elif role == 'courier':
-                cursor.execute("SELECT * FROM couriers WHERE user_id=?", (user_id,))
-                courier_data = cursor.fetchone()
-                if courier_data:
-                    courier_id, user_id, vehicle_type, license_plate, status = courier_data
-                    self.current_user = Courier(
-                        user_id, username, password, role, full_name, email, phone, 
-                        created_at, vehicle_type, license_plate, status, courier_id
-                    )
-            else:
-                self.current_user = User(
-                    user_id, username, password, role, full_name, email, phone, created_at
-                )
-            return True
-        return False
+        token = secrets.token_urlsafe(32)
+        now = int(time.time())
+        with self.db.transaction() as conn:
+            if needs_rehash(user_data['password'], self.password_iterations):
+                # Upgrade legacy SHA-256 and cheaper hashes while the password is at hand
+                conn.execute(queries.UPDATE_USER_PASSWORD, (self.hash_password(password), user_data['id']))
+            conn.execute(queries.DELETE_EXPIRED_SESSIONS, (now,))
+            conn.execute(queries.INSERT_SESSION, (token_digest(token), user_data['id'], now, now + SESSION_LIFETIME))
+        return token
+    
+    def validate_session(self, token):
+        """Get the user a session token belongs to, or None if it is unknown or expired"""
+        if not token:
+            return None
+        key = token_digest(token)
+        entry = self.session_cache.get_or_load(key, lambda: self._load_session(key))
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            self.session_cache.invalidate(key)
+            return None
+        return user
+    
+    def _load_session(self, key):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(queries.SELECT_SESSION_USER, (key, int(time.time())))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return self._load_user(cursor, row), row['expires_at']
+    
+    def _load_user(self, cursor, user_data):
+        """Build the User, Customer or Courier for a users row"""
+        user_id = user_data['id']
+        common = (
+            user_id, user_data['username'], user_data['password'], user_data['role'],
+            user_data['full_name'], user_data['email'], user_data['phone'], user_data['created_at']
+        )
+        if user_data['role'] == 'customer':
+            cursor.execute(queries.SELECT_CUSTOMER_BY_USER_ID, (user_id,))
+            customer_data = cursor.fetchone()
+            if customer_data:
+                customer_id, user_id, address, city, state, zip_code = customer_data
+                return Customer(*common, address, city, state, zip_code, customer_id)
+        elif user_data['role'] == 'courier':
+            cursor.execute(queries.SELECT_COURIER_BY_USER_ID, (user_id,))
+            courier_data = cursor.fetchone()
+            if courier_data:
+                courier_id, user_id, vehicle_type, license_plate, status = courier_data
+                return Courier(*common, vehicle_type, license_plate, status, courier_id)
+        return User(*common)
+    
+    def resume_session(self, token):
+        """Adopt an existing session token, e.g. one issued to another controller"""
+        user = self.validate_session(token)
+        self.session_token = token if user else None
+        self.current_user = user
+        return user is not None
+    
+    def end_session(self, token):
+        """Revoke a session token"""
+        if not token:
+            return
+        key = token_digest(token)
+        with self.db.transaction() as conn:
+            conn.execute(queries.DELETE_SESSION, (key,))
+        self.session_cache.invalidate(key)
     
     def register_customer(self, username, password, full_name, email, phone, address, city, state, zip_code):
         """Register a new customer"""
@@ -57,7 +134,7 @@ class AuthController:
         cursor = conn.cursor()
         
         # Check if username exists
-        cursor.execute("SELECT id FROM users WHERE username=?", (username,))
+        cursor.execute(queries.SELECT_USER_ID_BY_USERNAME, (username,))
         if cursor.fetchone():
             return False, "Username already exists"
         
@@ -65,14 +142,14 @@ class AuthController:
             # Insert user
             hashed_password = self.hash_password(password)
             cursor.execute(
-                "INSERT INTO users (username, password, role, full_name, email, phone) VALUES (?, ?, ?, ?, ?, ?)",
+                queries.INSERT_USER,
                 (username, hashed_password, 'customer', full_name, email, phone)
             )
             user_id = cursor.lastrowid
             
             # Insert customer
             cursor.execute(
-                "INSERT INTO customers (user_id, address, city, state, zip_code) VALUES (?, ?, ?, ?, ?)",
+                queries.INSERT_CUSTOMER,
                 (user_id, address, city, state, zip_code)
             )
             conn.commit()
@@ -82,8 +159,45 @@ class AuthController:
             conn.rollback()
             return False, str(e)
     
+    def register_courier(self, username, password, full_name, vehicle_type, license_plate):
+        """Register a new courier"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Insert user
+            hashed_password = self.hash_password(password)
+            cursor.execute(
+                queries.INSERT_USER,
+                (username, hashed_password, 'courier', full_name, None, None)
+            )
+            user_id = cursor.lastrowid
+            
+            # Insert courier
+            cursor.execute(
+                queries.INSERT_COURIER,
+                (user_id, vehicle_type, license_plate)
+            )
+            conn.commit()
+            
+            return True, "Courier added successfully"
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+    
+    def get_all_users(self):
+        """Get every user, newest first"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(queries.SELECT_ALL_USERS)
+        
+        return cursor.fetchall()
+    
     def logout(self):
-        """Logout current user"""
+        """Logout current user and revoke their session"""
+        self.end_session(self.session_token)
+        self.session_token = None
         self.current_user = None
     
     def get_current_user(self):
@@ -0,0 +1,131 @@
+"""Measure tracking history size and lookup time before and after compaction.
+
+    python -m benchmarks.history_storage --packages 100000 --repeat-scans 0.3
+
+Seeds a database with the original TEXT tracking_history table (schema
+version 9), then upgrades it to tracking_events (interned strings, epoch
+timestamps) and finally collapses repeated scans. After each stage the
+file is vacuumed and the history tables' pages, the whole file and the
+per-package history query are measured.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.seed import seed_database
+from compaction import HistoryCompactor
+from database import Database
+from migrations import run_migrations
+import queries
+
+# The schema version before tracking history was compacted
+LEGACY_VERSION = 9
+LEGACY_SELECT_TRACKING_HISTORY = """
+    SELECT id, package_id, status, location, timestamp, notes FROM tracking_history
+    WHERE package_id=?
+    ORDER BY timestamp DESC
+"""
+HISTORY_TABLES = ('tracking_history', 'tracking_events', 'tracking_statuses', 'tracking_locations')
+
+HISTORY_PAGES = f"""
+    SELECT COALESCE(SUM(d.pgsize), 0) FROM dbstat d
+    JOIN sqlite_schema m ON m.name = d.name
+    WHERE m.tbl_name IN ({', '.join('?' * len(HISTORY_TABLES))})
+"""
+
+
+def history_bytes(conn):
+    """Bytes in the history tables and their indexes, or None without the dbstat table"""
+    try:
+        return conn.execute(HISTORY_PAGES, HISTORY_TABLES).fetchone()[0]
+    except Exception:
+        return None
+
+
+def time_lookups(conn, sql, package_ids):
+    """Median milliseconds to load one package's history"""
+    samples = []
+    for package_id in package_ids:
+        started = time.perf_counter()
+        conn.execute(sql, (package_id,)).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure(db, stage, sql, package_ids):
+    conn = db.get_connection()
+    conn.execute("VACUUM main")
+    events = conn.execute("SELECT COUNT(*) FROM tracking_history").fetchone()[0]
+    result = {
+        'stage': stage,
+        'events': events,
+        'history_bytes': history_bytes(conn),
+        'file_bytes': os.path.getsize(db.db_file),
+        'lookup_ms': time_lookups(conn, sql, package_ids),
+    }
+    history = result['history_bytes']
+    print(f"{stage:12} {events:>10,} {history / 1e6 if history is not None else float('nan'):>11.1f} "
+          f"{result['file_bytes'] / 1e6:>9.1f} {result['lookup_ms']:>10.3f}")
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', help="where to create the database (default: a temp directory)")
+    parser.add_argument('--packages', type=int, default=100000)
+    parser.add_argument('--events-per-package', type=int, default=4)
+    parser.add_argument('--repeat-scans', type=float, default=0.3,
+                        help="chance that a status event is scanned again unchanged")
+    parser.add_argument('--lookups', type=int, default=2000, help="history lookups timed per stage")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    directory = args.dir or tempfile.mkdtemp()
+    os.makedirs(directory, exist_ok=True)
+    db_file = os.path.join(directory, 'history-storage.sqlite')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_file + suffix):
+            os.remove(db_file + suffix)
+
+    db = Database(db_file)
+    db.initialize_database(schema_version=LEGACY_VERSION)
+    print(f"seeding {args.packages:,} packages...", flush=True)
+    seed_database(
+        db, customers=max(100, args.packages // 100), couriers=max(10, args.packages // 5000),
+        packages=args.packages, events_per_package=args.events_per_package,
+        heavy_merchants=0, heavy_merchant_packages=0, repeat_scans=args.repeat_scans
+    )
+    conn = db.get_connection()
+    package_ids = [row[0] for row in conn.execute("SELECT id FROM packages")]
+    package_ids = random.Random(42).sample(package_ids, min(args.lookups, len(package_ids)))
+
+    print(f"{'stage':12} {'events':>10} {'history MB':>11} {'file MB':>9} {'lookup ms':>10}")
+    before = measure(db, 'text rows', LEGACY_SELECT_TRACKING_HISTORY, package_ids)
+
+    started = time.perf_counter()
+    run_migrations(db)
+    print(f"  migrated in {time.perf_counter() - started:.1f}s")
+    measure(db, 'compact', queries.SELECT_TRACKING_HISTORY, package_ids)
+
+    started = time.perf_counter()
+    removed = HistoryCompactor(db).collapse_repeats()
+    print(f"  collapsed {removed:,} repeats in {time.perf_counter() - started:.1f}s")
+    after = measure(db, 'collapsed', queries.SELECT_TRACKING_HISTORY, package_ids)
+
+    if before['history_bytes'] and after['history_bytes'] is not None:
+        print(f"history storage: {after['history_bytes'] / before['history_bytes']:.0%} of the original")
+    print(f"file size: {after['file_bytes'] / before['file_bytes']:.0%} of the original, "
+          f"lookups: {after['lookup_ms'] / before['lookup_ms']:.0%} of the original time")
+    db.manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Load-test the tracking HTTP service.
+
+    python -m benchmarks.load_test --db bench.sqlite --connections 64 --duration 10
+
+Starts ``manage.py serve-tracking`` on a free local port (or targets
+--url), then drives it from keep-alive connections with lookups for
+tracking numbers sampled from the database. A share of requests replay the
+ETag from an earlier response for the same path to exercise the 304 path.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import Database
+from benchmarks.run import summarize
+from benchmarks.seed import seed_database
+
+SAMPLE_SIZE = 10000
+STARTUP_TIMEOUT = 30
+
+
+def sample_tracking_numbers(db_file, count, rng):
+    """Tracking numbers to request, seeding a small database when it is empty"""
+    db = Database(db_file)
+    db.initialize_database()
+    conn = db.get_connection()
+    if not conn.execute("SELECT 1 FROM packages LIMIT 1").fetchone():
+        print("seeding 20,000 packages...")
+        seed_database(db, customers=1000, couriers=50, packages=20000,
+                      heavy_merchants=0, heavy_merchant_packages=0)
+    numbers = [row[0] for row in conn.execute(
+        "SELECT tracking_number FROM packages ORDER BY random() LIMIT ?", (count,)
+    )]
+    db.close()
+    rng.shuffle(numbers)
+    return numbers
+
+
+def start_service(db_file, workers):
+    """Launch the service on a free port and return (process, base url)"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'manage.py'), '--db', db_file,
+         'serve-tracking', '--port', '0', '--workers', str(workers)],
+        stdout=subprocess.PIPE, text=True
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            break
+        if 'http://' in line:
+            return process, line[line.index('http://'):].strip()
+    process.kill()
+    raise RuntimeError("tracking service did not start")
+
+
+async def fetch(reader, writer, host, path, etag=None, gzip=False):
+    """Send one GET on a keep-alive connection and return (status, headers, body)"""
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    if gzip:
+        lines.append("Accept-Encoding: gzip")
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split(' ')[1])
+    headers = {}
+    for line in head[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length') or 0))
+    return status, headers, body
+
+
+async def client(url, numbers, args, rng, deadline, samples, statuses, etags):
+    """Issue requests on one connection until the deadline"""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    try:
+        while time.perf_counter() < deadline:
+            number = rng.choice(numbers)
+            path = f"/track/{number}/history" if rng.random() < args.history_share else f"/track/{number}"
+            etag = etags.get(path) if rng.random() < args.revalidate_share else None
+            started = time.perf_counter()
+            status, headers, _ = await fetch(reader, writer, parts.netloc, path, etag, args.gzip)
+            samples.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if 'etag' in headers:
+                etags[path] = headers['etag']
+    finally:
+        writer.close()
+
+
+async def run_load(url, numbers, args):
+    rng = random.Random(args.seed)
+    samples = []
+    statuses = {}
+    # ETags seen on any connection, replayed like a shared HTTP cache would
+    etags = {}
+    # Warm the service's caches and connections before timing
+    warmup = time.perf_counter() + args.warmup
+    await asyncio.gather(*(
+        client(url, numbers, args, random.Random(rng.random()), warmup, [], {}, etags)
+        for _ in range(args.connections)
+    ))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(url, numbers, args, random.Random(rng.random()), started + args.duration, samples, statuses, etags)
+        for _ in range(args.connections)
+    ))
+    return samples, statuses, time.perf_counter() - started
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="database to serve (seeded if empty); default: a temp file")
+    parser.add_argument('--url', help="test a running service instead of starting one")
+    parser.add_argument('--connections', type=int, default=64, help="concurrent keep-alive connections")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to measure")
+    parser.add_argument('--warmup', type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument('--workers', type=int, default=8, help="service lookup threads")
+    parser.add_argument('--history-share', type=float, default=0.2, help="fraction of requests for history")
+    parser.add_argument('--revalidate-share', type=float, default=0.3,
+                        help="fraction of repeat requests sent with If-None-Match")
+    parser.add_argument('--gzip', action='store_true', help="send Accept-Encoding: gzip")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    db_file = args.db or os.path.join(tempfile.mkdtemp(), 'load.sqlite')
+    numbers = sample_tracking_numbers(db_file, SAMPLE_SIZE, random.Random(args.seed))
+
+    process = None
+    url = args.url
+    if not url:
+        process, url = start_service(db_file, args.workers)
+    try:
+        samples, statuses, elapsed = asyncio.run(run_load(url, numbers, args))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    stats = summarize(samples)
+    print(f"{stats['count']:,} requests in {elapsed:.1f}s over {args.connections} connections: "
+          f"{stats['count'] / elapsed:,.0f} req/s")
+    print(f"latency ms: p50 {stats['p50_ms']:.2f}  p90 {stats['p90_ms']:.2f}  "
+          f"p99 {stats['p99_ms']:.2f}  max {stats['max_ms']:.2f}")
+    print("status: " + ", ".join(f"{status}={count:,}" for status, count in sorted(statuses.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Measure the memory held by loaded tracking history and package listings.
+
+    python -m benchmarks.memory --records 1000000
+
+Compares the old representations (plain tuples turned into __dict__-backed
+models, and a dict built per listing row) with the current ones (sqlite3.Row
+rows and __slots__ models). Sizes are tracemalloc totals of the loaded lists.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.seed import seed_database
+from database import Database
+from models import TrackingHistory
+import queries
+
+SELECT_HISTORY = f"SELECT {queries.TRACKING_HISTORY_COLUMNS} FROM tracking_history ORDER BY id LIMIT ?"
+
+LISTING_COLUMNS = ['id', 'tracking_number', 'sender_name', 'receiver_name', 'status',
+                   'pickup_address', 'delivery_address', 'created_at', 'estimated_delivery']
+
+SELECT_LISTING = """
+    SELECT p.id, p.tracking_number, u1.full_name as sender_name, u2.full_name as receiver_name,
+           p.status, p.pickup_address, p.delivery_address, p.created_at, p.estimated_delivery
+    FROM packages p
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    JOIN users u1 ON s.user_id = u1.id
+    JOIN users u2 ON r.user_id = u2.id
+    ORDER BY p.id
+    LIMIT ?
+"""
+
+
+class LegacyTrackingHistory:
+    """TrackingHistory as it was before __slots__"""
+
+    def __init__(self, history_id, package_id, status, location=None, timestamp=None, notes=None, repeats=0):
+        self.id = history_id
+        self.package_id = package_id
+        self.status = status
+        self.location = location
+        self.timestamp = timestamp
+        self.notes = notes
+        self.repeats = repeats
+
+
+def tuple_cursor(db):
+    """A cursor returning plain tuples, as connections did before the row factory"""
+    cursor = db.get_connection().cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def legacy_history(db, limit):
+    cursor = tuple_cursor(db)
+    return [LegacyTrackingHistory(*record) for record in cursor.execute(SELECT_HISTORY, (limit,)).fetchall()]
+
+
+def current_history(db, limit):
+    cursor = db.get_connection().cursor()
+    return [TrackingHistory(*record) for record in cursor.execute(SELECT_HISTORY, (limit,)).fetchall()]
+
+
+def legacy_listing(db, limit):
+    cursor = tuple_cursor(db)
+    return [dict(zip(LISTING_COLUMNS, pkg)) for pkg in cursor.execute(SELECT_LISTING, (limit,)).fetchall()]
+
+
+def current_listing(db, limit):
+    return db.get_connection().execute(SELECT_LISTING, (limit,)).fetchall()
+
+
+def measure(load, db, limit):
+    """Return (rows, bytes held by the result, seconds to load)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load(db, limit)
+    elapsed = time.perf_counter() - started
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = len(result)
+    del result
+    return rows, held, elapsed
+
+
+def ensure_data(db, records, events_per_package):
+    """Seed enough history rows for the run unless the database already has them"""
+    conn = db.get_connection()
+    existing = conn.execute("SELECT COUNT(*) FROM tracking_history").fetchone()[0]
+    if existing >= records:
+        return
+    packages = -(-records // events_per_package)
+    print(f"seeding {packages:,} packages x {events_per_package} events...")
+    seed_database(
+        db, customers=1000, couriers=50, packages=packages, events_per_package=events_per_package,
+        heavy_merchants=0, heavy_merchant_packages=0
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="database to read (seeded if it has too few rows); default: a temp file")
+    parser.add_argument('--records', type=int, default=1000000, help="tracking history records to load")
+    parser.add_argument('--packages', type=int, default=100000, help="listing rows to load")
+    parser.add_argument('--events-per-package', type=int, default=4)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    db_file = args.db or os.path.join(tempfile.mkdtemp(), 'memory.sqlite')
+    db = Database(db_file)
+    db.initialize_database()
+    ensure_data(db, args.records, args.events_per_package)
+
+    cases = [
+        ('tracking history', args.records, legacy_history, current_history),
+        ('package listing', args.packages, legacy_listing, current_listing),
+    ]
+    print(f"{'case':18} {'variant':8} {'rows':>10} {'MiB':>9} {'bytes/row':>10} {'seconds':>8}")
+    for name, limit, legacy, current in cases:
+        results = {}
+        for variant, load in (('legacy', legacy), ('current', current)):
+            rows, held, elapsed = measure(load, db, limit)
+            results[variant] = held
+            per_row = held / rows if rows else 0
+            print(f"{name:18} {variant:8} {rows:>10,} {held / 2 ** 20:>9.1f} {per_row:>10.0f} {elapsed:>8.2f}")
+        if results['legacy']:
+            print(f"{name:18} current uses {results['current'] / results['legacy']:.0%} of legacy memory")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Check EXPLAIN QUERY PLAN for every catalogued query.
+
+    python -m benchmarks.query_plans --db bench.sqlite
+
+Flags full-table scans and temp B-tree sorts. Queries listed in
+queries.EXPECTED_PLAN_WARNINGS are reported but do not fail the check.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queries
+from database import Database
+from benchmarks.seed import seed_database
+
+# Representative filters for paginated templates: a continuation page
+SAMPLE_FILTERS = " AND (p.created_at, p.id) < (?, ?)"
+
+
+def render(sql):
+    """Fill template placeholders with a representative variant"""
+    return sql.replace('{filters}', SAMPLE_FILTERS).replace('{conditions}', '')
+
+
+def plan_warnings(plan):
+    """Plan lines that indicate a full scan or a sort"""
+    warnings = []
+    for _, _, _, detail in plan:
+        # Scans of constant rows, bounded subqueries and json_each parameter lists are cheap
+        if detail.startswith(('SCAN CONSTANT ROW', 'SCAN page')) or 'VIRTUAL TABLE' in detail:
+            continue
+        if detail.startswith('SCAN '):
+            warnings.append(detail)
+        elif 'TEMP B-TREE' in detail:
+            warnings.append(detail)
+    return warnings
+
+
+def check_catalog(conn, catalog=None, verbose=False):
+    """Explain every query and return {name: warnings} for unexpected warnings"""
+    failures = {}
+    for name, sql in sorted((catalog or queries.CATALOG).items()):
+        sql = render(sql)
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count('?')).fetchall()
+        warnings = plan_warnings(plan)
+        expected = queries.EXPECTED_PLAN_WARNINGS.get(name)
+
+        if warnings and not expected:
+            failures[name] = warnings
+            status = 'FAIL'
+        elif warnings:
+            status = 'ok (expected)'
+        else:
+            status = 'ok'
+        print(f"{name:45} {status}")
+        if verbose or (warnings and not expected):
+            for _, _, _, detail in plan:
+                print(f"    {detail}")
+            if warnings and expected:
+                print(f"    expected: {expected}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="seeded database to explain against (default: seed a temporary one)")
+    parser.add_argument('--packages', type=int, default=20000, help="packages to seed when --db is omitted")
+    parser.add_argument('--verbose', action='store_true', help="print every plan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(args.db or os.path.join(tmp, 'plans.sqlite'))
+        db.initialize_database()
+        if not args.db:
+            seed_database(db, customers=2000, couriers=50, packages=args.packages,
+                          heavy_merchant_packages=args.packages // 4)
+
+        failures = check_catalog(db.get_connection(), verbose=args.verbose)
+        db.manager.close_all()
+
+    if failures:
+        print(f"{len(failures)} queries with unexpected full scans or sorts")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
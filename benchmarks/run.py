@@ -0,0 +1,228 @@
+"""Time controller methods against a seeded database.
+
+    python -m benchmarks.run --db bench.sqlite --seed-data --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_controller import AuthController
+from change_feed import ChangeFeed
+from courier_controller import CourierController
+from customer_controller import CustomerController
+from database import Database
+from benchmarks.seed import SEED_PASSWORD, SEED_PASSWORD_ITERATIONS, build_parser as build_seed_parser, seed_database
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_THRESHOLD = 0.2
+COMPARED_METRICS = ('p50_ms', 'p99_ms')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """Summarize per-call durations (seconds) in milliseconds"""
+    values = sorted(sample * 1000 for sample in samples)
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values), 4),
+        'p50_ms': round(percentile(values, 0.50), 4),
+        'p90_ms': round(percentile(values, 0.90), 4),
+        'p99_ms': round(percentile(values, 0.99), 4),
+        'max_ms': round(values[-1], 4),
+    }
+
+
+class BenchmarkContext:
+    """Sample keys drawn from the seeded database for the benchmark cases"""
+
+    def __init__(self, db, rng):
+        self.db = db
+        self.rng = rng
+        self.auth = AuthController(db, SEED_PASSWORD_ITERATIONS)
+        self.courier_ctrl = CourierController(db)
+        self.customer_ctrl = CustomerController(db)
+        self.changes = ChangeFeed(db)
+
+        conn = db.get_connection()
+        self.usernames = [row[0] for row in conn.execute(
+            "SELECT username FROM users WHERE role='customer' ORDER BY random() LIMIT 1000")]
+        self.customer_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM customers ORDER BY random() LIMIT 1000")]
+        self.courier_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM couriers ORDER BY random() LIMIT 1000")]
+        self.package_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM packages ORDER BY random() LIMIT 1000")]
+        self.tracking_numbers = [row[0] for row in conn.execute(
+            "SELECT tracking_number FROM packages ORDER BY random() LIMIT 1000")]
+        self.session_tokens = [
+            self.auth.create_session(username, SEED_PASSWORD) for username in self.usernames[:100]
+        ]
+        # The heaviest senders show worst-case dashboard behaviour
+        self.heavy_customer_ids = [row[0] for row in conn.execute(
+            "SELECT sender_id FROM packages GROUP BY sender_id ORDER BY COUNT(*) DESC LIMIT 5")]
+
+    def pick(self, values):
+        return self.rng.choice(values)
+
+    def cases(self):
+        """Name -> zero-argument callable for every benchmarked method"""
+        auth = self.auth
+        courier_ctrl = self.courier_ctrl
+        customer_ctrl = self.customer_ctrl
+        return {
+            'AuthController.login':
+                lambda: auth.login(self.pick(self.usernames), SEED_PASSWORD),
+            'AuthController.validate_session':
+                lambda: auth.validate_session(self.pick(self.session_tokens)),
+            'CourierController.create_package':
+                lambda: courier_ctrl.create_package(
+                    self.pick(self.customer_ids), self.pick(self.customer_ids), 'Benchmark parcel',
+                    1.0, '10x10x10', '1 Bench St', '2 Bench Ave'),
+            'CourierController.assign_courier':
+                lambda: courier_ctrl.assign_courier(self.pick(self.package_ids), self.pick(self.courier_ids)),
+            'CourierController.update_package_status':
+                lambda: courier_ctrl.update_package_status(
+                    self.pick(self.package_ids), 'in_transit', 'Benchmark hub', None),
+            'CourierController.update_package_statuses_bulk[1000]':
+                lambda: courier_ctrl.update_package_statuses_bulk(
+                    [(self.pick(self.package_ids), 'in_transit', 'Benchmark hub') for _ in range(1000)]),
+            'CourierController.get_package_by_tracking_number':
+                lambda: courier_ctrl.get_package_by_tracking_number(self.pick(self.tracking_numbers)),
+            'CourierController.get_tracking_details':
+                lambda: courier_ctrl.get_tracking_details(self.pick(self.tracking_numbers)),
+            'CourierController.get_tracking_details_bulk[1000]':
+                lambda: courier_ctrl.get_tracking_details_bulk(self.tracking_numbers),
+            'CourierController.get_tracking_history':
+                lambda: courier_ctrl.get_tracking_history(self.pick(self.package_ids)),
+            'CourierController.get_available_couriers':
+                courier_ctrl.get_available_couriers,
+            'CourierController.get_courier_packages':
+                lambda: courier_ctrl.get_courier_packages(self.pick(self.courier_ids)),
+            'CourierController.get_courier_packages_page':
+                lambda: courier_ctrl.get_courier_packages_page(self.pick(self.courier_ids)),
+            'CourierController.get_packages_page':
+                courier_ctrl.get_packages_page,
+            'CourierController.get_packages_by_ids[100]':
+                lambda: courier_ctrl.get_packages_by_ids(self.package_ids[:100]),
+            # After the first call nothing has been committed, as for an idle dashboard
+            'ChangeFeed.poll[idle]':
+                self.changes.poll,
+            'CustomerController.get_customer_packages':
+                lambda: customer_ctrl.get_customer_packages(self.pick(self.customer_ids)),
+            'CustomerController.get_customer_packages_page':
+                lambda: customer_ctrl.get_customer_packages_page(self.pick(self.customer_ids)),
+            'CustomerController.get_customer_packages_page[heavy]':
+                lambda: customer_ctrl.get_customer_packages_page(self.pick(self.heavy_customer_ids)),
+        }
+
+
+def run_cases(context, iterations, selected=None):
+    """Run every (or every selected) case and return summaries keyed by name"""
+    results = {}
+    for name, case in context.cases().items():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        case()  # warm the page cache and statement cache
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            case()
+            samples.append(time.perf_counter() - started)
+        results[name] = summarize(samples)
+        print(f"{name:58} p50 {results[name]['p50_ms']:9.3f} ms   p99 {results[name]['p99_ms']:9.3f} ms")
+    return results
+
+
+def table_counts(db):
+    conn = db.get_connection()
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ('users', 'customers', 'couriers', 'packages', 'tracking_history')
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison with a baseline run and return the regressed cases"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous[metric], current[metric]
+            change = (after - before) / before if before else 0.0
+            flag = ''
+            if change > threshold:
+                regressions.append((name, metric, before, after))
+                flag = '  REGRESSION'
+            print(f"{name:58} {metric:6} {before:9.3f} -> {after:9.3f} ms ({change:+.0%}){flag}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0], parents=[build_seed_parser()], conflict_handler='resolve'
+    )
+    parser.add_argument('--seed-data', action='store_true', help="seed the database before timing")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--only', action='append', help="only run cases containing this text")
+    parser.add_argument('--output', help="write JSON results here")
+    parser.add_argument('--compare', help="baseline JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    db = Database(args.db)
+    db.initialize_database()
+    if args.seed_data:
+        seed_database(
+            db, args.customers, args.couriers, args.packages, args.events_per_package,
+            args.heavy_merchants, args.heavy_merchant_packages, seed=args.seed, repeat_scans=args.repeat_scans
+        )
+
+    context = BenchmarkContext(db, random.Random(args.seed))
+    report = {
+        'meta': {
+            'run_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'iterations': args.iterations,
+            'tables': table_counts(db),
+        },
+        'results': run_cases(context, args.iterations, args.only),
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(report['results'], baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
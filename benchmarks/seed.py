@@ -0,0 +1,201 @@
+"""Seed a database with synthetic users, customers, couriers and packages.
+
+    python -m benchmarks.seed --db bench.sqlite --packages 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_controller import AuthController
+from database import Database
+from tracking_numbers import get_generator
+
+SEED_PASSWORD = 'bench123'
+# Cheap enough to seed and log in quickly; benchmark contexts use the same cost
+SEED_PASSWORD_ITERATIONS = 1000
+CHUNK_SIZE = 10000
+STATUS_FLOW = ['assigned', 'in_transit', 'out_for_delivery', 'delivered']
+CITIES = [
+    ('New York', 'NY', '10001'), ('Los Angeles', 'CA', '90012'), ('Chicago', 'IL', '60601'),
+    ('Houston', 'TX', '77002'), ('Phoenix', 'AZ', '85003'), ('Seattle', 'WA', '98101'),
+    ('Denver', 'CO', '80202'), ('Boston', 'MA', '02108'), ('Atlanta', 'GA', '30303'),
+    ('Miami', 'FL', '33130'),
+]
+LOCATIONS = ['Origin hub', 'Regional sort center', 'Linehaul', 'Destination hub', 'Delivery van']
+
+
+def chunks(iterable, size=CHUNK_SIZE):
+    """Yield lists of up to ``size`` items"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def insert_users(conn, role, count, start, password):
+    """Insert ``count`` users of a role and return their ids"""
+    conn.executemany(
+        "INSERT INTO users (username, password, role, full_name, email, phone) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (f"{role}{n}", password, role, f"{role.title()} {n}", f"{role}{n}@example.com", f"555-{n:07d}")
+            for n in range(start, start + count)
+        )
+    )
+    return [
+        row[0] for row in conn.execute(
+            "SELECT id FROM users WHERE role=? ORDER BY id DESC LIMIT ?", (role, count)
+        )
+    ][::-1]
+
+
+def seed_database(db, customers=10000, couriers=200, packages=100000, events_per_package=4,
+                  heavy_merchants=2, heavy_merchant_packages=100000, days=90, seed=42, repeat_scans=0.0):
+    """Fill ``db`` with synthetic data and return the counts written.
+
+    ``heavy_merchants`` customers send ``heavy_merchant_packages`` each
+    (capped by ``packages``); the rest of the packages are spread evenly.
+    Every package gets a creation event plus up to ``events_per_package``
+    status events along the normal delivery flow. Each status event is
+    followed by an identical repeat scan with probability ``repeat_scans``.
+    """
+    rng = random.Random(seed)
+    password = AuthController(db, SEED_PASSWORD_ITERATIONS).hash_password(SEED_PASSWORD)
+    generator = get_generator(db)
+    now = datetime.now()
+
+    with db.transaction() as conn:
+        offset = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        customer_users = insert_users(conn, 'customer', customers, offset, password)
+        conn.executemany(
+            "INSERT INTO customers (user_id, address, city, state, zip_code) VALUES (?, ?, ?, ?, ?)",
+            (
+                (user_id, f"{rng.randint(1, 9999)} Main St", *rng.choice(CITIES))
+                for user_id in customer_users
+            )
+        )
+        customer_ids = [
+            row[0] for row in conn.execute(
+                "SELECT id FROM customers ORDER BY id DESC LIMIT ?", (customers,)
+            )
+        ][::-1]
+
+        courier_users = insert_users(conn, 'courier', couriers, offset + customers, password)
+        conn.executemany(
+            "INSERT INTO couriers (user_id, vehicle_type, license_plate, status) VALUES (?, ?, ?, ?)",
+            (
+                (user_id, rng.choice(['van', 'bike', 'truck']), f"BN-{user_id:05d}",
+                 rng.choice(['available', 'available', 'assigned']))
+                for user_id in courier_users
+            )
+        )
+        courier_ids = [
+            row[0] for row in conn.execute(
+                "SELECT id FROM couriers ORDER BY id DESC LIMIT ?", (couriers,)
+            )
+        ][::-1]
+
+    heavy = customer_ids[:heavy_merchants]
+    heavy_total = min(packages, heavy_merchant_packages * len(heavy))
+
+    def package_rows():
+        for n in range(packages):
+            sender_id = heavy[n % len(heavy)] if n < heavy_total else rng.choice(customer_ids)
+            created = now - timedelta(seconds=rng.randint(0, days * 86400))
+            created_at = created.strftime('%Y-%m-%d %H:%M:%S')
+            estimated_delivery = (created + timedelta(days=rng.randint(2, 5))).strftime('%Y-%m-%d %H:%M:%S')
+            events = [('pending', None, created_at, 'Package created and awaiting pickup')]
+            for step in range(rng.randint(0, events_per_package)):
+                created += timedelta(hours=rng.randint(1, 20))
+                status, location = STATUS_FLOW[min(step, len(STATUS_FLOW) - 1)], rng.choice(LOCATIONS)
+                events.append((status, location, created.strftime('%Y-%m-%d %H:%M:%S'), None))
+                while rng.random() < repeat_scans:
+                    created += timedelta(minutes=rng.randint(1, 30))
+                    events.append((status, location, created.strftime('%Y-%m-%d %H:%M:%S'), None))
+            status = events[-1][0]
+            yield (
+                sender_id, rng.choice(customer_ids),
+                rng.choice(courier_ids) if status != 'pending' else None,
+                f"Parcel {n}", round(rng.uniform(0.1, 30), 2), '30x20x10', status,
+                f"{rng.randint(1, 9999)} Pickup Rd", f"{rng.randint(1, 9999)} Delivery Ave",
+                created_at, estimated_delivery,
+                events[-1][2] if status == 'delivered' else None
+            ), events
+
+    history = 0
+    for chunk in chunks(package_rows()):
+        numbers = generator.allocate(len(chunk))
+        with db.transaction() as conn:
+            conn.executemany(
+                """INSERT INTO packages
+                (tracking_number, sender_id, receiver_id, courier_id, description, weight, dimensions,
+                status, pickup_address, delivery_address, created_at, estimated_delivery, actual_delivery)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                ((number, *row) for number, (row, _) in zip(numbers, chunk))
+            )
+            # Ids are contiguous: the chunk was inserted under one write lock
+            first_id = conn.execute(
+                "SELECT id FROM packages WHERE tracking_number=?", (numbers[0],)
+            ).fetchone()[0]
+            events = [
+                (package_id, *event)
+                for package_id, (_, package_events) in enumerate(chunk, start=first_id)
+                for event in package_events
+            ]
+            conn.executemany(
+                "INSERT INTO tracking_history (package_id, status, location, timestamp, notes) VALUES (?, ?, ?, ?, ?)",
+                events
+            )
+            history += len(events)
+
+    with db.transaction() as conn:
+        conn.execute("ANALYZE")
+
+    return {
+        'customers': customers,
+        'couriers': couriers,
+        'packages': packages,
+        'tracking_history': history,
+        'heavy_merchants': len(heavy),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='bench.sqlite')
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--couriers', type=int, default=200)
+    parser.add_argument('--packages', type=int, default=100000)
+    parser.add_argument('--events-per-package', type=int, default=4)
+    parser.add_argument('--heavy-merchants', type=int, default=2)
+    parser.add_argument('--heavy-merchant-packages', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat-scans', type=float, default=0.0,
+                        help="chance that a status event is scanned again unchanged")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    db = Database(args.db)
+    db.initialize_database()
+
+    started = time.perf_counter()
+    counts = seed_database(
+        db, args.customers, args.couriers, args.packages, args.events_per_package,
+        args.heavy_merchants, args.heavy_merchant_packages, seed=args.seed, repeat_scans=args.repeat_scans
+    )
+    elapsed = time.perf_counter() - started
+    print(", ".join(f"{name}={value:,}" for name, value in counts.items()) + f" in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
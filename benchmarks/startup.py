@@ -0,0 +1,134 @@
+"""Check that time-to-login-screen stays flat as the database grows.
+
+    python -m benchmarks.startup --sizes 0 100000 1000000 --dir bench-startup
+
+Seeds one database per size (kept in --dir for later runs), then starts the
+app in a fresh interpreter against each and times from before ``import
+main`` until the login screen has been drawn. Fails when the largest
+database starts more than --threshold slower than the smallest, or when a
+dashboard module was imported before anyone logged in. Without a display
+the probe times the same startup minus Tk: imports, database
+initialization and migrations.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = (0, 100000, 1000000)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+# Absolute slack so a 10 ms startup is not failed for 3 ms of noise
+SLACK_MS = 25
+DASHBOARD_MODULES = ('views.admin_view', 'views.courier_view', 'views.customer_view')
+
+
+def probe(db_file):
+    """Start the app once and print timing as JSON; runs in a fresh interpreter"""
+    started = time.perf_counter()
+    import tkinter
+    import main
+    mode = 'gui'
+    try:
+        app = main.CourierApp(db_file)
+        app.update()
+    except tkinter.TclError:
+        # No display: do everything CourierApp does before building widgets
+        from auth_controller import AuthController
+        from change_feed import ChangeFeed
+        from database import Database
+        import views.auth_view
+        mode = 'headless'
+        db = Database(db_file)
+        db.initialize_database()
+        AuthController(db)
+        ChangeFeed(db).close()
+        app = None
+    elapsed = time.perf_counter() - started
+    loaded = [name for name in DASHBOARD_MODULES if name in sys.modules]
+    if app is not None:
+        app.destroy()
+    print(json.dumps({'ms': elapsed * 1000, 'mode': mode, 'dashboards_loaded': loaded}))
+
+
+def ensure_database(directory, size):
+    """Path to a database seeded with ``size`` packages, creating it if needed"""
+    from database import Database
+    from benchmarks.seed import seed_database
+
+    path = os.path.join(directory, f"startup-{size}.sqlite")
+    db = Database(path)
+    db.initialize_database()
+    existing = db.get_connection().execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+    if existing < size:
+        print(f"seeding {size:,} packages into {path}...", flush=True)
+        seed_database(
+            db, customers=max(100, size // 100), couriers=max(10, size // 5000), packages=size - existing,
+            heavy_merchants=0, heavy_merchant_packages=0
+        )
+    db.manager.close_all()
+    return path
+
+
+def measure(path, repeat):
+    """Median startup over ``repeat`` fresh interpreters, plus the last probe's details"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.startup', '--probe', path],
+            cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result['ms'])
+    return statistics.median(samples), result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="package counts to test")
+    parser.add_argument('--dir', help="where seeded databases are kept (default: a temp directory)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="startups per size")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown of the largest database over the smallest")
+    parser.add_argument('--probe', metavar='DB', help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.probe:
+        probe(args.probe)
+        return 0
+
+    directory = args.dir or tempfile.mkdtemp()
+    os.makedirs(directory, exist_ok=True)
+    results = []
+    for size in sorted(args.sizes):
+        path = ensure_database(directory, size)
+        median_ms, detail = measure(path, args.repeat)
+        results.append((size, median_ms, detail))
+        print(f"{size:>12,} packages  {median_ms:8.1f} ms  ({detail['mode']})")
+
+    failures = []
+    smallest, largest = results[0][1], results[-1][1]
+    if largest > smallest * (1 + args.threshold) + SLACK_MS:
+        failures.append(f"startup grew from {smallest:.1f} ms to {largest:.1f} ms")
+    for size, _, detail in results:
+        if detail['dashboards_loaded']:
+            failures.append(f"{', '.join(detail['dashboards_loaded'])} imported before login ({size:,} packages)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
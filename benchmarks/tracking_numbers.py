@@ -0,0 +1,59 @@
+"""Benchmark tracking number generation.
+
+    python -m benchmarks.tracking_numbers --count 10000000 --threads 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from tracking_numbers import TrackingNumberGenerator, is_valid_tracking_number
+
+
+def run(count, threads, block_size, db_file):
+    db = Database(db_file)
+    db.initialize_database()
+    generator = TrackingNumberGenerator(db, block_size=block_size)
+    per_thread = count // threads
+    batch = min(per_thread, 10000) or 1
+    samples = []
+
+    def worker():
+        remaining = per_thread
+        while remaining:
+            numbers = generator.allocate(min(batch, remaining))
+            remaining -= len(numbers)
+        samples.append(numbers[-1])
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    generated = per_thread * threads
+    print(f"generated {generated:,} numbers in {elapsed:.2f}s "
+          f"({generated / elapsed:,.0f}/s, {threads} threads, block size {block_size})")
+    print(f"sample: {samples[0]} valid={is_valid_tracking_number(samples[0])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=10_000_000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--block-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run(args.count, args.threads, args.block_size, os.path.join(tmp, 'bench.sqlite'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Cheap change detection for open dashboards.
+
+Triggers on packages, couriers and users append every insert, update and
+delete to ``change_log`` (see migration 8). A ChangeFeed polls it from one
+dedicated connection: ``PRAGMA data_version`` changes only when another
+connection has committed, so a poll when nothing happened is a single
+pragma with no table access. When something did happen, the feed reads the
+log rows past the last one it saw and reports exactly which ids changed.
+"""
+import queries
+
+# Polls reading more rows than this give up on exact ids and ask for a resync
+CHANGE_BATCH_SIZE = 1000
+CHANGE_OPS = ('insert', 'update', 'delete')
+
+
+class ChangeSet:
+    """What changed between two polls of a ChangeFeed.
+
+    ``resync`` is set when the exact ids are unknown, because a bulk change
+    outran CHANGE_BATCH_SIZE or the log was pruned past the feed's
+    position; views should then reload whatever they show.
+    """
+
+    def __init__(self, rows=(), resync=False):
+        self.resync = resync
+        self._ids = {}
+        for row in rows:
+            self._ids.setdefault((row['entity'], row['op']), set()).add(row['entity_id'])
+
+    def ids(self, entity, ops=CHANGE_OPS):
+        """Ids of ``entity`` rows changed by any of ``ops``"""
+        ids = set()
+        for op in ops:
+            ids |= self._ids.get((entity, op), set())
+        return ids
+
+    def touches(self, entity):
+        """Whether anything about ``entity`` may have changed"""
+        return self.resync or any(changed == entity for changed, _ in self._ids)
+
+    def __repr__(self):
+        return f"ChangeSet({self._ids!r}, resync={self.resync})"
+
+
+class ChangeFeed:
+    """Polls the change log for commits made since the previous poll.
+
+    The feed owns its connection, so it must be polled from the thread that
+    created it. Changes committed before the feed was created are not
+    reported.
+    """
+
+    def __init__(self, db, batch_size=CHANGE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.conn = db.create_connection()
+        self.data_version = self._data_version()
+        self.last_id = self.conn.execute(queries.SELECT_LAST_CHANGE_ID).fetchone()[0]
+        self.polls = 0
+        self.reads = 0
+
+    def poll(self):
+        """Get a ChangeSet for commits since the last poll, or None if nothing changed"""
+        self.polls += 1
+        version = self._data_version()
+        if version == self.data_version:
+            return None
+        self.data_version = version
+        self.reads += 1
+
+        rows = self.conn.execute(queries.SELECT_CHANGES_SINCE, (self.last_id, self.batch_size + 1)).fetchall()
+        if not rows:
+            # The commit only touched tables without a change log (sessions, counters)
+            return None
+        # Log ids are contiguous, so a gap means rows were pruned before we read them
+        if len(rows) > self.batch_size or rows[0]['id'] != self.last_id + 1:
+            self.last_id = self.conn.execute(queries.SELECT_LAST_CHANGE_ID).fetchone()[0]
+            return ChangeSet(resync=True)
+        self.last_id = rows[-1]['id']
+        return ChangeSet(rows)
+
+    def close(self):
+        self.conn.close()
+
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
@@ -0,0 +1,69 @@
+import queries
+
+COLLAPSE_CHUNK_PACKAGES = 10000
+
+
+class HistoryCompactor:
+    """Folds consecutive identical tracking events into one.
+
+    Repeat scans at the same place record the same status, location and
+    notes again. A collapsed run keeps its first event, with ``repeats``
+    counting the scans folded into it; only the later scan times are lost.
+    Existing history is collapsed with collapse_repeats(). When
+    set_collapsing(True) is on, the tracking_history insert trigger
+    (migration 10) folds new repeats as they are recorded.
+    """
+
+    def __init__(self, db, chunk_packages=COLLAPSE_CHUNK_PACKAGES):
+        self.db = db
+        self.chunk_packages = chunk_packages
+
+    def collapsing_enabled(self):
+        """Whether new repeat events are folded as they are recorded"""
+        row = self.db.get_connection().execute(queries.SELECT_COLLAPSE_REPEATED_EVENTS).fetchone()
+        return bool(row and row[0])
+
+    def set_collapsing(self, enabled):
+        """Turn folding of newly recorded repeat events on or off"""
+        with self.db.transaction() as conn:
+            conn.execute(queries.SET_COLLAPSE_REPEATED_EVENTS, (1 if enabled else 0,))
+
+    def collapse_repeats(self, progress=None):
+        """Collapse runs of identical events already stored; returns the number of events removed.
+
+        Works through ``chunk_packages`` packages per transaction;
+        ``progress(removed)`` is called after every chunk.
+        """
+        conn = self.db.get_connection()
+        last_package_id = conn.execute(queries.SELECT_LAST_EVENT_PACKAGE_ID).fetchone()[0]
+        removed = 0
+        for start in range(0, last_package_id, self.chunk_packages):
+            with self.db.transaction() as conn:
+                removed += self._collapse_chunk(conn, start, start + self.chunk_packages)
+            if progress:
+                progress(removed)
+        return removed
+
+    def _collapse_chunk(self, conn, after_package_id, last_package_id):
+        repeats = {}
+        folded = []
+        head = None
+        for event_id, package_id, status_id, location_id, notes, count in conn.execute(
+                queries.SELECT_EVENTS_FOR_PACKAGES, (after_package_id, last_package_id)).fetchall():
+            key = (package_id, status_id, location_id, notes)
+            if head is not None and head[1] == key:
+                repeats[head[0]] += count + 1
+                folded.append((event_id, package_id, head[0]))
+            else:
+                head = (event_id, key)
+                repeats[event_id] = count
+
+        if folded:
+            heads = {head_id for _, _, head_id in folded}
+            conn.executemany(queries.UPDATE_EVENT_REPEATS, [(repeats[head_id], head_id) for head_id in heads])
+            conn.executemany(
+                queries.MOVE_CURRENT_STATE_EVENT,
+                [(head_id, package_id, event_id) for event_id, package_id, head_id in folded]
+            )
+            conn.executemany(queries.DELETE_TRACKING_EVENT, [(event_id,) for event_id, _, _ in folded])
+        return len(folded)
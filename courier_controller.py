@@ -1,20 +1,35 @@
-from models import Package, Courier, TrackingHistory
+from models import Package, Courier, TrackingHistory, PACKAGE_STATUSES
 from database import Database
+from cache import get_shared_cache
+from dispatch import DEFAULT_MAX_LOAD, pickup_zone, plan_assignments
+from routing import geocode, sequence_stops
+from tracking_numbers import get_generator, is_valid_tracking_number
+import queries
+from pagination import DEFAULT_PAGE_SIZE, clamp_page_size, page_filters, split_page
+from search import DEFAULT_SEARCH_LIMIT, clamp_search_limit, match_expression
 from datetime import datetime, timedelta
-import random
-import string
+from sqlite3 import Error
+import json
+
+BULK_CHUNK_SIZE = 1000
+BULK_REQUIRED_FIELDS = ('sender_id', 'receiver_id', 'pickup_address', 'delivery_address')
+
+# Public tracking lookups are served from this cache; writes in this process
+# invalidate precisely and the TTL bounds staleness from other processes
+TRACKING_CACHE_SIZE = 20000
+TRACKING_CACHE_TTL = 30
 
 class CourierController:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        self.db = db or Database()
+        self.tracking_numbers = get_generator(self.db)
+        self.tracking_cache = get_shared_cache(
+            self.db, 'tracking', TRACKING_CACHE_SIZE, TRACKING_CACHE_TTL
+        )
     
     def generate_tracking_number(self):
         """Generate a unique tracking number"""
-        letters = string.ascii_uppercase
-        digits = string.digits
-        tracking_number = ''.join(random.choice(letters) for _ in range(2))
-        tracking_number += ''.join(random.choice(digits) for _ in range(8))
-        return tracking_number
+        return self.tracking_numbers.next_number()
     
     def create_package(self, sender_id, receiver_id, description, weight, dimensions, 
                        pickup_address, delivery_address, estimated_delivery_days=3):
@@ -27,10 +42,7 @@ class CourierController:
             estimated_delivery = datetime.now() + timedelta(days=estimated_delivery_days)
             
             cursor.execute(
-                """INSERT INTO packages 
-                (tracking_number, sender_id, receiver_id, description, weight, dimensions, 
-                pickup_address, delivery_address, estimated_delivery) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                queries.INSERT_PACKAGE,
                 (tracking_number, sender_id, receiver_id, description, weight, dimensions, 
                  pickup_address, delivery_address, estimated_delivery)
             )
@@ -38,18 +50,112 @@ class CourierController:
             
             # Add initial tracking history
             cursor.execute(
-                """INSERT INTO tracking_history 
-                (package_id, status, notes) 
-                VALUES (?, ?, ?)""",
-                (package_id, 'pending', 'Package created and awaiting pickup')
+                queries.INSERT_TRACKING_EVENT,
+                (package_id, 'pending', None, 'Package created and awaiting pickup')
             )
             
             conn.commit()
+            self.tracking_cache.invalidate(('package', tracking_number))
             return True, package_id
         except Exception as e:
             conn.rollback()
             return False, str(e)
     
+    def create_packages_bulk(self, packages, chunk_size=BULK_CHUNK_SIZE):
+        """Create many packages using executemany in chunked transactions.
+
+        ``packages`` is any iterable of dicts with the create_package
+        fields. It is consumed lazily, so only one chunk is held in memory.
+        Returns (True, result), where result['created'] holds
+        (index, package_id, tracking_number) tuples and result['errors']
+        holds (index, message) tuples. Indexes are 0-based positions in
+        ``packages``. A bad row does not abort the batch.
+        """
+        created = []
+        errors = []
+        chunk = []
+        
+        for index, package in enumerate(packages):
+            try:
+                chunk.append((index, self._bulk_package_row(package)))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append((index, f"Invalid package: {e}"))
+                continue
+            
+            if len(chunk) >= chunk_size:
+                self._insert_package_chunk(chunk, created, errors)
+                chunk = []
+        
+        if chunk:
+            self._insert_package_chunk(chunk, created, errors)
+        
+        self.tracking_cache.invalidate(*(('package', number) for _, _, number in created))
+        return True, {'created': created, 'errors': errors}
+    
+    def _bulk_package_row(self, package):
+        """Validate one bulk package and build its INSERT parameters"""
+        for field in BULK_REQUIRED_FIELDS:
+            if package.get(field) in (None, ''):
+                raise ValueError(f"missing {field}")
+        
+        weight = package.get('weight')
+        days = package.get('estimated_delivery_days')
+        estimated_delivery = datetime.now() + timedelta(
+            days=int(days) if days not in (None, '') else 3
+        )
+        return (
+            self.generate_tracking_number(),
+            int(package['sender_id']),
+            int(package['receiver_id']),
+            package.get('description'),
+            float(weight) if weight not in (None, '') else None,
+            package.get('dimensions'),
+            package['pickup_address'],
+            package['delivery_address'],
+            estimated_delivery
+        )
+    
+    def _insert_package_chunk(self, chunk, created, errors):
+        """Insert one chunk in a single transaction, isolating bad rows on failure"""
+        rows = [row for _, row in chunk]
+        try:
+            with self.db.transaction() as conn:
+                conn.executemany(queries.INSERT_PACKAGE, rows)
+                
+                # Resolve the new ids through the tracking number index
+                cursor = conn.execute(
+                    queries.SELECT_PACKAGE_IDS_BY_TRACKING_NUMBERS,
+                    (json.dumps([row[0] for row in rows]),)
+                )
+                package_ids = dict(cursor.fetchall())
+                
+                conn.executemany(
+                    queries.INSERT_TRACKING_EVENT,
+                    [(package_ids[row[0]], 'pending', None, 'Package created and awaiting pickup') for row in rows]
+                )
+        except Error:
+            # Retry row by row so one bad row only fails itself
+            for index, row in chunk:
+                try:
+                    package_id = self._insert_package_row(row)
+                    created.append((index, package_id, row[0]))
+                except Error as e:
+                    errors.append((index, str(e)))
+            return
+        
+        created.extend((index, package_ids[row[0]], row[0]) for index, row in chunk)
+    
+    def _insert_package_row(self, row):
+        """Insert a single bulk package row in its own transaction"""
+        with self.db.transaction() as conn:
+            cursor = conn.execute(queries.INSERT_PACKAGE, row)
+            package_id = cursor.lastrowid
+            conn.execute(
+                queries.INSERT_TRACKING_EVENT,
+                (package_id, 'pending', None, 'Package created and awaiting pickup')
+            )
+        return package_id
+    
     def assign_courier(self, package_id, courier_id):
         """Assign a courier to a package"""
         conn = self.db.get_connection()
@@ -58,77 +164,263 @@ class CourierController:
         try:
             # Update package
             cursor.execute(
-                "UPDATE packages SET courier_id=?, status='assigned' WHERE id=?",
+                queries.ASSIGN_PACKAGE_COURIER,
                 (courier_id, package_id)
             )
             
             # Update courier status
             cursor.execute(
-                "UPDATE couriers SET status='assigned' WHERE id=?",
-                (courier_id,)
+                queries.UPDATE_COURIER_STATUS,
+                ('assigned', courier_id)
             )
             
-            # Add tracking history
+            # Add tracking history; the trigger updates the package status
             cursor.execute(
-                """INSERT INTO tracking_history 
-                (package_id, status, notes) 
-                VALUES (?, ?, ?)""",
-                (package_id, 'assigned', f'Courier #{courier_id} assigned to package')
+                queries.INSERT_TRACKING_EVENT,
+                (package_id, 'assigned', None, f'Courier #{courier_id} assigned to package')
             )
             
             conn.commit()
+            self.invalidate_package_cache(package_id)
             return True, "Courier assigned successfully"
         except Exception as e:
             conn.rollback()
             return False, str(e)
     
+    def dispatch_pending_packages(self, max_load=DEFAULT_MAX_LOAD):
+        """Assign every pending package to a courier with spare capacity in one transaction.
+
+        Couriers on duty ('available' or 'assigned') take packages until
+        they have ``max_load`` active ones, so repeated runs keep filling
+        couriers that already have work. Packages are bucketed by their
+        sender's ZIP code (or city) and taken earliest estimated delivery
+        first. Couriers that reach ``max_load`` are marked 'assigned'.
+        Returns (True, result), where result['assigned'] holds
+        (package_id, courier_id) tuples and result['unassigned'] the
+        package ids left pending for lack of capacity.
+        """
+        try:
+            with self.db.transaction() as conn:
+                packages = conn.execute(queries.SELECT_DISPATCH_PACKAGES).fetchall()
+                couriers = conn.execute(queries.SELECT_DISPATCH_COURIERS, (max_load,)).fetchall()
+                
+                assignments, unassigned = plan_assignments(
+                    ((pkg['id'], pkg['estimated_delivery'], pickup_zone(pkg['zip_code'], pkg['city']))
+                     for pkg in packages),
+                    couriers,
+                    max_load
+                )
+                
+                conn.executemany(
+                    queries.ASSIGN_PACKAGE_COURIER,
+                    [(courier_id, package_id) for package_id, courier_id in assignments]
+                )
+                # The trigger moves each package to 'assigned'
+                conn.executemany(
+                    queries.INSERT_TRACKING_EVENT,
+                    [(package_id, 'assigned', None, f'Courier #{courier_id} assigned by dispatch')
+                     for package_id, courier_id in assignments]
+                )
+                
+                load = {courier['id']: courier['active'] for courier in couriers}
+                for _, courier_id in assignments:
+                    load[courier_id] += 1
+                conn.executemany(
+                    queries.UPDATE_COURIER_STATUS,
+                    [('assigned', courier_id) for courier_id, active in load.items() if active >= max_load]
+                )
+        except Error as e:
+            return False, str(e)
+        
+        tracking_numbers = {pkg['id']: pkg['tracking_number'] for pkg in packages}
+        self.tracking_cache.invalidate(*(
+            key for package_id, _ in assignments
+            for key in (('history', package_id), ('package', tracking_numbers[package_id]))
+        ))
+        return True, {'assigned': assignments, 'unassigned': unassigned}
+    
     def update_package_status(self, package_id, status, location=None, notes=None):
         """Update package status and add tracking history"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Update package status
-            cursor.execute(
-                "UPDATE packages SET status=? WHERE id=?",
-                (status, package_id)
-            )
-            
-            # Add tracking history
+            # Add tracking history; the trigger updates the package status
             cursor.execute(
-                """INSERT INTO tracking_history 
-                (package_id, status, location, notes) 
-                VALUES (?, ?, ?, ?)""",
+                queries.INSERT_TRACKING_EVENT,
                 (package_id, status, location, notes)
             )
             
             # If delivered, update delivery time
             if status == 'delivered':
                 cursor.execute(
-                    "UPDATE packages SET actual_delivery=CURRENT_TIMESTAMP WHERE id=?",
+                    queries.MARK_PACKAGE_DELIVERED,
                     (package_id,)
                 )
                 
                 # Mark courier as available
                 cursor.execute(
-                    """UPDATE couriers SET status='available' 
-                    WHERE id=(SELECT courier_id FROM packages WHERE id=?)""",
+                    queries.RELEASE_PACKAGE_COURIER,
                     (package_id,)
                 )
             
             conn.commit()
+            self.invalidate_package_cache(package_id)
             return True, "Status updated successfully"
         except Exception as e:
             conn.rollback()
             return False, str(e)
     
+    def update_package_statuses_bulk(self, events, chunk_size=BULK_CHUNK_SIZE):
+        """Apply many status events, such as hub scans, in chunked transactions.
+        
+        Each event is a dict with ``package_id`` or ``tracking_number``,
+        ``status`` and optional ``location``, ``notes`` and ``timestamp``
+        keys, or a (package, status, location, notes, timestamp) tuple whose
+        trailing items may be omitted. ``package`` is a package id or a
+        tracking number. Events are appended to tracking history, and each
+        package's status follows its newest event by timestamp, so a late
+        scan does not roll a package back. Only packages whose newest event
+        is 'delivered' get an actual_delivery time and release their
+        courier. Returns (True, result), where result['updated'] holds
+        (index, package_id) tuples and result['errors'] holds
+        (index, message) tuples. A bad event does not abort the batch.
+        """
+        updated = []
+        errors = []
+        chunk = []
+        
+        for index, event in enumerate(events):
+            try:
+                chunk.append((index, self._status_event(event)))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append((index, f"Invalid event: {e}"))
+                continue
+            
+            if len(chunk) >= chunk_size:
+                self._apply_status_chunk(chunk, updated, errors)
+                chunk = []
+        
+        if chunk:
+            self._apply_status_chunk(chunk, updated, errors)
+        
+        return True, {'updated': updated, 'errors': errors}
+    
+    def _status_event(self, event):
+        """Validate one status event as (package, status, location, notes, timestamp)"""
+        if isinstance(event, dict):
+            package = event.get('package_id')
+            if package in (None, ''):
+                package = event['tracking_number']
+            event = (package, event['status'], event.get('location'),
+                     event.get('notes'), event.get('timestamp'))
+        
+        package, status, location, notes, timestamp = (tuple(event) + (None,) * 3)[:5]
+        if status not in PACKAGE_STATUSES:
+            raise ValueError(f"unknown status {status!r}")
+        if isinstance(package, str) and not package.isdigit():
+            if not is_valid_tracking_number(package):
+                raise ValueError(f"invalid tracking number {package!r}")
+        else:
+            package = int(package)
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+        return package, status, location, notes, timestamp
+    
+    def _resolve_packages(self, conn, references):
+        """Map package ids and tracking numbers to (package_id, tracking_number)"""
+        ids = sorted({ref for ref in references if isinstance(ref, int)})
+        numbers = sorted({ref for ref in references if isinstance(ref, str)})
+        resolved = {}
+        if ids:
+            cursor = conn.execute(queries.SELECT_PACKAGES_BY_IDS, (json.dumps(ids),))
+            resolved.update((package_id, (package_id, number)) for package_id, number in cursor)
+        if numbers:
+            cursor = conn.execute(queries.SELECT_PACKAGE_IDS_BY_TRACKING_NUMBERS, (json.dumps(numbers),))
+            resolved.update((number, (package_id, number)) for number, package_id in cursor)
+        return resolved
+    
+    def _apply_status_chunk(self, chunk, updated, errors):
+        """Apply one chunk of events in a single transaction, isolating bad events on failure"""
+        try:
+            with self.db.transaction() as conn:
+                resolved = self._resolve_packages(conn, [event[0] for _, event in chunk])
+                applied = []
+                delivered = set()
+                for index, (package, status, location, notes, timestamp) in chunk:
+                    if package not in resolved:
+                        errors.append((index, "Package not found"))
+                        continue
+                    package_id = resolved[package][0]
+                    applied.append((index, package_id, status, location, notes, timestamp))
+                    if status == 'delivered':
+                        delivered.add(package_id)
+                
+                conn.executemany(
+                    queries.INSERT_TRACKING_EVENT_AT,
+                    [event[1:] for event in applied]
+                )
+                if delivered:
+                    delivered_ids = json.dumps(sorted(delivered))
+                    conn.execute(queries.MARK_PACKAGES_DELIVERED, (delivered_ids,))
+                    conn.execute(queries.RELEASE_PACKAGES_COURIERS, (delivered_ids,))
+        except Error:
+            # Drop the not-found errors recorded above; the retry reports them again
+            indexes = {index for index, _ in chunk}
+            errors[:] = [error for error in errors if error[0] not in indexes]
+            for index, event in chunk:
+                try:
+                    package_id, tracking_number = self._apply_status_event(event)
+                    updated.append((index, package_id))
+                    self.tracking_cache.invalidate(('history', package_id), ('package', tracking_number))
+                except LookupError:
+                    errors.append((index, "Package not found"))
+                except Error as e:
+                    errors.append((index, str(e)))
+            return
+        
+        updated.extend((index, package_id) for index, package_id, *_ in applied)
+        self.tracking_cache.invalidate(*(
+            key for package_id, tracking_number in set(resolved.values())
+            for key in (('history', package_id), ('package', tracking_number))
+        ))
+    
+    def _apply_status_event(self, event):
+        """Apply a single status event in its own transaction"""
+        package, status, location, notes, timestamp = event
+        with self.db.transaction() as conn:
+            resolved = self._resolve_packages(conn, [package])
+            if package not in resolved:
+                raise LookupError(package)
+            package_id = resolved[package][0]
+            conn.execute(queries.INSERT_TRACKING_EVENT_AT, (package_id, status, location, notes, timestamp))
+            if status == 'delivered':
+                conn.execute(queries.MARK_PACKAGES_DELIVERED, (json.dumps([package_id]),))
+                conn.execute(queries.RELEASE_PACKAGES_COURIERS, (json.dumps([package_id]),))
+        return resolved[package]
+    
+    def invalidate_package_cache(self, package_id):
+        """Drop a package's cached tracking lookup and history"""
+        conn = self.db.get_connection()
+        row = conn.execute(queries.SELECT_TRACKING_NUMBER_BY_PACKAGE_ID, (package_id,)).fetchone()
+        keys = [('history', int(package_id))]
+        if row:
+            keys.append(('package', row[0]))
+        self.tracking_cache.invalidate(*keys)
+    
+    def get_cache_stats(self):
+        """Hit/miss/eviction counters for the tracking lookup cache"""
+        return self.tracking_cache.stats()
+    
     def get_package_by_id(self, package_id):
-        """Get package details by ID"""
+        """Get package details by ID, from the archive if it has been archived"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM packages WHERE id=?", (package_id,))
+        cursor.execute(queries.SELECT_PACKAGE_BY_ID, (package_id,))
         package_data = cursor.fetchone()
+        if package_data is None and self.db.archive_attached:
+            package_data = conn.execute(queries.SELECT_ARCHIVED_PACKAGE_BY_ID, (package_id,)).fetchone()
         
         if package_data:
             return Package(*package_data)
@@ -136,23 +428,84 @@ class CourierController:
     
     def get_package_by_tracking_number(self, tracking_number):
         """Get package details by tracking number"""
+        if not is_valid_tracking_number(tracking_number):
+            return None
+        
+        return self.tracking_cache.get_or_load(
+            ('package', tracking_number),
+            lambda: self._load_package_by_tracking_number(tracking_number)
+        )
+    
+    def _load_package_by_tracking_number(self, tracking_number):
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM packages WHERE tracking_number=?", (tracking_number,))
+        cursor.execute(queries.SELECT_PACKAGE_BY_TRACKING_NUMBER, (tracking_number,))
         package_data = cursor.fetchone()
+        if package_data is None and self.db.archive_attached:
+            package_data = conn.execute(
+                queries.SELECT_ARCHIVED_PACKAGE_BY_TRACKING_NUMBER, (tracking_number,)
+            ).fetchone()
         
         if package_data:
             return Package(*package_data)
         return None
     
+    def get_package_current_state(self, package_id):
+        """Get a package's current status, last known location and last event time"""
+        conn = self.db.get_connection()
+        return conn.execute(queries.SELECT_PACKAGE_CURRENT_STATE, (package_id,)).fetchone()
+    
+    def get_tracking_details(self, tracking_number):
+        """Get a package's status, ETA and current location in one query.
+
+        Returns a dict with package_id, tracking_number, status,
+        estimated_delivery, actual_delivery, current_location and
+        last_event_at, or None for an unknown or malformed number.
+        """
+        tracking_number = (tracking_number or '').strip().upper()
+        if not is_valid_tracking_number(tracking_number):
+            return None
+        conn = self.db.get_connection()
+        row = conn.execute(queries.SELECT_TRACKING_DETAILS, (tracking_number,)).fetchone()
+        if row is None and self.db.archive_attached:
+            row = conn.execute(queries.SELECT_ARCHIVED_TRACKING_DETAILS, (tracking_number,)).fetchone()
+        return dict(row) if row else None
+    
+    def get_tracking_details_bulk(self, tracking_numbers):
+        """Get tracking details for many packages in one query.
+
+        Returns {tracking_number: details} shaped like get_tracking_details;
+        unknown and malformed numbers are left out.
+        """
+        wanted = {number.strip().upper() for number in tracking_numbers if number}
+        wanted = [number for number in wanted if is_valid_tracking_number(number)]
+        if not wanted:
+            return {}
+        conn = self.db.get_connection()
+        rows = conn.execute(queries.SELECT_TRACKING_DETAILS_BULK, (json.dumps(wanted),)).fetchall()
+        details = {row['tracking_number']: dict(row) for row in rows}
+        missing = [number for number in wanted if number not in details]
+        if missing and self.db.archive_attached:
+            rows = conn.execute(queries.SELECT_ARCHIVED_TRACKING_DETAILS_BULK, (json.dumps(missing),)).fetchall()
+            details.update((row['tracking_number'], dict(row)) for row in rows)
+        return details
+    
     def get_tracking_history(self, package_id):
         """Get tracking history for a package"""
+        return self.tracking_cache.get_or_load(
+            ('history', int(package_id)),
+            lambda: self._load_tracking_history(package_id)
+        )
+    
+    def _load_tracking_history(self, package_id):
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM tracking_history WHERE package_id=? ORDER BY timestamp DESC", (package_id,))
+        cursor.execute(queries.SELECT_TRACKING_HISTORY, (package_id,))
         history_records = cursor.fetchall()
+        if not history_records and self.db.archive_attached:
+            history_records = conn.execute(queries.SELECT_ARCHIVED_TRACKING_HISTORY, (package_id,)).fetchall()
         
         return [TrackingHistory(*record) for record in history_records]
     
@@ -161,44 +514,157 @@ class CourierController:
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT c.id, u.full_name, c.vehicle_type, c.license_plate 
-            FROM couriers c
-            JOIN users u ON c.user_id = u.id
-            WHERE c.status='available'
-        """)
+        cursor.execute(queries.SELECT_AVAILABLE_COURIERS)
         
         return cursor.fetchall()
     
+    def get_all_couriers(self):
+        """Get every courier with name and status"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(queries.SELECT_ALL_COURIERS)
+        
+        return cursor.fetchall()
+    
+    def set_courier_status(self, courier_id, status):
+        """Set a courier's availability status"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(queries.UPDATE_COURIER_STATUS, (status, courier_id))
+            conn.commit()
+            return True, "Status updated successfully"
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+    
     def get_courier_packages(self, courier_id):
         """Get packages assigned to a courier"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT p.*, u1.full_name as sender_name, u2.full_name as receiver_name
-            FROM packages p
-            JOIN customers s ON p.sender_id = s.id
-            JOIN customers r ON p.receiver_id = r.id
-            JOIN users u1 ON s.user_id = u1.id
-            JOIN users u2 ON r.user_id = u2.id
-            WHERE p.courier_id=?
-            ORDER BY p.created_at DESC
-        """, (courier_id,))
-        
-        packages = []
-        for pkg in cursor.fetchall():
-            package = {
-                'id': pkg[0],
-                'tracking_number': pkg[1],
-                'sender_name': pkg[16],
-                'receiver_name': pkg[17],
-                'status': pkg[8],
-                'pickup_address': pkg[9],
-                'delivery_address': pkg[10],
-                'created_at': pkg[11],
-                'estimated_delivery': pkg[12]
-            }
-            packages.append(package)
-        
-        return packages
\ No newline at end of file
+        cursor.execute(queries.SELECT_COURIER_PACKAGES, (courier_id,))
+        
+        return cursor.fetchall()
+    
+    def get_courier_route(self, courier_id, start=None):
+        """Get a courier's remaining stops in driving order.
+
+        Pickups for packages still to be collected come first, then every
+        delivery, each leg ordered by nearest neighbour and 2-opt over ZIP
+        centroids. ``start`` is an optional (lat, lon) for the courier's
+        position. Returns a list of stop dicts with package_id,
+        tracking_number, stop ('pickup' or 'delivery'), address, location
+        and leg_km. Stops that cannot be geocoded come last in their
+        phase, with location and leg_km set to None.
+        """
+        conn = self.db.get_connection()
+        packages = conn.execute(queries.SELECT_COURIER_ROUTE_STOPS, (courier_id,)).fetchall()
+        
+        pickups = [
+            (pkg, 'pickup', pkg['pickup_address'], pkg['pickup_zip'], pkg['pickup_city'])
+            for pkg in packages if pkg['status'] == 'assigned'
+        ]
+        deliveries = [
+            (pkg, 'delivery', pkg['delivery_address'], pkg['delivery_zip'], pkg['delivery_city'])
+            for pkg in packages
+        ]
+        
+        route = []
+        for phase in (pickups, deliveries):
+            stops = [
+                {
+                    'package_id': pkg['id'],
+                    'tracking_number': pkg['tracking_number'],
+                    'stop': kind,
+                    'address': address,
+                    'location': geocode(address, zip_code, city),
+                    'leg_km': None,
+                }
+                for pkg, kind, address, zip_code, city in phase
+            ]
+            located = [stop for stop in stops if stop['location']]
+            order, legs = sequence_stops([stop['location'] for stop in located], start)
+            for index, leg in zip(order, legs):
+                located[index]['leg_km'] = leg
+                route.append(located[index])
+            route.extend(stop for stop in stops if not stop['location'])
+            if route and route[-1]['location']:
+                # The next phase starts where this one ends
+                start = route[-1]['location']
+        
+        return route
+    
+    def get_courier_packages_page(self, courier_id, page_size=DEFAULT_PAGE_SIZE, cursor=None,
+                                  status=None, created_from=None, created_to=None):
+        """Get one newest-first page of a courier's packages.
+
+        Returns (packages, next_cursor). Pass next_cursor back to fetch the
+        following page; it is None on the last page.
+        """
+        page_size = clamp_page_size(page_size)
+        filters, params = page_filters('p', cursor, status, created_from, created_to)
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            queries.SELECT_COURIER_PACKAGES_PAGE.format(filters=filters),
+            (courier_id, *params, page_size + 1)
+        )
+        
+        return split_page(cursor.fetchall(), page_size)
+    
+    def get_packages_page(self, page_size=DEFAULT_PAGE_SIZE, cursor=None,
+                          status=None, created_from=None, created_to=None):
+        """Get one newest-first page of all packages for the admin dashboard.
+
+        Returns (packages, next_cursor) like get_courier_packages_page.
+        """
+        page_size = clamp_page_size(page_size)
+        filters, params = page_filters('p', cursor, status, created_from, created_to)
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            queries.SELECT_PACKAGES_PAGE.format(filters=filters),
+            (*params, page_size + 1)
+        )
+        
+        return split_page(cursor.fetchall(), page_size)
+    
+    def get_packages_by_ids(self, package_ids):
+        """Get packages by id as listing rows, with the dashboards' columns and addresses (in no particular order)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(queries.SELECT_PACKAGES_LISTING_BY_IDS, (json.dumps(list(package_ids)),))
+        
+        return cursor.fetchall()
+    
+    def filter_courier_packages(self, courier_id, package_ids):
+        """Get the ids among ``package_ids`` of packages assigned to a courier"""
+        conn = self.db.get_connection()
+        rows = conn.execute(
+            queries.SELECT_COURIER_PACKAGE_IDS_AMONG, (json.dumps(list(package_ids)), courier_id)
+        ).fetchall()
+        return {row[0] for row in rows}
+    
+    def search_packages(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """Search packages by tracking number, description, addresses and names.
+
+        Every word in ``text`` matches as a prefix, so "AA12 smi" finds
+        tracking numbers starting AA12 on packages involving a Smith.
+        Returns the best ``limit`` matches, rows shaped like
+        get_packages_page results.
+        """
+        expression = match_expression(text)
+        if expression is None:
+            return []
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(queries.SEARCH_PACKAGES, (expression, clamp_search_limit(limit)))
+        
+        return cursor.fetchall()
@@ -1,61 +1,55 @@
 from models import Customer, Package
 from database import Database
+import queries
+from pagination import DEFAULT_PAGE_SIZE, clamp_page_size, page_filters, split_page
+from passwords import UNUSABLE_PASSWORD
+import json
 
 class CustomerController:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        self.db = db or Database()
     
     def get_customer_packages(self, customer_id):
         """Get packages sent or received by a customer"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT p.*, 
-                   sender.full_name as sender_name, 
-                   receiver.full_name as receiver_name,
-                   u.full_name as courier_name
-            FROM packages p
-            JOIN customers s ON p.sender_id = s.id
-            JOIN customers r ON p.receiver_id = r.id
-            JOIN users sender ON s.user_id = sender.id
-            JOIN users receiver ON r.user_id = receiver.id
-            LEFT JOIN couriers c ON p.courier_id = c.id
-            LEFT JOIN users u ON c.user_id = u.id
-            WHERE p.sender_id=? OR p.receiver_id=?
-            ORDER BY p.created_at DESC
-        """, (customer_id, customer_id))
+        cursor.execute(queries.SELECT_CUSTOMER_PACKAGES, (customer_id, customer_id))
         
-        packages = []
-        for pkg in cursor.fetchall():
-            package = {
-                'id': pkg[0],
-                'tracking_number': pkg[1],
-                'sender_name': pkg[16],
-                'receiver_name': pkg[17],
-                'courier_name': pkg[18],
-                'status': pkg[8],
-                'pickup_address': pkg[9],
-                'delivery_address': pkg[10],
-                'created_at': pkg[11],
-                'estimated_delivery': pkg[12]
-            }
-            packages.append(package)
+        return cursor.fetchall()
+    
+    def filter_customer_packages(self, customer_id, package_ids):
+        """Get the ids among ``package_ids`` of packages a customer sent or receives"""
+        conn = self.db.get_connection()
+        rows = conn.execute(
+            queries.SELECT_CUSTOMER_PACKAGE_IDS_AMONG, (json.dumps(list(package_ids)), customer_id)
+        ).fetchall()
+        return {row[0] for row in rows}
+    
+    def get_customer_packages_page(self, customer_id, page_size=DEFAULT_PAGE_SIZE, cursor=None,
+                                   status=None, created_from=None, created_to=None):
+        """Get one newest-first page of packages sent or received by a customer.
+
+        Returns (packages, next_cursor); next_cursor is None on the last page.
+        """
+        page_size = clamp_page_size(page_size)
+        filters, params = page_filters('p', cursor, status, created_from, created_to)
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            queries.SELECT_CUSTOMER_PACKAGES_PAGE.format(filters=filters),
+            (customer_id, *params, page_size + 1, customer_id, *params, page_size + 1, page_size + 1)
+        )
         
-        return packages
+        return split_page(cursor.fetchall(), page_size)
     
     def get_customer_by_id(self, customer_id):
         """Get customer details by ID"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT c.id, u.username, u.password, u.role, u.full_name, u.email, u.phone, u.created_at,
-                   c.address, c.city, c.state, c.zip_code
-            FROM customers c
-            JOIN users u ON c.user_id = u.id
-            WHERE c.id=?
-        """, (customer_id,))
+        cursor.execute(queries.SELECT_CUSTOMER_PROFILE, (customer_id,))
         
         customer_data = cursor.fetchone()
         if customer_data:
@@ -67,6 +61,24 @@ class CustomerController:
             )
         return None
     
+    def add_receiver(self, full_name, address, city, state, zip_code):
+        """Create a receiver customer record and return its customer id.
+
+        Runs on the shared connection without committing, so the caller can
+        commit it together with the package that references it.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            queries.INSERT_USER,
+            (f"temp_{full_name.lower().replace(' ', '_')}", UNUSABLE_PASSWORD, 'customer', full_name, None, None)
+        )
+        user_id = cursor.lastrowid
+        
+        cursor.execute(queries.INSERT_CUSTOMER, (user_id, address, city, state, zip_code))
+        return cursor.lastrowid
+    
     def update_customer_profile(self, customer_id, full_name, email, phone, address, city, state, zip_code):
         """Update customer profile information"""
         conn = self.db.get_connection()
@@ -74,18 +86,18 @@ class CustomerController:
         
         try:
             # Get user_id from customer
-            cursor.execute("SELECT user_id FROM customers WHERE id=?", (customer_id,))
+            cursor.execute(queries.SELECT_CUSTOMER_USER_ID, (customer_id,))
             user_id = cursor.fetchone()[0]
             
             # Update user table
             cursor.execute(
-                "UPDATE users SET full_name=?, email=?, phone=? WHERE id=?",
+                queries.UPDATE_USER_PROFILE,
                 (full_name, email, phone, user_id)
             )
             
             # Update customer table
             cursor.execute(
-                "UPDATE customers SET address=?, city=?, state=?, zip_code=? WHERE id=?",
+                queries.UPDATE_CUSTOMER_ADDRESS,
                 (address, city, state, zip_code, customer_id)
             )
             
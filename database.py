@@ -1,22 +1,175 @@
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from sqlite3 import Error
+from urllib.request import pathname2url
+from migrations import run_migrations
+from passwords import hash_password
+import queries
+
+# Connection tuning applied to every connection handed out by the manager.
+# WAL lets dashboards keep reading while a courier commits a status update;
+# NORMAL sync is durable across application crashes in WAL mode.
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 65536          # page cache per connection (negative PRAGMA value = KiB)
+MMAP_SIZE = 268435456          # 256 MiB of the file memory-mapped for reads
+STATEMENT_CACHE_SIZE = 256
+
+# Every connection attaches the cold archive database under this name
+ARCHIVE_SCHEMA = "archive"
+
+
+def archive_path(db_file):
+    """Archive database kept beside ``db_file``: courier_db.sqlite -> courier_db.archive.sqlite"""
+    if db_file == ":memory:":
+        return db_file
+    root, ext = os.path.splitext(db_file)
+    return f"{root}.archive{ext}"
+
+
+class ConnectionManager:
+    """Hands out one configured connection per thread for a database file.
+
+    A ``read_only`` manager opens the file with mode=ro and query_only, for
+    services that must never write (or hold the write lock). The archive
+    database is attached to every connection; read-only managers skip it
+    if the file does not exist yet.
+    """
+
+    def __init__(self, db_file, read_only=False, archive_file=None):
+        self.db_file = db_file
+        self.read_only = read_only
+        if archive_file is not None and read_only and not os.path.exists(archive_file):
+            archive_file = None
+        self.archive_file = archive_file
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connect(self):
+        """Open a new configured connection (not tracked per thread)"""
+        if self.read_only:
+            conn = sqlite3.connect(
+                f"file:{pathname2url(os.path.abspath(self.db_file))}?mode=ro",
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                cached_statements=STATEMENT_CACHE_SIZE,
+                uri=True
+            )
+        else:
+            conn = sqlite3.connect(
+                self.db_file,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+        self.configure(conn)
+        if self.archive_file is not None:
+            self.attach_archive(conn)
+        return conn
+
+    def configure(self, conn):
+        """Apply journal, locking and cache pragmas and the row factory to a connection"""
+        # Rows are tuples that also index by column name, without building a
+        # dict per row
+        conn.row_factory = sqlite3.Row
+        if self.read_only:
+            # The journal mode is a property of the file; readers inherit it
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+    def attach_archive(self, conn):
+        """Attach the archive database with the same journal settings as the main file"""
+        if self.read_only:
+            conn.execute(
+                f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}",
+                (f"file:{pathname2url(os.path.abspath(self.archive_file))}?mode=ro",)
+            )
+        else:
+            conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (self.archive_file,))
+            conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode=WAL")
+            conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.synchronous=NORMAL")
+
+    def get_connection(self):
+        """Get the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_thread_connection(self):
+        """Close the calling thread's connection if it has one"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.close()
+
+    def close_all(self):
+        """Close every connection opened by this manager"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Error:
+                # Connections owned by other threads can only be closed there
+                pass
+        self._local = threading.local()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_file, read_only=False):
+    """Get the shared connection manager for a database file"""
+    key = (db_file if db_file == ":memory:" else os.path.abspath(db_file), read_only)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ConnectionManager(db_file, read_only, archive_path(db_file))
+            _managers[key] = manager
+        return manager
+
 
 class Database:
-    def __init__(self, db_file="courier_db.sqlite"):
+    def __init__(self, db_file="courier_db.sqlite", read_only=False):
         self.db_file = db_file
-        self.conn = None
-        
+        self.read_only = read_only
+        self.manager = get_manager(db_file, read_only)
+
+    @property
+    def archive_attached(self):
+        """Whether connections can read archived packages"""
+        return self.manager.archive_file is not None
+
+    @property
+    def conn(self):
+        """The calling thread's connection"""
+        return self.manager.get_connection()
+
     def create_connection(self):
-        """Create a database connection to SQLite database"""
+        """Create a new, independently owned connection to the SQLite database"""
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            return self.conn
+            return self.manager.connect()
         except Error as e:
             print(e)
         return None
-    
-    def initialize_database(self):
-        """Initialize database tables"""
+
+    def initialize_database(self, schema_version=None):
+        """Initialize database tables, migrating up to ``schema_version`` (default: the latest)"""
         sql_create_users_table = """
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -29,7 +182,7 @@ class Database:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
         """
-        
+
         sql_create_customers_table = """
         CREATE TABLE IF NOT EXISTS customers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,7 +194,7 @@ class Database:
             FOREIGN KEY (user_id) REFERENCES users (id)
         );
         """
-        
+
         sql_create_couriers_table = """
         CREATE TABLE IF NOT EXISTS couriers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -52,7 +205,7 @@ class Database:
             FOREIGN KEY (user_id) REFERENCES users (id)
         );
         """
-        
+
         sql_create_packages_table = """
         CREATE TABLE IF NOT EXISTS packages (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -74,7 +227,7 @@ class Database:
             FOREIGN KEY (courier_id) REFERENCES couriers (id)
         );
         """
-        
+
         sql_create_tracking_history_table = """
         CREATE TABLE IF NOT EXISTS tracking_history (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -86,34 +239,114 @@ class Database:
             FOREIGN KEY (package_id) REFERENCES packages (id)
         );
         """
-        
+
+        # Delivered packages moved out by archive.Archiver; no foreign keys,
+        # since the customers and couriers they refer to stay in the main file
+        sql_create_archive_tables = [
+            f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.packages (
+                id INTEGER PRIMARY KEY,
+                tracking_number TEXT NOT NULL UNIQUE,
+                sender_id INTEGER NOT NULL,
+                receiver_id INTEGER NOT NULL,
+                courier_id INTEGER,
+                description TEXT,
+                weight REAL,
+                dimensions TEXT,
+                status TEXT,
+                pickup_address TEXT,
+                delivery_address TEXT,
+                created_at TIMESTAMP,
+                estimated_delivery TIMESTAMP,
+                actual_delivery TIMESTAMP
+            );
+            """,
+            f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.tracking_history (
+                id INTEGER PRIMARY KEY,
+                package_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                location TEXT,
+                timestamp TIMESTAMP,
+                notes TEXT,
+                repeats INTEGER NOT NULL DEFAULT 0
+            );
+            """,
+            f"""
+            CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_tracking_history_package_ts
+            ON tracking_history (package_id, timestamp);
+            """,
+            f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.package_current_state (
+                package_id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                location TEXT,
+                updated_at TIMESTAMP NOT NULL,
+                history_id INTEGER NOT NULL
+            );
+            """,
+        ]
+
         try:
-            conn = self.create_connection()
-            cursor = conn.cursor()
-            cursor.execute(sql_create_users_table)
-            cursor.execute(sql_create_customers_table)
-            cursor.execute(sql_create_couriers_table)
-            cursor.execute(sql_create_packages_table)
-            cursor.execute(sql_create_tracking_history_table)
-            conn.commit()
-            
-            # Create admin user if not exists
-            cursor.execute("SELECT * FROM users WHERE username='admin'")
-            if not cursor.fetchone():
-                cursor.execute(
-                    "INSERT INTO users (username, password, role, full_name) VALUES (?, ?, ?, ?)",
-                    ('admin', 'admin123', 'admin', 'Admin User')
-                )
-                conn.commit()
-                
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql_create_users_table)
+                cursor.execute(sql_create_customers_table)
+                cursor.execute(sql_create_couriers_table)
+                cursor.execute(sql_create_packages_table)
+                cursor.execute(sql_create_tracking_history_table)
+                if self.archive_attached:
+                    for sql in sql_create_archive_tables:
+                        cursor.execute(sql)
+
+                # Create admin user if not exists
+                cursor.execute(queries.SELECT_USER_ID_BY_USERNAME, ('admin',))
+                if not cursor.fetchone():
+                    cursor.execute(
+                        queries.INSERT_USER,
+                        ('admin', hash_password('admin123'), 'admin', 'Admin User', None, None)
+                    )
+
+            # Bring older database files up to the current schema
+            run_migrations(self, schema_version)
         except Error as e:
             print(e)
-        finally:
-            if conn:
-                conn.close()
-    
+
     def get_connection(self):
         """Get a database connection"""
-        if not self.conn:
-            self.create_connection()
-        return self.conn
\ No newline at end of file
+        return self.manager.get_connection()
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """Run a block in a transaction on this thread's connection.
+
+        Commits on success and rolls back on error. ``immediate`` takes the
+        write lock up front so concurrent writers queue on busy_timeout
+        instead of failing on a lock upgrade. Nested calls use savepoints.
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            savepoint = f"sp_{threading.get_ident()}_{id(conn)}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+            return
+
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def close(self):
+        """Close the calling thread's connection"""
+        self.manager.close_thread_connection()
@@ -0,0 +1,64 @@
+import heapq
+
+DEFAULT_MAX_LOAD = 40
+
+
+def pickup_zone(zip_code, city):
+    """Bucket a pickup by ZIP code, falling back to city"""
+    return (zip_code or '').strip() or (city or '').strip().lower()
+
+
+def plan_assignments(packages, couriers, max_load=DEFAULT_MAX_LOAD):
+    """Assign pending packages to couriers in one pass.
+
+    ``packages`` is an iterable of (package_id, estimated_delivery, zone)
+    and ``couriers`` of (courier_id, active_packages). Packages are taken
+    earliest deadline first, so when capacity runs out it is the latest
+    deadlines that stay pending. Each zone keeps filling the courier it was
+    last given until that courier reaches ``max_load``; a zone then gets
+    the courier with the most spare capacity, which keeps each route to as
+    few zones as the fleet allows.
+
+    Returns (assignments, unassigned) where assignments is a list of
+    (package_id, courier_id) and unassigned a list of package ids.
+    """
+    # Packages without a deadline go last
+    queue = [
+        (estimated_delivery is None, estimated_delivery or '', package_id, zone)
+        for package_id, estimated_delivery, zone in packages
+    ]
+    heapq.heapify(queue)
+
+    remaining = {courier_id: max_load - active for courier_id, active in couriers}
+    spare = [(-capacity, courier_id) for courier_id, capacity in remaining.items() if capacity > 0]
+    heapq.heapify(spare)
+    zone_courier = {}
+
+    assignments = []
+    unassigned = []
+    while queue:
+        _, _, package_id, zone = heapq.heappop(queue)
+
+        courier_id = zone_courier.get(zone)
+        if courier_id is None or remaining[courier_id] <= 0:
+            courier_id = None
+            while spare:
+                capacity, candidate = heapq.heappop(spare)
+                if -capacity == remaining[candidate]:
+                    courier_id = candidate
+                    break
+                if remaining[candidate] > 0:
+                    # Stale entry: the courier was filled through its zone since
+                    heapq.heappush(spare, (-remaining[candidate], candidate))
+            if courier_id is None:
+                unassigned.append(package_id)
+                continue
+            zone_courier[zone] = courier_id
+            if remaining[courier_id] > 1:
+                # Leave the courier reachable for other zones once fresh couriers run out
+                heapq.heappush(spare, (-(remaining[courier_id] - 1), courier_id))
+
+        assignments.append((package_id, courier_id))
+        remaining[courier_id] -= 1
+
+    return assignments, unassigned
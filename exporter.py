@@ -0,0 +1,156 @@
+import csv
+import gzip
+import io
+import json
+import os
+import queries
+
+EXPORT_CHUNK_SIZE = 10000
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+# dataset -> (query template, table alias, column filtered by date range)
+EXPORT_DATASETS = {
+    'packages': (queries.EXPORT_PACKAGES, 'p', 'created_at'),
+    'tracking_history': (queries.EXPORT_TRACKING_HISTORY, 'h', 'timestamp'),
+    'assignments': (queries.EXPORT_ASSIGNMENTS, 'p', 'created_at'),
+}
+
+
+def detect_export_format(path):
+    """Guess (format, compressed) from an output path such as history.jsonl.gz"""
+    base, extension = os.path.splitext(path.lower())
+    compressed = extension == '.gz'
+    if compressed:
+        extension = os.path.splitext(base)[1]
+    extension = extension.lstrip('.')
+    if extension in ('json', 'ndjson'):
+        extension = 'jsonl'
+    return (extension if extension in EXPORT_FORMATS else 'csv'), compressed
+
+
+def export_conditions(alias, date_column, status=None, date_from=None, date_to=None):
+    """Build the filter conditions for an export query.
+
+    Returns (sql, params) where sql starts with " AND" (or is empty). The
+    filtered columns are prefixed with unary + so SQLite keeps walking the
+    table in id order instead of switching to an index and sorting.
+    """
+    conditions = []
+    params = []
+    if status:
+        conditions.append(f"+{alias}.status = ?")
+        params.append(status)
+    if date_from:
+        conditions.append(f"+{alias}.{date_column} >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append(f"+{alias}.{date_column} < ?")
+        params.append(date_to)
+    sql = ''.join(f" AND {condition}" for condition in conditions)
+    return sql, params
+
+
+class Exporter:
+    """Streams packages, tracking history or courier assignments to CSV/JSONL files.
+
+    Rows are read with keyset queries of ``chunk_size`` rows in id order,
+    so memory stays flat however large the table is. After every chunk the
+    output is flushed and a checkpoint recording the last exported id and
+    the file size is written next to it (``<output>.checkpoint``). A resumed
+    export truncates the file back to the checkpoint and carries on after
+    that id, so no row is written twice. Compressed output writes one gzip
+    member per chunk; gzip readers treat the members as a single stream.
+    """
+
+    def __init__(self, db, chunk_size=EXPORT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def iter_chunks(self, dataset, after_id=0, status=None, date_from=None, date_to=None):
+        """Yield lists of rows with ids greater than ``after_id``"""
+        template, alias, date_column = EXPORT_DATASETS[dataset]
+        conditions, params = export_conditions(alias, date_column, status, date_from, date_to)
+        sql = template.format(conditions=conditions)
+        conn = self.db.get_connection()
+        last_id = after_id
+        while True:
+            rows = conn.execute(sql, (last_id, *params, self.chunk_size)).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+            if len(rows) < self.chunk_size:
+                return
+
+    def export(self, dataset, path, export_format=None, compress=None, status=None,
+               date_from=None, date_to=None, after_id=None, resume=False):
+        """Export a dataset to ``path`` and return (rows written, last exported id)"""
+        if dataset not in EXPORT_DATASETS:
+            raise ValueError(f"Unknown dataset {dataset!r}")
+        detected_format, detected_compress = detect_export_format(path)
+        export_format = export_format or detected_format
+        compress = detected_compress if compress is None else compress
+        filters = {'status': status, 'date_from': date_from, 'date_to': date_to}
+        checkpoint_path = f"{path}.checkpoint"
+
+        rows_written = 0
+        offset = 0
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding='utf-8') as handle:
+                checkpoint = json.load(handle)
+            if (checkpoint['dataset'], checkpoint['format'], checkpoint['filters']) != (dataset, export_format, filters):
+                raise ValueError("Checkpoint was written for a different export")
+            after_id = checkpoint['last_id']
+            rows_written = checkpoint['rows']
+            offset = checkpoint['offset']
+        last_id = after_id or 0
+
+        mode = 'r+b' if offset else 'wb'
+        with open(path, mode) as raw:
+            raw.truncate(offset)
+            raw.seek(offset)
+            write_header = offset == 0
+            for rows in self.iter_chunks(dataset, last_id, status, date_from, date_to):
+                data = self._serialize(rows, export_format, write_header)
+                write_header = False
+                if compress:
+                    with gzip.GzipFile(fileobj=raw, mode='wb') as member:
+                        member.write(data)
+                else:
+                    raw.write(data)
+                raw.flush()
+                os.fsync(raw.fileno())
+
+                rows_written += len(rows)
+                last_id = rows[-1][0]
+                self._write_checkpoint(checkpoint_path, {
+                    'dataset': dataset,
+                    'format': export_format,
+                    'filters': filters,
+                    'last_id': last_id,
+                    'rows': rows_written,
+                    'offset': raw.tell(),
+                })
+
+        return rows_written, last_id
+
+    def _serialize(self, rows, export_format, write_header):
+        """Encode one chunk of rows as UTF-8 CSV or JSON lines"""
+        buffer = io.StringIO()
+        if export_format == 'jsonl':
+            for row in rows:
+                buffer.write(json.dumps(dict(row), default=str))
+                buffer.write('\n')
+        else:
+            writer = csv.writer(buffer)
+            if write_header:
+                writer.writerow(rows[0].keys())
+            writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def _write_checkpoint(self, checkpoint_path, checkpoint):
+        """Replace the checkpoint atomically so a crash never leaves half a file"""
+        temp_path = f"{checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(checkpoint, handle)
+        os.replace(temp_path, checkpoint_path)
@@ -0,0 +1,67 @@
+import csv
+import json
+import os
+
+MANIFEST_FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(path):
+    """Guess the manifest format from the file extension"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('json', 'ndjson'):
+        return 'jsonl'
+    return extension if extension in MANIFEST_FORMATS else 'csv'
+
+
+class ManifestImporter:
+    """Streams a CSV or JSONL shipment manifest into CourierController.create_packages_bulk"""
+
+    def __init__(self, courier_ctrl, chunk_size=None):
+        self.courier_ctrl = courier_ctrl
+        self.chunk_size = chunk_size
+        self.line_numbers = []
+        self.errors = []
+
+    def read_csv(self, handle):
+        """Yield package dicts from a CSV manifest with a header row"""
+        reader = csv.DictReader(handle)
+        for row in reader:
+            self.line_numbers.append(reader.line_num)
+            yield row
+
+    def read_jsonl(self, handle):
+        """Yield package dicts from a JSON-lines manifest"""
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                self.errors.append((line_number, f"Invalid JSON: {e}"))
+                continue
+            if not isinstance(row, dict):
+                self.errors.append((line_number, "Invalid JSON: expected an object"))
+                continue
+            self.line_numbers.append(line_number)
+            yield row
+
+    def import_file(self, path, manifest_format=None):
+        """Import a manifest and return (created, errors) keyed by source line number"""
+        manifest_format = manifest_format or detect_format(path)
+        self.line_numbers = []
+        self.errors = []
+
+        with open(path, newline='', encoding='utf-8') as handle:
+            rows = self.read_jsonl(handle) if manifest_format == 'jsonl' else self.read_csv(handle)
+            kwargs = {'chunk_size': self.chunk_size} if self.chunk_size else {}
+            _, result = self.courier_ctrl.create_packages_bulk(rows, **kwargs)
+
+        created = [
+            (self.line_numbers[index], package_id, tracking_number)
+            for index, package_id, tracking_number in result['created']
+        ]
+        errors = self.errors + [
+            (self.line_numbers[index], message) for index, message in result['errors']
+        ]
+        errors.sort()
+        return created, errors
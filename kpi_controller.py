@@ -0,0 +1,58 @@
+from database import Database
+from datetime import date, timedelta
+import queries
+
+SUMMARY_DAYS = 30
+
+class KpiController:
+    """Admin KPIs read from counter tables kept current by triggers on packages"""
+    
+    def __init__(self, db=None):
+        self.db = db or Database()
+    
+    def get_summary(self, days=SUMMARY_DAYS):
+        """Get package counts by status, courier utilization and recent daily deliveries"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(queries.SELECT_KPI_STATUS_COUNTS)
+        by_status = dict(cursor.fetchall())
+        
+        cursor.execute(queries.SELECT_KPI_COURIER_COUNTS)
+        couriers = cursor.fetchall()
+        
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        cursor.execute(queries.SELECT_KPI_DAILY_COUNTS, (since,))
+        daily = cursor.fetchall()
+        
+        delivered = sum(day['delivered'] for day in daily)
+        on_time = sum(day['on_time'] for day in daily)
+        busy = sum(1 for courier in couriers if courier['active'])
+        return {
+            'total_packages': sum(by_status.values()),
+            'by_status': by_status,
+            'couriers': couriers,
+            'courier_utilization': busy / len(couriers) if couriers else 0.0,
+            'daily': daily,
+            'days': days,
+            'delivered': delivered,
+            'on_time_rate': on_time / delivered if delivered else None,
+        }
+    
+    def rebuild_counters(self):
+        """Recompute every KPI counter from packages and return how many rows changed"""
+        with self.db.transaction() as conn:
+            before = self._snapshot(conn)
+            for statement in queries.REBUILD_KPI_COUNTERS:
+                conn.execute(statement)
+            after = self._snapshot(conn)
+        return len({entry[:2] for entry in before ^ after})
+    
+    def _snapshot(self, conn):
+        """Every non-zero counter row as a set of tuples, for comparing before and after a rebuild"""
+        return {
+            (table, *row)
+            for table in ('kpi_status_counts', 'kpi_courier_counts', 'kpi_daily_counts')
+            for row in conn.execute(f"SELECT * FROM {table}")
+            if any(row[1:])
+        }
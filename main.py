@@ -1,17 +1,40 @@
+import importlib
 import tkinter as tk
 from tkinter import ttk
+from auth_controller import AuthController
+from change_feed import ChangeFeed
 from database import Database
 from styles import Styles
-from views.customer_view import CustomerDashboard
-from views.auth_view import LoginView
+from views.background import BackgroundTasks
+
+# Screen name -> module defining it. Modules are imported and screens built
+# the first time they are shown, so startup only pays for the login screen.
+VIEWS = {
+    'LoginView': 'views.auth_view',
+    'RegisterView': 'views.auth_view',
+    'AdminDashboard': 'views.admin_view',
+    'CourierDashboard': 'views.courier_view',
+    'CustomerDashboard': 'views.customer_view',
+}
+
+# Dashboard for each role; dashboards show the logged-in user's data and are
+# rebuilt for every login
+DASHBOARDS = {
+    'admin': 'AdminDashboard',
+    'courier': 'CourierDashboard',
+    'customer': 'CustomerDashboard',
+}
+
+# How often the visible screen is told about changes made elsewhere
+CHANGE_POLL_MS = 2000
 
 class CourierApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, db_file="courier_db.sqlite"):
         super().__init__()
         
         # Initialize database
-        db = Database()
-        db.initialize_database()
+        self.db = Database(db_file)
+        self.db.initialize_database()
         
         # Window configuration
         self.title("Courier Tracking System")
@@ -23,35 +46,83 @@ class CourierApp(tk.Tk):
         self.style = ttk.Style()
         self.style.configure('TButton', font=self.styles.button_font)
         
-        # Container frame
-        container = tk.Frame(self)
-        container.pack(fill='both', expand=True)
-        container.grid_rowconfigure(0, weight=1)
-        container.grid_columnconfigure(0, weight=1)
+        # One login shared by every screen
+        self.auth = AuthController(self.db)
         
-        self.frames = {}
+        # Database calls from the views run on these worker threads
+        self.tasks = BackgroundTasks(self)
+        self.current_frame = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
-        # Create all frames
-        from views.auth_view import LoginView, RegisterView
-        from views.admin_view import AdminDashboard
-        from views.courier_view import CourierDashboard
-        from views.customer_view import CustomerDashboard
+        # Lets open dashboards refresh when other users change the data
+        self.changes = ChangeFeed(self.db)
+        self.changes_job = self.after(CHANGE_POLL_MS, self.poll_changes)
         
-        frame = LoginView(container, self, CustomerDashboard)
-        for F in (LoginView, RegisterView, AdminDashboard, CourierDashboard, CustomerDashboard):
-            frame = F(container, self)
-            self.frames[F] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
-            
+        # Container frame
+        self.container = tk.Frame(self)
+        self.container.pack(fill='both', expand=True)
+        self.container.grid_rowconfigure(0, weight=1)
+        self.container.grid_columnconfigure(0, weight=1)
+        
+        self.frames = {}
         
         # Show login frame first
-        self.show_frame(LoginView)
+        self.show_frame('LoginView')
+    
+    def get_frame(self, name):
+        """Get a screen by name, importing and building it on first use"""
+        frame = self.frames.get(name)
+        if frame is None:
+            view_class = getattr(importlib.import_module(VIEWS[name]), name)
+            frame = view_class(self.container, self)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[name] = frame
+        return frame
     
-    def show_frame(self, cont):
-        """Show a frame for the given class"""
-        frame = self.frames[cont]
+    def show_frame(self, name):
+        """Show the screen with the given name"""
+        frame = self.get_frame(name)
+        if self.current_frame is not None and self.current_frame is not frame:
+            # Results for the screen being left are no longer wanted
+            self.tasks.cancel(self.current_frame)
+        self.current_frame = frame
         frame.tkraise()
+    
+    def show_dashboard(self):
+        """Show a freshly built dashboard for the logged-in user's role"""
+        self.discard_dashboards()
+        user = self.auth.get_current_user()
+        self.show_frame(DASHBOARDS.get(user.role, 'CustomerDashboard'))
+    
+    def logout(self):
+        """End the session and return to the login screen"""
+        self.auth.logout()
+        self.show_frame('LoginView')
+        self.discard_dashboards()
+    
+    def discard_dashboards(self):
+        """Destroy dashboards built for a previous login"""
+        for name in DASHBOARDS.values():
+            frame = self.frames.pop(name, None)
+            if frame is not None:
+                self.tasks.cancel(frame)
+                frame.destroy()
+    
+    def poll_changes(self):
+        """Pass anything committed since the last poll to the visible screen"""
+        changes = self.changes.poll()
+        handler = getattr(self.current_frame, 'on_data_changed', None)
+        if changes is not None and handler is not None:
+            handler(changes)
+        self.changes_job = self.after(CHANGE_POLL_MS, self.poll_changes)
+    
+    def on_close(self):
+        """Stop background work and close the window"""
+        self.after_cancel(self.changes_job)
+        self.changes.close()
+        self.tasks.shutdown()
+        self.destroy()
 
 if __name__ == "__main__":
     app = CourierApp()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
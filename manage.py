@@ -0,0 +1,221 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from database import Database
+from dispatch import DEFAULT_MAX_LOAD
+
+
+def open_database(args):
+    """Open and migrate the database named on the command line"""
+    db = Database(args.db)
+    db.initialize_database()
+    return db
+
+
+def import_manifest(args):
+    """Import a CSV/JSONL shipment manifest"""
+    from courier_controller import CourierController
+    from importer import ManifestImporter
+
+    db = open_database(args)
+    importer = ManifestImporter(CourierController(db), chunk_size=args.chunk_size)
+
+    started = time.perf_counter()
+    created, errors = importer.import_file(args.manifest, args.format)
+    elapsed = time.perf_counter() - started
+
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(('line', 'package_id', 'tracking_number'))
+            writer.writerows(created)
+
+    for line_number, message in errors:
+        print(f"line {line_number}: {message}", file=sys.stderr)
+
+    rate = len(created) / elapsed if elapsed else 0
+    print(f"Imported {len(created)} packages ({len(errors)} errors) in {elapsed:.2f}s ({rate:.0f}/s)")
+    return 1 if errors else 0
+
+
+def export_data(args):
+    """Stream a dataset to a CSV/JSONL file"""
+    from exporter import Exporter
+
+    db = open_database(args)
+    exporter = Exporter(db, **({'chunk_size': args.chunk_size} if args.chunk_size else {}))
+
+    started = time.perf_counter()
+    try:
+        rows, last_id = exporter.export(
+            args.dataset, args.output, args.format, True if args.gzip else None,
+            args.status, args.date_from, args.date_to, args.after_id, args.resume
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+
+    rate = rows / elapsed if elapsed else 0
+    print(f"Exported {rows} rows up to id {last_id} in {elapsed:.2f}s ({rate:.0f}/s)")
+    return 0
+
+
+def rebuild_kpis(args):
+    """Recompute the admin KPI counters from the packages table"""
+    from kpi_controller import KpiController
+
+    db = open_database(args)
+    started = time.perf_counter()
+    changed = KpiController(db).rebuild_counters()
+    elapsed = time.perf_counter() - started
+
+    print(f"Rebuilt KPI counters in {elapsed:.2f}s ({changed} counter rows corrected)")
+    return 0
+
+
+def dispatch_packages(args):
+    """Assign pending packages to couriers with spare capacity"""
+    from courier_controller import CourierController
+
+    db = open_database(args)
+    started = time.perf_counter()
+    success, result = CourierController(db).dispatch_pending_packages(args.max_load)
+    elapsed = time.perf_counter() - started
+
+    if not success:
+        print(result, file=sys.stderr)
+        return 1
+    couriers = len({courier_id for _, courier_id in result['assigned']})
+    print(f"Assigned {len(result['assigned'])} packages to {couriers} couriers "
+          f"({len(result['unassigned'])} left pending) in {elapsed:.2f}s")
+    return 0
+
+
+def archive_packages(args):
+    """Move long-delivered packages into the archive database"""
+    from archive import Archiver
+    from database import archive_path
+
+    db = open_database(args)
+    archiver = Archiver(db, **({'chunk_size': args.chunk_size} if args.chunk_size else {}))
+
+    def progress(moved):
+        print(f"  {moved} packages archived", flush=True)
+
+    started = time.perf_counter()
+    moved = archiver.archive_delivered(args.older_than_days, args.limit, progress if args.verbose else None)
+    elapsed = time.perf_counter() - started
+
+    rate = moved / elapsed if elapsed else 0
+    print(f"Archived {moved} packages to {archive_path(args.db)} in {elapsed:.2f}s ({rate:.0f}/s)")
+    return 0
+
+
+def compact_history(args):
+    """Collapse repeated tracking events and optionally reclaim the freed space"""
+    from compaction import HistoryCompactor
+
+    db = open_database(args)
+    compactor = HistoryCompactor(db)
+    if args.collapse_new:
+        compactor.set_collapsing(args.collapse_new == 'on')
+
+    started = time.perf_counter()
+    removed = compactor.collapse_repeats()
+    elapsed = time.perf_counter() - started
+    print(f"Collapsed {removed} repeated tracking events in {elapsed:.2f}s "
+          f"(new repeats {'are' if compactor.collapsing_enabled() else 'are not'} collapsed)")
+
+    if args.vacuum:
+        size = os.path.getsize(args.db)
+        db.get_connection().execute("VACUUM main")
+        print(f"Vacuumed {args.db}: {size / 1e6:.1f} MB -> {os.path.getsize(args.db) / 1e6:.1f} MB")
+    return 0
+
+
+def serve_tracking(args):
+    """Run the public tracking HTTP service until interrupted"""
+    import asyncio
+    from tracking_service import TrackingService
+
+    # Migrate first; the service itself only opens read-only connections
+    open_database(args).close()
+    service = TrackingService(args.db, workers=args.workers)
+
+    def ready(address):
+        print(f"Serving tracking lookups on http://{address[0]}:{address[1]}", flush=True)
+
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Courier Tracking System maintenance commands")
+    parser.add_argument('--db', default="courier_db.sqlite", help="database file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_cmd = commands.add_parser('import', help="bulk import a shipment manifest")
+    import_cmd.add_argument('manifest', help="CSV or JSONL manifest file")
+    import_cmd.add_argument('--format', choices=('csv', 'jsonl'), help="manifest format (default: from extension)")
+    import_cmd.add_argument('--chunk-size', type=int, help="packages per transaction")
+    import_cmd.add_argument('--output', help="write line,package_id,tracking_number mapping CSV here")
+    import_cmd.set_defaults(func=import_manifest)
+
+    export_cmd = commands.add_parser('export', help="stream packages, tracking history or assignments to a file")
+    export_cmd.add_argument('dataset', choices=('packages', 'tracking_history', 'assignments'))
+    export_cmd.add_argument('output', help="output file; .csv, .jsonl, optionally ending in .gz")
+    export_cmd.add_argument('--format', choices=('csv', 'jsonl'), help="output format (default: from extension)")
+    export_cmd.add_argument('--gzip', action='store_true', help="gzip the output regardless of extension")
+    export_cmd.add_argument('--status', help="only rows with this status")
+    export_cmd.add_argument('--from', dest='date_from', help="only rows on or after this date (YYYY-MM-DD)")
+    export_cmd.add_argument('--to', dest='date_to', help="only rows before this date (YYYY-MM-DD)")
+    export_cmd.add_argument('--after-id', type=int, help="start after this id")
+    export_cmd.add_argument('--resume', action='store_true', help="continue from the output's checkpoint")
+    export_cmd.add_argument('--chunk-size', type=int, help="rows per query")
+    export_cmd.set_defaults(func=export_data)
+
+    kpi_cmd = commands.add_parser('rebuild-kpis', help="recompute the admin KPI counters")
+    kpi_cmd.set_defaults(func=rebuild_kpis)
+
+    dispatch_cmd = commands.add_parser('dispatch', help="assign pending packages to couriers with spare capacity")
+    dispatch_cmd.add_argument('--max-load', type=int, default=DEFAULT_MAX_LOAD, help="most active packages per courier")
+    dispatch_cmd.set_defaults(func=dispatch_packages)
+
+    archive_cmd = commands.add_parser('archive', help="move long-delivered packages into the archive database")
+    archive_cmd.add_argument('--older-than-days', type=int, default=90,
+                             help="archive packages delivered more than this many days ago")
+    archive_cmd.add_argument('--limit', type=int, help="archive at most this many packages")
+    archive_cmd.add_argument('--chunk-size', type=int, help="packages per transaction")
+    archive_cmd.add_argument('--verbose', action='store_true', help="report progress after every chunk")
+    archive_cmd.set_defaults(func=archive_packages)
+
+    compact_cmd = commands.add_parser('compact-history', help="collapse repeated tracking events")
+    compact_cmd.add_argument('--collapse-new', choices=('on', 'off'),
+                             help="also collapse repeats as they are recorded (setting is kept in the database)")
+    compact_cmd.add_argument('--vacuum', action='store_true', help="rewrite the database file to reclaim space")
+    compact_cmd.set_defaults(func=compact_history)
+
+    serve_cmd = commands.add_parser('serve-tracking', help="serve tracking lookups over HTTP")
+    serve_cmd.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    serve_cmd.add_argument('--port', type=int, default=8080, help="port to listen on (0 picks a free one)")
+    serve_cmd.add_argument('--workers', type=int, default=8, help="lookup threads, each with a read-only connection")
+    serve_cmd.set_defaults(func=serve_tracking)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""Versioned schema migrations.
+
+The schema version lives in ``PRAGMA user_version``. Each migration is a
+``(version, description, steps)`` tuple; a step is either an SQL string or
+a callable taking the connection. Migrations run in order, each in its own
+transaction, so an existing ``courier_db.sqlite`` is upgraded in place the
+next time the application starts.
+"""
+import queries
+from passwords import UNUSABLE_PASSWORD, hash_password, is_password_hash
+
+
+def _kpi_contribution(row, sign):
+    """Trigger statements adding (sign '+') or removing (sign '-') one package row from the KPI counters"""
+    on_time = f"COALESCE(julianday({row}.actual_delivery) <= julianday({row}.estimated_delivery), 0)"
+    return f"""
+            INSERT INTO kpi_status_counts (status, packages)
+            VALUES (COALESCE({row}.status, 'pending'), {sign}1)
+            ON CONFLICT (status) DO UPDATE SET packages = packages + excluded.packages;
+
+            INSERT INTO kpi_courier_counts (courier_id, packages, active, delivered, on_time)
+            SELECT {row}.courier_id, {sign}1,
+                   {sign}(COALESCE({row}.status, 'pending') NOT IN ('delivered', 'failed')),
+                   {sign}({row}.actual_delivery IS NOT NULL),
+                   {sign}{on_time}
+            WHERE {row}.courier_id IS NOT NULL
+            ON CONFLICT (courier_id) DO UPDATE SET
+                packages = packages + excluded.packages,
+                active = active + excluded.active,
+                delivered = delivered + excluded.delivered,
+                on_time = on_time + excluded.on_time;
+
+            INSERT INTO kpi_daily_counts (day, created, delivered, on_time)
+            VALUES (date({row}.created_at), {sign}1, 0, 0)
+            ON CONFLICT (day) DO UPDATE SET created = created + excluded.created;
+
+            INSERT INTO kpi_daily_counts (day, created, delivered, on_time)
+            SELECT date({row}.actual_delivery), 0, {sign}1, {sign}{on_time}
+            WHERE {row}.actual_delivery IS NOT NULL
+            ON CONFLICT (day) DO UPDATE SET
+                delivered = delivered + excluded.delivered,
+                on_time = on_time + excluded.on_time;"""
+
+
+
+PACKAGE_SEARCH_COLUMNS = """rowid, tracking_number, description, pickup_address, delivery_address,
+    sender_name, receiver_name, courier_name"""
+
+# Package ids whose index rows show a user's name
+_PACKAGES_NAMING_USER = """
+    SELECT p.id FROM packages p JOIN customers s ON p.sender_id = s.id WHERE s.user_id = NEW.id
+    UNION SELECT p.id FROM packages p JOIN customers r ON p.receiver_id = r.id WHERE r.user_id = NEW.id
+    UNION SELECT p.id FROM packages p JOIN couriers c ON p.courier_id = c.id WHERE c.user_id = NEW.id"""
+
+
+def _package_search_rows(where):
+    """SELECT producing package_search rows for the packages matching ``where``"""
+    return f"""
+            SELECT p.id, p.tracking_number, p.description, p.pickup_address, p.delivery_address,
+                   su.full_name, ru.full_name, cu.full_name
+            FROM packages p
+            LEFT JOIN customers s ON s.id = p.sender_id
+            LEFT JOIN users su ON su.id = s.user_id
+            LEFT JOIN customers r ON r.id = p.receiver_id
+            LEFT JOIN users ru ON ru.id = r.user_id
+            LEFT JOIN couriers c ON c.id = p.courier_id
+            LEFT JOIN users cu ON cu.id = c.user_id
+            WHERE {where}"""
+
+
+# The change log keeps roughly the newest CHANGE_LOG_RETENTION rows; every
+# CHANGE_LOG_PRUNE_EVERY-th insert drops the older ones
+CHANGE_LOG_RETENTION = 100000
+CHANGE_LOG_PRUNE_EVERY = 10000
+
+
+def _change_log_triggers(table, entity):
+    """Triggers recording every insert, update and delete on ``table`` in change_log"""
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_change_log_{op}
+        AFTER {op.upper()} ON {table}
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, op) VALUES ('{entity}', {row}.id, '{op}');
+        END"""
+        for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD'))
+    ]
+
+
+def _hash_plaintext_passwords(conn):
+    """Hash passwords that were stored as plaintext, such as the original seeded admin.
+
+    Receivers created for a package got a temp_<name> account with the
+    placeholder password temp123; hashing it would let anyone log in as
+    them, so those accounts are locked instead.
+    """
+    conn.execute(
+        r"UPDATE users SET password=? WHERE username LIKE 'temp\_%' ESCAPE '\' AND password='temp123'",
+        (UNUSABLE_PASSWORD,)
+    )
+    plaintext = [
+        (hash_password(row['password']), row['id'])
+        for row in conn.execute("SELECT id, password FROM users")
+        if row['password'] != UNUSABLE_PASSWORD and not is_password_hash(row['password'])
+    ]
+    conn.executemany(queries.UPDATE_USER_PASSWORD, plaintext)
+
+
+def _continue_event_ids(conn):
+    """Start tracking_events ids after every id tracking_history ever handed out"""
+    conn.execute("""
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT 'tracking_events', 0
+        WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tracking_events')
+    """)
+    conn.execute("""
+        UPDATE sqlite_sequence
+        SET seq = (SELECT MAX(seq) FROM sqlite_sequence WHERE name IN ('tracking_history', 'tracking_events'))
+        WHERE name = 'tracking_events'
+    """)
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'tracking_history'")
+
+
+def _add_archive_repeats(conn):
+    """Add tracking_history.repeats to an archive created before migration 11"""
+    if 'archive' not in {row[1] for row in conn.execute("PRAGMA database_list")}:
+        return
+    columns = {row[1] for row in conn.execute("PRAGMA archive.table_info(tracking_history)")}
+    if columns and 'repeats' not in columns:
+        conn.execute("ALTER TABLE archive.tracking_history ADD COLUMN repeats INTEGER NOT NULL DEFAULT 0")
+
+
+# Epoch seconds for a timestamp text, or now when there is none. Unparseable
+# text gives NULL, which tracking_events.ts rejects.
+def _epoch(value):
+    return f"""CASE WHEN {value} IS NULL THEN CAST(strftime('%s', 'now') AS INTEGER)
+                ELSE CAST(strftime('%s', {value}) AS INTEGER) END"""
+
+
+MIGRATIONS = [
+    (1, "Indexes for dashboard listings and tracking history", [
+        "CREATE INDEX IF NOT EXISTS idx_packages_sender_created ON packages (sender_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_packages_receiver_created ON packages (receiver_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_packages_courier_created ON packages (courier_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_packages_status ON packages (status)",
+        "CREATE INDEX IF NOT EXISTS idx_tracking_history_package_ts ON tracking_history (package_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_customers_user_id ON customers (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_couriers_user_id ON couriers (user_id)",
+    ]),
+    (2, "Sequence table for block-allocated tracking numbers", [
+        """CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )""",
+    ]),
+    (3, "Indexes for keyset-paginated package listings", [
+        "CREATE INDEX IF NOT EXISTS idx_packages_created ON packages (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_packages_status_created ON packages (status, created_at)",
+        "DROP INDEX IF EXISTS idx_packages_status",
+    ]),
+    (4, "Materialized current package state maintained from tracking history", [
+        """CREATE TABLE IF NOT EXISTS package_current_state (
+            package_id INTEGER PRIMARY KEY REFERENCES packages (id) ON DELETE CASCADE,
+            status TEXT NOT NULL,
+            location TEXT,
+            updated_at TIMESTAMP NOT NULL,
+            history_id INTEGER NOT NULL
+        )""",
+        # tracking_history is the source of truth: each event becomes the
+        # current state unless a newer one (by timestamp, then id) is already
+        # there, keeping the last known location when the event has none, and
+        # packages.status follows the current state
+        """CREATE TRIGGER IF NOT EXISTS trg_tracking_history_current_state
+        AFTER INSERT ON tracking_history
+        BEGIN
+            INSERT INTO package_current_state (package_id, status, location, updated_at, history_id)
+            VALUES (NEW.package_id, NEW.status, NEW.location, NEW.timestamp, NEW.id)
+            ON CONFLICT (package_id) DO UPDATE SET
+                status = excluded.status,
+                location = COALESCE(excluded.location, package_current_state.location),
+                updated_at = excluded.updated_at,
+                history_id = excluded.history_id
+            WHERE (excluded.updated_at, excluded.history_id)
+                >= (package_current_state.updated_at, package_current_state.history_id);
+
+            UPDATE packages SET status = NEW.status
+            WHERE id = NEW.package_id
+              AND status IS NOT NEW.status
+              AND (SELECT history_id FROM package_current_state WHERE package_id = NEW.package_id) = NEW.id;
+        END""",
+        """INSERT OR IGNORE INTO package_current_state (package_id, status, location, updated_at, history_id)
+        SELECT latest.package_id, latest.status,
+               COALESCE(latest.location, (
+                   SELECT h.location FROM tracking_history h
+                   WHERE h.package_id = latest.package_id AND h.location IS NOT NULL
+                   ORDER BY h.timestamp DESC, h.id DESC LIMIT 1
+               )),
+               latest.timestamp, latest.id
+        FROM (
+            SELECT package_id, status, location, timestamp, id,
+                   ROW_NUMBER() OVER (PARTITION BY package_id ORDER BY timestamp DESC, id DESC) AS position
+            FROM tracking_history
+        ) latest
+        WHERE latest.position = 1""",
+        # Packages without any history keep their own status
+        """INSERT OR IGNORE INTO package_current_state (package_id, status, location, updated_at, history_id)
+        SELECT id, COALESCE(status, 'pending'), NULL, COALESCE(created_at, CURRENT_TIMESTAMP), 0 FROM packages""",
+        """UPDATE packages SET status = state.status
+        FROM package_current_state state
+        WHERE state.package_id = packages.id AND packages.status IS NOT state.status""",
+    ]),
+    (5, "KPI counter tables maintained by triggers on packages", [
+        """CREATE TABLE IF NOT EXISTS kpi_status_counts (
+            status TEXT PRIMARY KEY,
+            packages INTEGER NOT NULL DEFAULT 0
+        )""",
+        """CREATE TABLE IF NOT EXISTS kpi_courier_counts (
+            courier_id INTEGER PRIMARY KEY,
+            packages INTEGER NOT NULL DEFAULT 0,
+            active INTEGER NOT NULL DEFAULT 0,
+            delivered INTEGER NOT NULL DEFAULT 0,
+            on_time INTEGER NOT NULL DEFAULT 0
+        )""",
+        """CREATE TABLE IF NOT EXISTS kpi_daily_counts (
+            day TEXT PRIMARY KEY,
+            created INTEGER NOT NULL DEFAULT 0,
+            delivered INTEGER NOT NULL DEFAULT 0,
+            on_time INTEGER NOT NULL DEFAULT 0
+        )""",
+        # Every change to a package removes its old contribution and adds
+        # the new one, so the counters always match a full recount
+        f"""CREATE TRIGGER IF NOT EXISTS trg_packages_kpi_insert
+        AFTER INSERT ON packages
+        BEGIN{_kpi_contribution('NEW', '+')}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_packages_kpi_update
+        AFTER UPDATE OF status, courier_id, created_at, estimated_delivery, actual_delivery ON packages
+        WHEN OLD.status IS NOT NEW.status
+          OR OLD.courier_id IS NOT NEW.courier_id
+          OR OLD.created_at IS NOT NEW.created_at
+          OR OLD.estimated_delivery IS NOT NEW.estimated_delivery
+          OR OLD.actual_delivery IS NOT NEW.actual_delivery
+        BEGIN{_kpi_contribution('OLD', '-')}
+        {_kpi_contribution('NEW', '+')}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_packages_kpi_delete
+        AFTER DELETE ON packages
+        BEGIN{_kpi_contribution('OLD', '-')}
+        END""",
+        *queries.REBUILD_KPI_COUNTERS,
+    ]),
+    (6, "Full-text search index over packages and the people on them", [
+        # Prefix indexes make "AA12*" and "smi*" lookups index probes
+        """CREATE VIRTUAL TABLE IF NOT EXISTS package_search USING fts5 (
+            tracking_number, description, pickup_address, delivery_address,
+            sender_name, receiver_name, courier_name,
+            tokenize = 'unicode61', prefix = '2 3 4'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_packages_search_insert
+        AFTER INSERT ON packages
+        BEGIN
+            INSERT INTO package_search ({PACKAGE_SEARCH_COLUMNS}){_package_search_rows('p.id = NEW.id')};
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_packages_search_update
+        AFTER UPDATE OF tracking_number, description, pickup_address, delivery_address,
+            sender_id, receiver_id, courier_id ON packages
+        BEGIN
+            DELETE FROM package_search WHERE rowid = OLD.id;
+            INSERT INTO package_search ({PACKAGE_SEARCH_COLUMNS}){_package_search_rows('p.id = NEW.id')};
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_packages_search_delete
+        AFTER DELETE ON packages
+        BEGIN
+            DELETE FROM package_search WHERE rowid = OLD.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_users_search_rename
+        AFTER UPDATE OF full_name ON users
+        WHEN OLD.full_name IS NOT NEW.full_name
+        BEGIN
+            DELETE FROM package_search WHERE rowid IN ({_PACKAGES_NAMING_USER});
+            INSERT INTO package_search ({PACKAGE_SEARCH_COLUMNS}){_package_search_rows(f'p.id IN ({_PACKAGES_NAMING_USER})')};
+        END""",
+        f"INSERT INTO package_search ({PACKAGE_SEARCH_COLUMNS}){_package_search_rows('1')}",
+    ]),
+    (7, "Login sessions and hashed passwords for every user", [
+        """CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)",
+        # Deleting a user looks up its sessions to enforce the foreign key
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id)",
+        _hash_plaintext_passwords,
+    ]),
+    (8, "Change log feeding dashboard auto-refresh", [
+        """CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        )""",
+        *_change_log_triggers('packages', 'package'),
+        *_change_log_triggers('couriers', 'courier'),
+        *_change_log_triggers('users', 'user'),
+        f"""CREATE TRIGGER IF NOT EXISTS trg_change_log_prune
+        AFTER INSERT ON change_log
+        WHEN NEW.id % {CHANGE_LOG_PRUNE_EVERY} = 0
+        BEGIN
+            DELETE FROM change_log WHERE id <= NEW.id - {CHANGE_LOG_RETENTION};
+        END""",
+    ]),
+    (9, "Archival of delivered packages without changing the KPI counters", [
+        # Ids being moved to the archive; deleting them must not uncount them
+        """CREATE TABLE IF NOT EXISTS archiving_packages (
+            package_id INTEGER PRIMARY KEY
+        )""",
+        "DROP TRIGGER IF EXISTS trg_packages_kpi_delete",
+        f"""CREATE TRIGGER trg_packages_kpi_delete
+        AFTER DELETE ON packages
+        WHEN NOT EXISTS (SELECT 1 FROM archiving_packages WHERE package_id = OLD.id)
+        BEGIN{_kpi_contribution('OLD', '-')}
+        END""",
+        """CREATE INDEX IF NOT EXISTS idx_packages_delivered ON packages (actual_delivery)
+        WHERE status = 'delivered'""",
+    ]),
+    (10, "Compact tracking history: interned strings, epoch timestamps, collapsible repeats", [
+        """CREATE TABLE IF NOT EXISTS tracking_statuses (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )""",
+        """CREATE TABLE IF NOT EXISTS tracking_locations (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )""",
+        # repeats counts identical scans folded into this event (see compaction.py)
+        """CREATE TABLE IF NOT EXISTS tracking_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            package_id INTEGER NOT NULL REFERENCES packages (id),
+            status_id INTEGER NOT NULL REFERENCES tracking_statuses (id),
+            location_id INTEGER REFERENCES tracking_locations (id),
+            ts INTEGER NOT NULL,
+            notes TEXT,
+            repeats INTEGER NOT NULL DEFAULT 0
+        )""",
+        """CREATE TABLE IF NOT EXISTS app_settings (
+            name TEXT PRIMARY KEY,
+            value
+        ) WITHOUT ROWID""",
+        "INSERT OR IGNORE INTO app_settings (name, value) VALUES ('collapse_repeated_events', 0)",
+        "INSERT OR IGNORE INTO tracking_statuses (name) SELECT DISTINCT status FROM tracking_history",
+        """INSERT OR IGNORE INTO tracking_locations (name)
+        SELECT DISTINCT location FROM tracking_history WHERE location IS NOT NULL""",
+        # Rows whose timestamp cannot be parsed sort first rather than failing the upgrade
+        """INSERT INTO tracking_events (id, package_id, status_id, location_id, ts, notes)
+        SELECT h.id, h.package_id, s.id, l.id, COALESCE(CAST(strftime('%s', h.timestamp) AS INTEGER), 0), h.notes
+        FROM tracking_history h
+        JOIN tracking_statuses s ON s.name = h.status
+        LEFT JOIN tracking_locations l ON l.name = h.location
+        ORDER BY h.id""",
+        _continue_event_ids,
+        "DROP TRIGGER IF EXISTS trg_tracking_history_current_state",
+        "DROP TABLE tracking_history",
+        "CREATE INDEX IF NOT EXISTS idx_tracking_events_package_ts ON tracking_events (package_id, ts)",
+        # Existing readers and writers keep using tracking_history
+        """CREATE VIEW IF NOT EXISTS tracking_history AS
+        SELECT e.id, e.package_id, s.name AS status, l.name AS location,
+               datetime(e.ts, 'unixepoch') AS timestamp, e.notes, e.repeats
+        FROM tracking_events e
+        JOIN tracking_statuses s ON s.id = e.status_id
+        LEFT JOIN tracking_locations l ON l.id = e.location_id""",
+        # Interns the strings, then either folds the event into the package's
+        # latest one (when collapsing is on and nothing but the time differs)
+        # or stores it
+        f"""CREATE TRIGGER IF NOT EXISTS trg_tracking_history_insert
+        INSTEAD OF INSERT ON tracking_history
+        BEGIN
+            INSERT OR IGNORE INTO tracking_statuses (name) VALUES (NEW.status);
+            INSERT OR IGNORE INTO tracking_locations (name) SELECT NEW.location WHERE NEW.location IS NOT NULL;
+
+            UPDATE tracking_events SET repeats = repeats + 1
+            WHERE id = (SELECT history_id FROM package_current_state WHERE package_id = NEW.package_id)
+              AND (SELECT value FROM app_settings WHERE name = 'collapse_repeated_events')
+              AND status_id = (SELECT id FROM tracking_statuses WHERE name = NEW.status)
+              AND location_id IS (SELECT id FROM tracking_locations WHERE name = NEW.location)
+              AND notes IS NEW.notes
+              AND ts <= {_epoch('NEW.timestamp')};
+
+            INSERT INTO tracking_events (id, package_id, status_id, location_id, ts, notes, repeats)
+            SELECT NEW.id, NEW.package_id,
+                   (SELECT id FROM tracking_statuses WHERE name = NEW.status),
+                   (SELECT id FROM tracking_locations WHERE name = NEW.location),
+                   {_epoch('NEW.timestamp')}, NEW.notes, COALESCE(NEW.repeats, 0)
+            WHERE changes() = 0;
+        END""",
+        # Same rules as trg_tracking_history_current_state (migration 4)
+        """CREATE TRIGGER IF NOT EXISTS trg_tracking_events_current_state
+        AFTER INSERT ON tracking_events
+        BEGIN
+            INSERT INTO package_current_state (package_id, status, location, updated_at, history_id)
+            VALUES (
+                NEW.package_id,
+                (SELECT name FROM tracking_statuses WHERE id = NEW.status_id),
+                (SELECT name FROM tracking_locations WHERE id = NEW.location_id),
+                datetime(NEW.ts, 'unixepoch'),
+                NEW.id
+            )
+            ON CONFLICT (package_id) DO UPDATE SET
+                status = excluded.status,
+                location = COALESCE(excluded.location, package_current_state.location),
+                updated_at = excluded.updated_at,
+                history_id = excluded.history_id
+            WHERE (excluded.updated_at, excluded.history_id)
+                >= (package_current_state.updated_at, package_current_state.history_id);
+
+            UPDATE packages SET status = (SELECT name FROM tracking_statuses WHERE id = NEW.status_id)
+            WHERE id = NEW.package_id
+              AND status IS NOT (SELECT name FROM tracking_statuses WHERE id = NEW.status_id)
+              AND (SELECT history_id FROM package_current_state WHERE package_id = NEW.package_id) = NEW.id;
+        END""",
+    ]),
+    (11, "Keep collapsed repeat counts in archived tracking history", [
+        _add_archive_repeats,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Get the schema version recorded in the database file"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(db, target_version=None):
+    """Apply every migration newer than the database's schema version, up to ``target_version`` if given"""
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if target_version is not None and version > target_version:
+            break
+        with db.transaction() as conn:
+            # Re-read inside the write lock so concurrent starts apply each step once
+            if get_schema_version(conn) >= version:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version={version}")
+        applied.append((version, description))
+    return applied
@@ -1,6 +1,15 @@
 from datetime import datetime
 
+# Models declare __slots__ because history and package lists can hold millions
+# of instances. With sqlite3.Row rows, benchmarks/memory.py measures loaded
+# history at about 88% of the old __dict__ models' memory and package listings
+# at 76-86%; loading history is slightly slower.
+
+PACKAGE_STATUSES = ('pending', 'assigned', 'in_transit', 'out_for_delivery', 'delivered', 'failed')
+
 class User:
+    __slots__ = ('id', 'username', 'password', 'role', 'full_name', 'email', 'phone', 'created_at')
+    
     def __init__(self, user_id, username, password, role, full_name=None, email=None, phone=None, created_at=None):
         self.id = user_id
         self.username = username
@@ -23,6 +32,8 @@ class User:
         }
 
 class Customer(User):
+    __slots__ = ('customer_id', 'address', 'city', 'state', 'zip_code')
+    
     def __init__(self, user_id, username, password, role, full_name=None, email=None, phone=None, 
                  created_at=None, address=None, city=None, state=None, zip_code=None, customer_id=None):
         super().__init__(user_id, username, password, role, full_name, email, phone, created_at)
@@ -44,6 +55,8 @@ class Customer(User):
         return user_dict
 
 class Courier(User):
+    __slots__ = ('courier_id', 'vehicle_type', 'license_plate', 'status')
+    
     def __init__(self, user_id, username, password, role, full_name=None, email=None, phone=None, 
                  created_at=None, vehicle_type=None, license_plate=None, status=None, courier_id=None):
         super().__init__(user_id, username, password, role, full_name, email, phone, created_at)
@@ -63,6 +76,10 @@ class Courier(User):
         return user_dict
 
 class Package:
+    __slots__ = ('id', 'tracking_number', 'sender_id', 'receiver_id', 'courier_id', 'description', 'weight',
+                 'dimensions', 'status', 'pickup_address', 'delivery_address', 'created_at',
+                 'estimated_delivery', 'actual_delivery')
+    
     def __init__(self, package_id, tracking_number, sender_id, receiver_id, courier_id=None, 
                  description=None, weight=None, dimensions=None, status='pending', 
                  pickup_address=None, delivery_address=None, created_at=None, 
@@ -101,13 +118,16 @@ class Package:
         }
 
 class TrackingHistory:
-    def __init__(self, history_id, package_id, status, location=None, timestamp=None, notes=None):
+    __slots__ = ('id', 'package_id', 'status', 'location', 'timestamp', 'notes', 'repeats')
+    
+    def __init__(self, history_id, package_id, status, location=None, timestamp=None, notes=None, repeats=0):
         self.id = history_id
         self.package_id = package_id
         self.status = status
         self.location = location
         self.timestamp = timestamp if timestamp else datetime.now()
         self.notes = notes
+        self.repeats = repeats
     
     def to_dict(self):
         return {
@@ -116,5 +136,6 @@ class TrackingHistory:
             'status': self.status,
             'location': self.location,
             'timestamp': self.timestamp,
-            'notes': self.notes
+            'notes': self.notes,
+            'repeats': self.repeats
         }
\ No newline at end of file
@@ -0,0 +1,60 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at, row_id):
+    """Encode the (created_at, id) of the last row on a page as an opaque token"""
+    raw = json.dumps([created_at, row_id], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a continuation token into (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return created_at, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid page cursor") from e
+
+
+def clamp_page_size(page_size):
+    """Keep page sizes within sane bounds"""
+    return max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def page_filters(alias, cursor=None, status=None, created_from=None, created_to=None):
+    """Build the keyset and filter conditions for a newest-first package page.
+
+    Returns (sql, params) where sql starts with " AND" (or is empty) so it
+    can be appended to an existing WHERE clause.
+    """
+    conditions = []
+    params = []
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        conditions.append(f"({alias}.created_at, {alias}.id) < (?, ?)")
+        params.extend([created_at, row_id])
+    if status:
+        conditions.append(f"{alias}.status = ?")
+        params.append(status)
+    if created_from:
+        conditions.append(f"{alias}.created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        conditions.append(f"{alias}.created_at < ?")
+        params.append(created_to)
+    sql = ''.join(f" AND {condition}" for condition in conditions)
+    return sql, params
+
+
+def split_page(rows, page_size, created_at_key='created_at', id_key='id'):
+    """Trim a page fetched with one extra row and build the next cursor"""
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(last[created_at_key], last[id_key])
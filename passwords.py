@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+
+PBKDF2_ALGORITHM = 'pbkdf2_sha256'
+PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+
+# Hashes written before PBKDF2: unsalted SHA-256 hex digests
+LEGACY_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Stored for accounts that must never log in, such as auto-created receivers;
+# no password verifies against it
+UNUSABLE_PASSWORD = '!'
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def hash_password(password, iterations=PBKDF2_ITERATIONS):
+    """Hash a password as pbkdf2_sha256$<iterations>$<salt>$<digest>"""
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f"{PBKDF2_ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def is_password_hash(stored):
+    """Whether a stored password is a PBKDF2 or legacy SHA-256 hash (not plaintext)"""
+    return bool(stored) and (stored.startswith(f"{PBKDF2_ALGORITHM}$") or bool(LEGACY_HASH_PATTERN.match(stored)))
+
+
+def verify_password(password, stored):
+    """Check a password against a stored PBKDF2 or legacy SHA-256 hash"""
+    if not stored or stored == UNUSABLE_PASSWORD:
+        return False
+    if LEGACY_HASH_PATTERN.match(stored):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    try:
+        algorithm, iterations, salt, digest = stored.split('$')
+        if algorithm != PBKDF2_ALGORITHM:
+            return False
+        expected = _unb64(digest)
+        actual = hashlib.pbkdf2_hmac('sha256', password.encode(), _unb64(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored, iterations=PBKDF2_ITERATIONS):
+    """Whether a verified hash is legacy or weaker than the current cost"""
+    if not stored.startswith(f"{PBKDF2_ALGORITHM}$"):
+        return True
+    try:
+        return int(stored.split('$')[1]) < iterations
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,583 @@
+"""Catalog of every SQL statement the application runs.
+
+Controllers and views reference these names instead of inlining SQL, so
+each statement text is identical at every call site and stays in the
+sqlite3 statement cache. Templates containing ``{filters}`` are completed
+with pagination.page_filters and ``{conditions}`` with
+exporter.export_conditions; the set of possible filter combinations is
+small, so the rendered variants are cached as well.
+
+benchmarks/query_plans.py runs EXPLAIN QUERY PLAN over CATALOG and flags
+full-table scans and temp B-tree sorts that are not listed in
+EXPECTED_PLAN_WARNINGS.
+"""
+
+PACKAGE_COLUMNS = """id, tracking_number, sender_id, receiver_id, courier_id, description, weight,
+    dimensions, status, pickup_address, delivery_address, created_at, estimated_delivery, actual_delivery"""
+
+TRACKING_HISTORY_COLUMNS = "id, package_id, status, location, timestamp, notes, repeats"
+
+# tracking_history is a view over tracking_events (migration 10); hot reads
+# go to the table so they can use its (package_id, ts) index
+TRACKING_EVENT_COLUMNS = """e.id, e.package_id, s.name AS status, l.name AS location,
+    datetime(e.ts, 'unixepoch') AS timestamp, e.notes, e.repeats"""
+
+# Users and authentication
+SELECT_USER_BY_USERNAME = "SELECT * FROM users WHERE username=?"
+
+UPDATE_USER_PASSWORD = "UPDATE users SET password=? WHERE id=?"
+
+SELECT_USER_ID_BY_USERNAME = "SELECT id FROM users WHERE username=?"
+
+SELECT_CUSTOMER_BY_USER_ID = "SELECT * FROM customers WHERE user_id=?"
+
+SELECT_COURIER_BY_USER_ID = "SELECT * FROM couriers WHERE user_id=?"
+
+INSERT_USER = """INSERT INTO users (username, password, role, full_name, email, phone)
+    VALUES (?, ?, ?, ?, ?, ?)"""
+
+INSERT_CUSTOMER = "INSERT INTO customers (user_id, address, city, state, zip_code) VALUES (?, ?, ?, ?, ?)"
+
+INSERT_COURIER = "INSERT INTO couriers (user_id, vehicle_type, license_plate) VALUES (?, ?, ?)"
+
+# Sessions (migration 7) are keyed by the SHA-256 of the token, with epoch-second times
+INSERT_SESSION = "INSERT INTO sessions (token_hash, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)"
+
+SELECT_SESSION_USER = """
+    SELECT u.*, s.expires_at
+    FROM sessions s
+    JOIN users u ON u.id = s.user_id
+    WHERE s.token_hash=? AND s.expires_at > ?
+"""
+
+DELETE_SESSION = "DELETE FROM sessions WHERE token_hash=?"
+
+DELETE_EXPIRED_SESSIONS = "DELETE FROM sessions WHERE expires_at <= ?"
+
+SELECT_ALL_USERS = "SELECT * FROM users ORDER BY created_at DESC"
+
+# Customers
+SELECT_CUSTOMER_PROFILE = """
+    SELECT c.id, u.username, u.password, u.role, u.full_name, u.email, u.phone, u.created_at,
+           c.address, c.city, c.state, c.zip_code
+    FROM customers c
+    JOIN users u ON c.user_id = u.id
+    WHERE c.id=?
+"""
+
+SELECT_CUSTOMER_USER_ID = "SELECT user_id FROM customers WHERE id=?"
+
+UPDATE_USER_PROFILE = "UPDATE users SET full_name=?, email=?, phone=? WHERE id=?"
+
+UPDATE_CUSTOMER_ADDRESS = "UPDATE customers SET address=?, city=?, state=?, zip_code=? WHERE id=?"
+
+SELECT_CUSTOMER_PACKAGES = """
+    SELECT p.id, p.tracking_number,
+           sender.full_name as sender_name,
+           receiver.full_name as receiver_name,
+           u.full_name as courier_name,
+           p.status, p.pickup_address, p.delivery_address, p.created_at, p.estimated_delivery,
+           cs.location as last_location, cs.updated_at as last_event_at
+    FROM packages p
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    JOIN users sender ON s.user_id = sender.id
+    JOIN users receiver ON r.user_id = receiver.id
+    LEFT JOIN couriers c ON p.courier_id = c.id
+    LEFT JOIN users u ON c.user_id = u.id
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+    WHERE p.sender_id=? OR p.receiver_id=?
+    ORDER BY p.created_at DESC
+"""
+
+# Each side walks its own (sender_id|receiver_id, created_at) index and
+# stops after one page, so the merge never touches more than two pages
+SELECT_CUSTOMER_PACKAGES_PAGE = """
+    SELECT p.id, p.tracking_number,
+           sender.full_name as sender_name,
+           receiver.full_name as receiver_name,
+           u.full_name as courier_name,
+           p.status, p.pickup_address, p.delivery_address, p.created_at, p.estimated_delivery,
+           cs.location as last_location, cs.updated_at as last_event_at
+    FROM (
+        SELECT * FROM (
+            SELECT p.id FROM packages p
+            WHERE p.sender_id=?{filters}
+            ORDER BY p.created_at DESC, p.id DESC LIMIT ?
+        )
+        UNION
+        SELECT * FROM (
+            SELECT p.id FROM packages p
+            WHERE p.receiver_id=?{filters}
+            ORDER BY p.created_at DESC, p.id DESC LIMIT ?
+        )
+    ) page
+    JOIN packages p ON p.id = page.id
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    JOIN users sender ON s.user_id = sender.id
+    JOIN users receiver ON r.user_id = receiver.id
+    LEFT JOIN couriers c ON p.courier_id = c.id
+    LEFT JOIN users u ON c.user_id = u.id
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+    ORDER BY p.created_at DESC, p.id DESC
+    LIMIT ?
+"""
+
+# Packages
+INSERT_PACKAGE = """INSERT INTO packages
+    (tracking_number, sender_id, receiver_id, description, weight, dimensions,
+    pickup_address, delivery_address, estimated_delivery)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+SELECT_PACKAGE_IDS_BY_TRACKING_NUMBERS = """
+    SELECT tracking_number, id FROM packages
+    WHERE tracking_number IN (SELECT value FROM json_each(?))
+"""
+
+SELECT_PACKAGES_BY_IDS = """
+    SELECT id, tracking_number FROM packages
+    WHERE id IN (SELECT value FROM json_each(?))
+"""
+
+SELECT_PACKAGE_BY_ID = f"SELECT {PACKAGE_COLUMNS} FROM packages WHERE id=?"
+
+SELECT_PACKAGE_BY_TRACKING_NUMBER = f"SELECT {PACKAGE_COLUMNS} FROM packages WHERE tracking_number=?"
+
+SELECT_PACKAGE_CURRENT_STATE = """
+    SELECT status, location, updated_at FROM package_current_state WHERE package_id=?
+"""
+
+TRACKING_DETAILS_COLUMNS = """p.id as package_id, p.tracking_number, p.status, p.estimated_delivery,
+    p.actual_delivery, cs.location as current_location, cs.updated_at as last_event_at"""
+
+SELECT_TRACKING_DETAILS = f"""
+    SELECT {TRACKING_DETAILS_COLUMNS}
+    FROM packages p
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+    WHERE p.tracking_number=?
+"""
+
+SELECT_TRACKING_DETAILS_BULK = f"""
+    SELECT {TRACKING_DETAILS_COLUMNS}
+    FROM json_each(?) requested
+    JOIN packages p ON p.tracking_number = requested.value
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+"""
+
+SELECT_TRACKING_NUMBER_BY_PACKAGE_ID = "SELECT tracking_number FROM packages WHERE id=?"
+
+# packages.status is maintained by the tracking history trigger (migration 4)
+ASSIGN_PACKAGE_COURIER = "UPDATE packages SET courier_id=? WHERE id=?"
+
+MARK_PACKAGE_DELIVERED = "UPDATE packages SET actual_delivery=CURRENT_TIMESTAMP WHERE id=?"
+
+# Takes a JSON array of package ids and stamps each with the time of its
+# current state. Only packages whose current state is still 'delivered' once
+# the batch's events are in: a late delivered scan older than the current
+# state must not stamp the package or release its courier
+MARK_PACKAGES_DELIVERED = """
+    UPDATE packages SET actual_delivery = state.updated_at
+    FROM json_each(?) delivered
+    JOIN package_current_state state ON state.package_id = delivered.value
+    WHERE packages.id = delivered.value AND state.status = 'delivered'
+"""
+
+SELECT_COURIER_PACKAGES = """
+    SELECT p.id, p.tracking_number, u1.full_name as sender_name, u2.full_name as receiver_name,
+           p.status, p.pickup_address, p.delivery_address, p.created_at, p.estimated_delivery,
+           cs.location as last_location, cs.updated_at as last_event_at
+    FROM packages p
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    JOIN users u1 ON s.user_id = u1.id
+    JOIN users u2 ON r.user_id = u2.id
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+    WHERE p.courier_id=?
+    ORDER BY p.created_at DESC
+"""
+
+SELECT_COURIER_PACKAGES_PAGE = """
+    SELECT p.id, p.tracking_number, u1.full_name as sender_name, u2.full_name as receiver_name,
+           p.status, p.pickup_address, p.delivery_address, p.created_at, p.estimated_delivery,
+           cs.location as last_location, cs.updated_at as last_event_at
+    FROM packages p
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    JOIN users u1 ON s.user_id = u1.id
+    JOIN users u2 ON r.user_id = u2.id
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+    WHERE p.courier_id=?{filters}
+    ORDER BY p.created_at DESC, p.id DESC
+    LIMIT ?
+"""
+
+# Stops still ahead of a courier: pickups for packages not yet collected
+# and deliveries for everything still in hand
+SELECT_COURIER_ROUTE_STOPS = """
+    SELECT p.id, p.tracking_number, p.status, p.pickup_address, p.delivery_address,
+           s.zip_code as pickup_zip, s.city as pickup_city,
+           r.zip_code as delivery_zip, r.city as delivery_city
+    FROM packages p
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    WHERE p.courier_id=? AND p.status IN ('assigned', 'in_transit', 'out_for_delivery')
+    ORDER BY p.created_at
+"""
+
+SELECT_PACKAGES_PAGE = """
+    SELECT p.id, p.tracking_number,
+           sender.full_name as sender_name, receiver.full_name as receiver_name,
+           c.full_name as courier_name, p.status, p.created_at, p.estimated_delivery,
+           cs.location as last_location, cs.updated_at as last_event_at
+    FROM packages p
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    JOIN users sender ON s.user_id = sender.id
+    JOIN users receiver ON r.user_id = receiver.id
+    LEFT JOIN couriers courier ON p.courier_id = courier.id
+    LEFT JOIN users c ON courier.user_id = c.id
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+    WHERE 1=1{filters}
+    ORDER BY p.created_at DESC, p.id DESC
+    LIMIT ?
+"""
+
+# Tracking history
+INSERT_TRACKING_EVENT = """INSERT INTO tracking_history
+    (package_id, status, location, notes)
+    VALUES (?, ?, ?, ?)"""
+
+INSERT_TRACKING_EVENT_AT = """INSERT INTO tracking_history
+    (package_id, status, location, notes, timestamp)
+    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))"""
+
+SELECT_TRACKING_HISTORY = f"""
+    SELECT {TRACKING_EVENT_COLUMNS}
+    FROM tracking_events e
+    JOIN tracking_statuses s ON s.id = e.status_id
+    LEFT JOIN tracking_locations l ON l.id = e.location_id
+    WHERE e.package_id=?
+    ORDER BY e.ts DESC
+"""
+
+# Couriers
+SELECT_AVAILABLE_COURIERS = """
+    SELECT c.id, u.full_name, c.vehicle_type, c.license_plate
+    FROM couriers c
+    JOIN users u ON c.user_id = u.id
+    WHERE c.status='available'
+"""
+
+SELECT_ALL_COURIERS = """
+    SELECT c.id, u.full_name, c.vehicle_type, c.license_plate, c.status
+    FROM couriers c
+    JOIN users u ON c.user_id = u.id
+    ORDER BY c.id
+"""
+
+UPDATE_COURIER_STATUS = "UPDATE couriers SET status=? WHERE id=?"
+
+RELEASE_PACKAGE_COURIER = """
+    UPDATE couriers SET status='available'
+    WHERE id=(SELECT courier_id FROM packages WHERE id=?)
+"""
+
+RELEASE_PACKAGES_COURIERS = """
+    UPDATE couriers SET status='available'
+    FROM json_each(?) delivered
+    JOIN package_current_state state ON state.package_id = delivered.value AND state.status = 'delivered'
+    JOIN packages p ON p.id = delivered.value
+    WHERE couriers.id = p.courier_id
+"""
+
+# Dispatch
+SELECT_DISPATCH_PACKAGES = """
+    SELECT p.id, p.tracking_number, p.estimated_delivery, s.zip_code, s.city
+    FROM packages p
+    JOIN customers s ON p.sender_id = s.id
+    WHERE p.status='pending' AND p.courier_id IS NULL
+"""
+
+# Couriers on duty with room for more work, whether or not they already have some
+SELECT_DISPATCH_COURIERS = """
+    SELECT c.id, COALESCE(k.active, 0) as active
+    FROM couriers c
+    LEFT JOIN kpi_courier_counts k ON k.courier_id = c.id
+    WHERE c.status IN ('available', 'assigned') AND COALESCE(k.active, 0) < ?
+"""
+
+# Full-text search (migration 6). The match expression comes from
+# search.match_expression; bm25 weights favour tracking numbers, then names
+SEARCH_PACKAGES = """
+    SELECT p.id, p.tracking_number, ps.sender_name, ps.receiver_name, ps.courier_name,
+           p.status, p.created_at, p.estimated_delivery
+    FROM package_search ps
+    JOIN packages p ON p.id = ps.rowid
+    WHERE package_search MATCH ?
+    ORDER BY bm25(package_search, 10.0, 1.0, 2.0, 2.0, 5.0, 5.0, 3.0)
+    LIMIT ?
+"""
+
+# Sequences
+INSERT_SEQUENCE = "INSERT OR IGNORE INTO sequences (name, next_value) VALUES (?, 0)"
+
+ADVANCE_SEQUENCE = "UPDATE sequences SET next_value = next_value + ? WHERE name=? RETURNING next_value"
+
+# Exports walk each table in id order; {conditions} comes from
+# exporter.export_conditions
+EXPORT_PACKAGES = f"""
+    SELECT {PACKAGE_COLUMNS} FROM packages p
+    WHERE p.id > ?{{conditions}}
+    ORDER BY p.id
+    LIMIT ?
+"""
+
+EXPORT_TRACKING_HISTORY = f"""
+    SELECT {TRACKING_HISTORY_COLUMNS} FROM tracking_history h
+    WHERE h.id > ?{{conditions}}
+    ORDER BY h.id
+    LIMIT ?
+"""
+
+EXPORT_ASSIGNMENTS = """
+    SELECT p.id as package_id, p.tracking_number, p.courier_id, u.full_name as courier_name,
+           c.vehicle_type, c.license_plate, p.status, p.created_at, p.actual_delivery
+    FROM packages p
+    JOIN couriers c ON p.courier_id = c.id
+    JOIN users u ON c.user_id = u.id
+    WHERE p.id > ?{conditions}
+    ORDER BY p.id
+    LIMIT ?
+"""
+
+# KPI counters (migration 5). Triggers on packages keep them current; the
+# rebuild statements recompute them from scratch. A package counts as
+# delivered once it has an actual_delivery time, and on time when that is
+# no later than its estimated_delivery.
+SELECT_KPI_STATUS_COUNTS = "SELECT status, packages FROM kpi_status_counts WHERE packages != 0 ORDER BY status"
+
+SELECT_KPI_COURIER_COUNTS = """
+    SELECT c.id, u.full_name, c.status,
+           COALESCE(k.packages, 0) as packages, COALESCE(k.active, 0) as active,
+           COALESCE(k.delivered, 0) as delivered, COALESCE(k.on_time, 0) as on_time
+    FROM couriers c
+    JOIN users u ON c.user_id = u.id
+    LEFT JOIN kpi_courier_counts k ON k.courier_id = c.id
+    ORDER BY active DESC, c.id
+"""
+
+SELECT_KPI_DAILY_COUNTS = """
+    SELECT day, created, delivered, on_time FROM kpi_daily_counts
+    WHERE day >= ?
+    ORDER BY day DESC
+"""
+
+CLEAR_KPI_STATUS_COUNTS = "DELETE FROM kpi_status_counts"
+
+CLEAR_KPI_COURIER_COUNTS = "DELETE FROM kpi_courier_counts"
+
+CLEAR_KPI_DAILY_COUNTS = "DELETE FROM kpi_daily_counts"
+
+# Archived packages keep counting towards the KPIs
+KPI_PACKAGES_SOURCE = """(
+        SELECT status, courier_id, created_at, estimated_delivery, actual_delivery FROM main.packages
+        UNION ALL
+        SELECT status, courier_id, created_at, estimated_delivery, actual_delivery FROM archive.packages
+    )"""
+
+REBUILD_KPI_STATUS_COUNTS = f"""
+    INSERT INTO kpi_status_counts (status, packages)
+    SELECT COALESCE(status, 'pending'), COUNT(*) FROM {KPI_PACKAGES_SOURCE} GROUP BY 1
+"""
+
+REBUILD_KPI_COURIER_COUNTS = f"""
+    INSERT INTO kpi_courier_counts (courier_id, packages, active, delivered, on_time)
+    SELECT courier_id, COUNT(*),
+           SUM(COALESCE(status, 'pending') NOT IN ('delivered', 'failed')),
+           SUM(actual_delivery IS NOT NULL),
+           SUM(COALESCE(julianday(actual_delivery) <= julianday(estimated_delivery), 0))
+    FROM {KPI_PACKAGES_SOURCE}
+    WHERE courier_id IS NOT NULL
+    GROUP BY courier_id
+"""
+
+REBUILD_KPI_DAILY_COUNTS = f"""
+    INSERT INTO kpi_daily_counts (day, created, delivered, on_time)
+    SELECT day, SUM(created), SUM(delivered), SUM(on_time) FROM (
+        SELECT date(created_at) AS day, 1 AS created, 0 AS delivered, 0 AS on_time FROM {KPI_PACKAGES_SOURCE}
+        UNION ALL
+        SELECT date(actual_delivery), 0, 1,
+               COALESCE(julianday(actual_delivery) <= julianday(estimated_delivery), 0)
+        FROM {KPI_PACKAGES_SOURCE} WHERE actual_delivery IS NOT NULL
+    )
+    GROUP BY day
+"""
+
+REBUILD_KPI_COUNTERS = [
+    CLEAR_KPI_STATUS_COUNTS, CLEAR_KPI_COURIER_COUNTS, CLEAR_KPI_DAILY_COUNTS,
+    REBUILD_KPI_STATUS_COUNTS, REBUILD_KPI_COURIER_COUNTS, REBUILD_KPI_DAILY_COUNTS,
+]
+
+SELECT_PACKAGES_LISTING_BY_IDS = """
+    SELECT p.id, p.tracking_number,
+           sender.full_name as sender_name, receiver.full_name as receiver_name,
+           c.full_name as courier_name, p.status, p.created_at, p.estimated_delivery,
+           p.pickup_address, p.delivery_address,
+           cs.location as last_location, cs.updated_at as last_event_at
+    FROM json_each(?) wanted
+    JOIN packages p ON p.id = wanted.value
+    JOIN customers s ON p.sender_id = s.id
+    JOIN customers r ON p.receiver_id = r.id
+    JOIN users sender ON s.user_id = sender.id
+    JOIN users receiver ON r.user_id = receiver.id
+    LEFT JOIN couriers courier ON p.courier_id = courier.id
+    LEFT JOIN users c ON courier.user_id = c.id
+    LEFT JOIN package_current_state cs ON cs.package_id = p.id
+"""
+
+SELECT_COURIER_PACKAGE_IDS_AMONG = """
+    SELECT p.id FROM json_each(?) wanted
+    JOIN packages p ON p.id = wanted.value
+    WHERE p.courier_id=?
+"""
+
+SELECT_CUSTOMER_PACKAGE_IDS_AMONG = """
+    SELECT p.id FROM json_each(?) wanted
+    JOIN packages p ON p.id = wanted.value
+    WHERE ? IN (p.sender_id, p.receiver_id)
+"""
+
+SELECT_LAST_CHANGE_ID = "SELECT COALESCE(MAX(id), 0) FROM change_log"
+
+SELECT_CHANGES_SINCE = """
+    SELECT id, entity, entity_id, op FROM change_log
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+# History compaction (see compaction.py)
+SELECT_COLLAPSE_REPEATED_EVENTS = """
+    SELECT value FROM app_settings WHERE name = 'collapse_repeated_events'
+"""
+
+SET_COLLAPSE_REPEATED_EVENTS = """
+    INSERT INTO app_settings (name, value) VALUES ('collapse_repeated_events', ?)
+    ON CONFLICT (name) DO UPDATE SET value = excluded.value
+"""
+
+SELECT_LAST_EVENT_PACKAGE_ID = "SELECT COALESCE(MAX(package_id), 0) FROM tracking_events"
+
+SELECT_EVENTS_FOR_PACKAGES = """
+    SELECT id, package_id, status_id, location_id, notes, repeats FROM tracking_events
+    WHERE package_id > ? AND package_id <= ?
+    ORDER BY package_id, ts, id
+"""
+
+UPDATE_EVENT_REPEATS = "UPDATE tracking_events SET repeats=? WHERE id=?"
+
+DELETE_TRACKING_EVENT = "DELETE FROM tracking_events WHERE id=?"
+
+MOVE_CURRENT_STATE_EVENT = "UPDATE package_current_state SET history_id=? WHERE package_id=? AND history_id=?"
+
+# Archive (see archive.py); the archive database is attached as "archive"
+SELECT_ARCHIVE_CANDIDATES = """
+    SELECT id FROM packages
+    WHERE status = 'delivered' AND actual_delivery < datetime('now', ?)
+    LIMIT ?
+"""
+
+# REPLACE so a package copied again after changing is refreshed
+COPY_PACKAGES_TO_ARCHIVE = f"""
+    INSERT OR REPLACE INTO archive.packages ({PACKAGE_COLUMNS})
+    SELECT {PACKAGE_COLUMNS} FROM main.packages
+    WHERE id IN (SELECT value FROM json_each(?))
+"""
+
+# REPLACE as well: repeats grows when later scans are folded into an event
+COPY_TRACKING_HISTORY_TO_ARCHIVE = f"""
+    INSERT OR REPLACE INTO archive.tracking_history ({TRACKING_HISTORY_COLUMNS})
+    SELECT {TRACKING_HISTORY_COLUMNS} FROM main.tracking_history
+    WHERE package_id IN (SELECT value FROM json_each(?))
+"""
+
+COPY_CURRENT_STATE_TO_ARCHIVE = """
+    INSERT OR REPLACE INTO archive.package_current_state (package_id, status, location, updated_at, history_id)
+    SELECT package_id, status, location, updated_at, history_id FROM main.package_current_state
+    WHERE package_id IN (SELECT value FROM json_each(?))
+"""
+
+# Only packages whose archived copy is complete and still current are removed
+MARK_PACKAGES_ARCHIVING = """
+    INSERT OR IGNORE INTO archiving_packages (package_id)
+    SELECT p.id FROM json_each(?) chunk
+    JOIN main.packages p ON p.id = chunk.value
+    JOIN archive.packages a ON a.id = p.id
+    WHERE p.status IS a.status AND p.actual_delivery IS a.actual_delivery
+      AND NOT EXISTS (
+          SELECT 1 FROM main.tracking_events h
+          WHERE h.package_id = p.id
+            AND NOT EXISTS (SELECT 1 FROM archive.tracking_history ah WHERE ah.id = h.id AND ah.repeats = h.repeats)
+      )
+"""
+
+DELETE_ARCHIVED_TRACKING_HISTORY = """
+    DELETE FROM main.tracking_events WHERE package_id IN (SELECT package_id FROM archiving_packages)
+"""
+
+# package_current_state rows go with them (ON DELETE CASCADE)
+DELETE_ARCHIVED_PACKAGES = """
+    DELETE FROM main.packages WHERE id IN (SELECT package_id FROM archiving_packages)
+"""
+
+CLEAR_ARCHIVING_PACKAGES = "DELETE FROM archiving_packages"
+
+SELECT_ARCHIVED_PACKAGE_BY_ID = f"SELECT {PACKAGE_COLUMNS} FROM archive.packages WHERE id=?"
+
+SELECT_ARCHIVED_PACKAGE_BY_TRACKING_NUMBER = f"SELECT {PACKAGE_COLUMNS} FROM archive.packages WHERE tracking_number=?"
+
+SELECT_ARCHIVED_TRACKING_DETAILS = f"""
+    SELECT {TRACKING_DETAILS_COLUMNS}
+    FROM archive.packages p
+    LEFT JOIN archive.package_current_state cs ON cs.package_id = p.id
+    WHERE p.tracking_number=?
+"""
+
+SELECT_ARCHIVED_TRACKING_DETAILS_BULK = f"""
+    SELECT {TRACKING_DETAILS_COLUMNS}
+    FROM json_each(?) requested
+    JOIN archive.packages p ON p.tracking_number = requested.value
+    LEFT JOIN archive.package_current_state cs ON cs.package_id = p.id
+"""
+
+SELECT_ARCHIVED_TRACKING_HISTORY = f"""
+    SELECT {TRACKING_HISTORY_COLUMNS} FROM archive.tracking_history
+    WHERE package_id=?
+    ORDER BY timestamp DESC
+"""
+
+CATALOG = {
+    name: value for name, value in dict(globals()).items()
+    if name.isupper() and isinstance(value, str) and not name.endswith(('_COLUMNS', '_SOURCE'))
+}
+
+# Plan warnings that are expected, with the reason they are acceptable
+EXPECTED_PLAN_WARNINGS = {
+    'SELECT_ALL_USERS': "admin user list reads the whole (small) users table",
+    'SELECT_ALL_COURIERS': "admin courier list reads the whole (small) couriers table",
+    'SELECT_AVAILABLE_COURIERS': "couriers is small; status is not selective",
+    'SELECT_DISPATCH_COURIERS': "couriers is small; status and load are not selective",
+    'SELECT_CUSTOMER_PACKAGES': "sorts the union of the sender and receiver index walks; "
+                                "dashboards use SELECT_CUSTOMER_PACKAGES_PAGE",
+    'SELECT_CUSTOMER_PACKAGES_PAGE': "sorts at most two pages merged from the index walks",
+    'SELECT_KPI_STATUS_COUNTS': "one row per status",
+    'SELECT_KPI_COURIER_COUNTS': "one row per courier, ranked by active packages",
+    'CLEAR_KPI_STATUS_COUNTS': "rebuild empties the counter table",
+    'CLEAR_KPI_COURIER_COUNTS': "rebuild empties the counter table",
+    'CLEAR_KPI_DAILY_COUNTS': "rebuild empties the counter table",
+    'REBUILD_KPI_STATUS_COUNTS': "rebuild recounts every package",
+    'REBUILD_KPI_COURIER_COUNTS': "rebuild recounts every package",
+    'REBUILD_KPI_DAILY_COUNTS': "rebuild recounts every package",
+    'SEARCH_PACKAGES': "ranks only the full-text matches before taking the top rows",
+}
@@ -0,0 +1,190 @@
+"""Stop sequencing for a courier's route.
+
+Addresses are geocoded to ZIP centroids from data/zip_centroids.csv (columns
+zip_code, city, state, latitude, longitude). The bundled file covers the
+cities the system ships with; a full gazetteer in the same format can be
+dropped in its place. Stops are ordered by nearest neighbour and then
+improved with 2-opt. NumPy is used for the distance matrix and the 2-opt
+move search when it is installed; otherwise the same algorithm runs in
+plain Python.
+"""
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CENTROIDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'zip_centroids.csv')
+EARTH_RADIUS_KM = 6371.0
+MAX_TWO_OPT_PASSES = 50
+
+ZIP_PATTERN = re.compile(r'\b(\d{5})(?:-\d{4})?\s*$')
+
+
+@lru_cache(maxsize=None)
+def load_centroids(path=CENTROIDS_PATH):
+    """Load {zip: (lat, lon)} and {city: (lat, lon)} from a centroid CSV"""
+    by_zip = {}
+    city_points = {}
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            point = (float(row['latitude']), float(row['longitude']))
+            by_zip[row['zip_code'].strip().zfill(5)] = point
+            city_points.setdefault(row['city'].strip().lower(), []).append(point)
+    # A city without a ZIP resolves to the mean of its ZIP centroids
+    by_city = {
+        city: (sum(lat for lat, _ in points) / len(points), sum(lon for _, lon in points) / len(points))
+        for city, points in city_points.items()
+    }
+    return by_zip, by_city
+
+
+def geocode(address=None, zip_code=None, city=None, path=CENTROIDS_PATH):
+    """Resolve an address to (lat, lon), or None when nothing matches.
+
+    A ZIP code at the end of the address wins, then the given ZIP code, then
+    the city.
+    """
+    by_zip, by_city = load_centroids(path)
+    match = ZIP_PATTERN.search(address or '')
+    for candidate in (match.group(1) if match else None, zip_code):
+        if candidate and str(candidate).strip().zfill(5) in by_zip:
+            return by_zip[str(candidate).strip().zfill(5)]
+    if city:
+        return by_city.get(city.strip().lower())
+    return None
+
+
+def distance_matrix(points):
+    """Great-circle distances in km between every pair of (lat, lon) points"""
+    if np is not None:
+        coords = np.radians(np.asarray(points, dtype=float))
+        lat = coords[:, 0][:, None]
+        lon = coords[:, 1][:, None]
+        a = (np.sin((lat - lat.T) / 2) ** 2
+             + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    radians = [(math.radians(lat), math.radians(lon)) for lat, lon in points]
+    matrix = []
+    for lat1, lon1 in radians:
+        cos_lat1 = math.cos(lat1)
+        row = []
+        for lat2, lon2 in radians:
+            a = math.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+            row.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a))))
+        matrix.append(row)
+    return matrix
+
+
+def nearest_neighbour(dist, start=0):
+    """Visit order that always moves to the closest unvisited stop"""
+    count = len(dist)
+    if np is not None:
+        visited = np.zeros(count, dtype=bool)
+        order = [start]
+        visited[start] = True
+        for _ in range(count - 1):
+            candidates = np.where(visited, np.inf, dist[order[-1]])
+            nearest = int(np.argmin(candidates))
+            visited[nearest] = True
+            order.append(nearest)
+        return order
+
+    unvisited = set(range(count)) - {start}
+    order = [start]
+    while unvisited:
+        row = dist[order[-1]]
+        nearest = min(unvisited, key=row.__getitem__)
+        unvisited.remove(nearest)
+        order.append(nearest)
+    return order
+
+
+def two_opt(dist, order):
+    """Improve an open path by reversing segments while that shortens it.
+
+    The first stop stays fixed; the path does not return to it.
+    """
+    order = list(order)
+    count = len(order)
+    if count < 4:
+        return order
+
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(1, count - 1):
+            if np is not None:
+                path = np.asarray(order)
+                a = path[i - 1]
+                b = path[i]
+                c = path[i + 1:]
+                # Stop after each candidate end, or nothing past the last stop
+                d = np.append(path[i + 2:], -1)
+                after = np.where(d >= 0, dist[c, np.maximum(d, 0)], 0.0)
+                new = dist[a, c] + np.where(d >= 0, dist[b, np.maximum(d, 0)], 0.0)
+                gains = dist[a, b] + after - new
+                best = int(np.argmax(gains))
+                if gains[best] > 1e-9:
+                    j = i + 1 + best
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    improved = True
+            else:
+                a, b = order[i - 1], order[i]
+                dist_a, dist_b = dist[a], dist[b]
+                ab = dist_a[b]
+                best_gain, best_j = 1e-9, None
+                for j in range(i + 1, count):
+                    c = order[j]
+                    if j + 1 < count:
+                        d = order[j + 1]
+                        gain = ab + dist[c][d] - dist_a[c] - dist_b[d]
+                    else:
+                        gain = ab - dist_a[c]
+                    if gain > best_gain:
+                        best_gain, best_j = gain, j
+                if best_j is not None:
+                    order[i:best_j + 1] = order[i:best_j + 1][::-1]
+                    improved = True
+        if not improved:
+            break
+    return order
+
+
+def path_length(dist, order):
+    """Total length of a path in km"""
+    return float(sum(dist[a][b] for a, b in zip(order, order[1:])))
+
+
+def sequence_stops(points, start=None):
+    """Order (lat, lon) points into a short open path.
+
+    ``start`` is the courier's current position; without it the route
+    begins at the stop farthest from the centre, an end of the cluster.
+    Returns (order, legs) where order indexes ``points`` and legs[k] is
+    the distance in km from the previous stop (or ``start``) to order[k].
+    """
+    if not points:
+        return [], []
+
+    all_points = list(points) if start is None else [start, *points]
+    dist = distance_matrix(all_points)
+    if start is None:
+        mean_lat = sum(lat for lat, _ in points) / len(points)
+        mean_lon = sum(lon for _, lon in points) / len(points)
+        first = max(range(len(points)), key=lambda k: (points[k][0] - mean_lat) ** 2 + (points[k][1] - mean_lon) ** 2)
+    else:
+        first = 0
+
+    order = two_opt(dist, nearest_neighbour(dist, first))
+    legs = [0.0] + [float(dist[a][b]) for a, b in zip(order, order[1:])]
+    if start is not None:
+        # Drop the courier's position from the returned order
+        order = [k - 1 for k in order[1:]]
+        legs = legs[1:]
+    return order, legs
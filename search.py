@@ -0,0 +1,24 @@
+import re
+
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+TERM_PATTERN = re.compile(r'\w+')
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query matching every word as a prefix.
+
+    Each word is quoted, so FTS5 operators and punctuation typed into a
+    search box never reach the parser. Returns None when there is nothing
+    to search for.
+    """
+    terms = TERM_PATTERN.findall(text or '')
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def clamp_search_limit(limit):
+    """Keep result counts within sane bounds"""
+    return max(1, min(int(limit or DEFAULT_SEARCH_LIMIT), MAX_SEARCH_LIMIT))
@@ -15,6 +15,7 @@ class Styles:
         self.label_font = ("Helvetica", 12)
         self.entry_font = ("Helvetica", 12)
         self.button_font = ("Helvetica", 11, "bold")
+        self.link_font = ("Helvetica", 10, "underline")
 
     def apply_ttk_theme(self, style):
         """Applies custom styles to ttk widgets."""
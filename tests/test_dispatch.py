@@ -0,0 +1,80 @@
+"""Dispatch fills couriers up to max_load across repeated runs."""
+import pytest
+
+from benchmarks.seed import seed_database
+from courier_controller import CourierController
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'dispatch.sqlite'))
+    db.initialize_database()
+    seed_database(db, customers=20, couriers=3, packages=30, events_per_package=2,
+                  heavy_merchants=0, heavy_merchant_packages=0)
+    # Start from an empty queue with every courier on duty
+    CourierController(db).dispatch_pending_packages(max_load=30)
+    with db.transaction() as conn:
+        conn.execute("UPDATE couriers SET status='available'")
+    yield db
+    db.manager.close_all()
+
+
+def create_pending(controller, count):
+    conn = controller.db.get_connection()
+    sender_id, receiver_id = [row[0] for row in conn.execute("SELECT id FROM customers LIMIT 2")]
+    success, result = controller.create_packages_bulk(
+        {'sender_id': sender_id, 'receiver_id': receiver_id,
+         'pickup_address': '1 Pickup Rd', 'delivery_address': '2 Delivery Ave'}
+        for _ in range(count)
+    )
+    assert success and not result['errors']
+
+
+def courier_loads(db):
+    conn = db.get_connection()
+    return {
+        courier_id: (status, active) for courier_id, status, active in conn.execute(
+            """SELECT c.id, c.status, COALESCE(k.active, 0) FROM couriers c
+            LEFT JOIN kpi_courier_counts k ON k.courier_id = c.id"""
+        )
+    }
+
+
+def test_repeated_dispatch_uses_spare_capacity(db):
+    controller = CourierController(db)
+    max_load = max(active for _, active in courier_loads(db).values()) + 5
+    capacity = sum(max_load - active for _, active in courier_loads(db).values())
+
+    create_pending(controller, 2)
+    success, result = controller.dispatch_pending_packages(max_load)
+    assert success and len(result['assigned']) == 2 and not result['unassigned']
+
+    create_pending(controller, capacity)
+    success, result = controller.dispatch_pending_packages(max_load)
+    assert success and len(result['assigned']) == capacity - 2 and len(result['unassigned']) == 2
+
+    loads = courier_loads(db)
+    assert all(active == max_load for _, active in loads.values())
+    assert all(status == 'assigned' for status, _ in loads.values())
+
+
+def test_couriers_below_the_cap_stay_available(db):
+    controller = CourierController(db)
+    max_load = max(active for _, active in courier_loads(db).values()) + 5
+
+    create_pending(controller, 1)
+    success, result = controller.dispatch_pending_packages(max_load)
+    assert success and len(result['assigned']) == 1
+
+    assert all(status == 'available' for status, _ in courier_loads(db).values())
+
+
+def test_couriers_on_break_get_no_work(db):
+    controller = CourierController(db)
+    with db.transaction() as conn:
+        conn.execute("UPDATE couriers SET status='on_break'")
+
+    create_pending(controller, 3)
+    success, result = controller.dispatch_pending_packages()
+    assert success and not result['assigned'] and len(result['unassigned']) == 3
@@ -0,0 +1,68 @@
+"""Collapsed repeat counts survive archiving, export and archive upgrades."""
+import json
+
+import pytest
+
+from archive import Archiver
+from benchmarks.seed import seed_database
+from compaction import HistoryCompactor
+from courier_controller import CourierController
+from database import Database
+from exporter import Exporter
+from migrations import run_migrations
+
+SCANS = "SELECT COUNT(*) + SUM(repeats) FROM {} WHERE package_id IN (SELECT value FROM json_each(?))"
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'history.sqlite'))
+    db.initialize_database()
+    seed_database(db, customers=20, couriers=3, packages=200, heavy_merchants=0, heavy_merchant_packages=0,
+                  repeat_scans=0.5)
+    yield db
+    db.manager.close_all()
+
+
+def scan_count(db, table, package_ids):
+    return db.get_connection().execute(SCANS.format(table), (json.dumps(package_ids),)).fetchone()[0]
+
+
+def test_archiving_keeps_repeat_counts(db):
+    conn = db.get_connection()
+    package_ids = [row[0] for row in conn.execute("SELECT id FROM packages WHERE status='delivered'")]
+    scans = scan_count(db, 'tracking_events', package_ids)
+    assert HistoryCompactor(db).collapse_repeats()
+    assert scan_count(db, 'tracking_events', package_ids) == scans
+
+    assert Archiver(db).move(package_ids) == len(package_ids)
+
+    assert scan_count(db, 'archive.tracking_history', package_ids) == scans
+    package_id = conn.execute("SELECT package_id FROM archive.tracking_history WHERE repeats > 0").fetchone()[0]
+    history = CourierController(db).get_tracking_history(package_id)
+    assert sum(event.repeats for event in history) > 0
+
+
+def test_export_keeps_repeat_counts(db, tmp_path):
+    scans = db.get_connection().execute("SELECT COUNT(*) FROM tracking_history").fetchone()[0]
+    HistoryCompactor(db).collapse_repeats()
+
+    path = tmp_path / 'history.jsonl'
+    Exporter(db).export('tracking_history', str(path))
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert sum(1 + row['repeats'] for row in rows) == scans
+
+
+def test_migration_adds_repeats_to_an_older_archive(db):
+    with db.transaction() as conn:
+        conn.execute("DROP TABLE archive.tracking_history")
+        conn.execute("""CREATE TABLE archive.tracking_history (
+            id INTEGER PRIMARY KEY, package_id INTEGER NOT NULL, status TEXT NOT NULL,
+            location TEXT, timestamp TIMESTAMP, notes TEXT
+        )""")
+        conn.execute("PRAGMA user_version=10")
+
+    run_migrations(db)
+
+    columns = [row[1] for row in db.get_connection().execute("PRAGMA archive.table_info(tracking_history)")]
+    assert columns[-1] == 'repeats'
@@ -0,0 +1,43 @@
+"""Auto-created receiver accounts can never log in."""
+import pytest
+
+from auth_controller import AuthController
+from customer_controller import CustomerController
+from database import Database
+from migrations import run_migrations
+import queries
+
+# The schema version before plaintext passwords were hashed
+PLAINTEXT_VERSION = 6
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'passwords.sqlite'))
+    yield db
+    db.manager.close_all()
+
+
+def test_added_receiver_cannot_log_in(db):
+    db.initialize_database()
+    customers = CustomerController(db)
+    customers.add_receiver("Jane Doe", "1 Main St", "Springfield", "IL", "62701")
+    db.get_connection().commit()
+
+    auth = AuthController(db)
+    assert not auth.login('temp_jane_doe', 'temp123')
+    assert not auth.login('temp_jane_doe', '')
+
+
+def test_upgrade_locks_placeholder_receivers(db):
+    db.initialize_database(schema_version=PLAINTEXT_VERSION)
+    conn = db.get_connection()
+    conn.execute(queries.INSERT_USER, ('temp_jane_doe', 'temp123', 'customer', "Jane Doe", None, None))
+    conn.execute(queries.INSERT_USER, ('clerk', 'clerk-secret', 'admin', "Clerk", None, None))
+    conn.commit()
+
+    run_migrations(db)
+
+    auth = AuthController(db)
+    assert not auth.login('temp_jane_doe', 'temp123')
+    assert auth.login('clerk', 'clerk-secret')
@@ -0,0 +1,34 @@
+"""The hot dashboard lookups must search an index, not scan their table."""
+import pytest
+
+import queries
+from benchmarks.query_plans import plan_warnings, render
+from benchmarks.seed import seed_database
+from database import Database
+
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    db = Database(str(tmp_path_factory.mktemp('plans') / 'plans.sqlite'))
+    db.initialize_database()
+    seed_database(db, customers=200, couriers=10, packages=2000, heavy_merchants=1, heavy_merchant_packages=500)
+    yield db.get_connection()
+    db.manager.close_all()
+
+
+def explain(conn, sql):
+    sql = render(sql)
+    return conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count('?')).fetchall()
+
+
+@pytest.mark.parametrize('name, alias', [
+    ('SELECT_COURIER_PACKAGES', 'p'),     # CourierController.get_courier_packages
+    ('SELECT_CUSTOMER_PACKAGES', 'p'),    # CustomerController.get_customer_packages
+    ('SELECT_TRACKING_HISTORY', 'e'),     # CourierController.get_tracking_history
+])
+def test_hot_lookup_searches_an_index(conn, name, alias):
+    plan = explain(conn, getattr(queries, name))
+    details = [detail for _, _, _, detail in plan]
+
+    assert any(detail.startswith(f"SEARCH {alias} USING INDEX") for detail in details), details
+    assert not [warning for warning in plan_warnings(plan) if warning.startswith('SCAN ')], details
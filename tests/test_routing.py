@@ -0,0 +1,56 @@
+"""The NumPy and plain-Python route sequencing give the same routes."""
+import random
+
+import pytest
+
+import routing
+
+np = pytest.importorskip('numpy')
+
+DEPOT = (40.75, -73.99)
+
+
+def metro_stops(count, seed=16):
+    """Random stops in one metro area, as a courier's usually are"""
+    rng = random.Random(seed)
+    return [(40.6 + rng.random() * 0.3, -74.1 + rng.random() * 0.3) for _ in range(count)]
+
+
+STOP_SETS = [
+    pytest.param(sorted(routing.load_centroids()[0].values()), None, id='zip-centroids'),
+    pytest.param(metro_stops(120), None, id='metro'),
+    pytest.param(metro_stops(120), DEPOT, id='metro-from-depot'),
+    pytest.param(metro_stops(2), None, id='two-stops'),
+    pytest.param(metro_stops(3), DEPOT, id='three-stops-from-depot'),
+]
+
+
+def sequence(monkeypatch, points, start, use_numpy):
+    """(order, legs, total km) from one implementation"""
+    with monkeypatch.context() as patch:
+        patch.setattr(routing, 'np', np if use_numpy else None)
+        order, legs = routing.sequence_stops(points, start)
+        return order, legs, routing.path_length(routing.distance_matrix(points), order)
+
+
+@pytest.mark.parametrize('points, start', STOP_SETS)
+def test_numpy_and_python_routes_match(monkeypatch, points, start):
+    python_order, python_legs, python_length = sequence(monkeypatch, points, start, use_numpy=False)
+    numpy_order, numpy_legs, numpy_length = sequence(monkeypatch, points, start, use_numpy=True)
+
+    assert sorted(python_order) == list(range(len(points)))
+    assert numpy_order == python_order
+    assert numpy_legs == pytest.approx(python_legs, abs=1e-6)
+    assert numpy_length == pytest.approx(python_length, abs=1e-6)
+
+
+def test_two_opt_shortens_the_nearest_neighbour_path(monkeypatch):
+    # Make sure the routes compared above exercise the 2-opt move search
+    points = metro_stops(120)
+    for use_numpy in (False, True):
+        with monkeypatch.context() as patch:
+            patch.setattr(routing, 'np', np if use_numpy else None)
+            dist = routing.distance_matrix(points)
+            greedy = routing.nearest_neighbour(dist)
+            improved = routing.two_opt(dist, greedy)
+            assert routing.path_length(dist, improved) < routing.path_length(dist, greedy) - 1.0
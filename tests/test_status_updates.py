@@ -0,0 +1,81 @@
+"""Batched status updates only deliver packages whose newest event is 'delivered'."""
+import pytest
+
+from benchmarks.seed import seed_database
+from courier_controller import CourierController
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'status.sqlite'))
+    db.initialize_database()
+    seed_database(db, customers=20, couriers=3, packages=50, events_per_package=2,
+                  heavy_merchants=0, heavy_merchant_packages=0)
+    yield db
+    db.manager.close_all()
+
+
+@pytest.fixture
+def package(db):
+    """An undelivered package whose courier is busy: (package_id, courier_id)"""
+    with db.transaction() as conn:
+        package_id, courier_id = conn.execute(
+            "SELECT id, courier_id FROM packages WHERE courier_id IS NOT NULL AND actual_delivery IS NULL LIMIT 1"
+        ).fetchone()
+        conn.execute("UPDATE couriers SET status='assigned' WHERE id=?", (courier_id,))
+    return package_id, courier_id
+
+
+def delivery_state(db, package_id, courier_id):
+    conn = db.get_connection()
+    status, actual_delivery = conn.execute(
+        "SELECT status, actual_delivery FROM packages WHERE id=?", (package_id,)
+    ).fetchone()
+    courier_status = conn.execute("SELECT status FROM couriers WHERE id=?", (courier_id,)).fetchone()[0]
+    delivered = conn.execute(
+        "SELECT delivered FROM kpi_courier_counts WHERE courier_id=?", (courier_id,)
+    ).fetchone()[0]
+    return status, actual_delivery, courier_status, delivered
+
+
+@pytest.mark.parametrize('same_chunk', [True, False])
+def test_late_delivered_event_does_not_deliver(db, package, same_chunk):
+    package_id, courier_id = package
+    _, _, _, delivered_before = delivery_state(db, package_id, courier_id)
+    controller = CourierController(db)
+    in_transit = (package_id, 'in_transit', 'Hub B', None, '2099-01-02 10:00:00')
+    late_delivered = (package_id, 'delivered', 'Hub A', None, '2099-01-01 10:00:00')
+
+    if same_chunk:
+        success, result = controller.update_package_statuses_bulk([in_transit, late_delivered])
+    else:
+        controller.update_package_statuses_bulk([in_transit])
+        success, result = controller.update_package_statuses_bulk([late_delivered])
+
+    assert success and not result['errors']
+    assert delivery_state(db, package_id, courier_id) == ('in_transit', None, 'assigned', delivered_before)
+
+
+def test_late_delivered_event_does_not_deliver_when_applied_alone(db, package):
+    # The per-event path used when a chunk fails
+    package_id, courier_id = package
+    _, _, _, delivered_before = delivery_state(db, package_id, courier_id)
+    controller = CourierController(db)
+    controller.update_package_statuses_bulk([(package_id, 'in_transit', 'Hub B', None, '2099-01-02 10:00:00')])
+    controller._apply_status_event((package_id, 'delivered', 'Hub A', None, '2099-01-01 10:00:00'))
+
+    assert delivery_state(db, package_id, courier_id) == ('in_transit', None, 'assigned', delivered_before)
+
+
+def test_newest_delivered_event_delivers(db, package):
+    package_id, courier_id = package
+    _, _, _, delivered_before = delivery_state(db, package_id, courier_id)
+    CourierController(db).update_package_statuses_bulk([
+        (package_id, 'in_transit', 'Hub B', None, '2099-01-01 10:00:00'),
+        (package_id, 'delivered', 'Door', None, '2099-01-02 10:00:00'),
+    ])
+
+    assert delivery_state(db, package_id, courier_id) == (
+        'delivered', '2099-01-02 10:00:00', 'available', delivered_before + 1
+    )
@@ -0,0 +1,73 @@
+"""The tracking service answers bad request framing instead of dropping the connection."""
+import asyncio
+import re
+
+import pytest
+
+from benchmarks.seed import seed_database
+from database import Database
+from tracking_service import MAX_BODY_BYTES, TrackingService
+
+
+@pytest.fixture(scope='module')
+def db_file(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('tracking') / 'tracking.sqlite')
+    db = Database(path)
+    db.initialize_database()
+    seed_database(db, customers=20, couriers=3, packages=20, heavy_merchants=0, heavy_merchant_packages=0)
+    db.manager.close_all()
+    return path
+
+
+def exchange(db_file, *requests):
+    """Send raw requests on one connection and return the raw bytes received"""
+    async def run():
+        service = TrackingService(db_file, workers=2)
+        ready = asyncio.get_running_loop().create_future()
+        server = asyncio.create_task(service.serve('127.0.0.1', 0, ready.set_result))
+        try:
+            host, port = await ready
+            reader, writer = await asyncio.open_connection(host, port)
+            for request in requests:
+                writer.write(request)
+            await writer.drain()
+            received = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return received
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+            service.close()
+
+    return asyncio.run(run())
+
+
+def statuses(received):
+    # Bodies carry no trailing newline, so a status line may follow one directly
+    return [int(status) for status in re.findall(rb'HTTP/1\.1 (\d{3}) ', received)]
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-5', '1.5', '5, 5', ''])
+def test_invalid_content_length_is_a_bad_request(db_file, content_length):
+    received = exchange(db_file, f"GET /health HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n".encode())
+    assert statuses(received) == [400]
+    assert b'Connection: close' in received
+
+
+def test_oversized_body_is_refused_before_it_is_read(db_file):
+    received = exchange(db_file, f"GET /health HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+    assert statuses(received) == [413]
+
+
+def test_chunked_body_is_refused(db_file):
+    received = exchange(db_file, b"GET /health HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\n")
+    assert statuses(received) == [411]
+
+
+def test_small_body_is_skipped_and_the_connection_kept(db_file):
+    received = exchange(
+        db_file,
+        b"GET /health HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello",
+        b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n",
+    )
+    assert statuses(received) == [200, 200]
@@ -0,0 +1,134 @@
+import re
+import string
+import threading
+import queries
+
+# Tracking numbers are two letters, eight payload digits and a Luhn check
+# digit (e.g. "AB123456787"). The letters carry the high part of a sequence
+# value and the payload digits a scrambled low part, so every number is
+# unique without relying on the UNIQUE constraint to catch collisions.
+PAYLOAD_MODULUS = 10 ** 8
+LETTER_PAIRS = len(string.ascii_uppercase) ** 2
+CAPACITY = LETTER_PAIRS * PAYLOAD_MODULUS
+
+# Multiplier coprime to 10**8 so the scramble is a bijection on the payload
+# and neighbouring sequence values do not produce guessable neighbours.
+SCRAMBLE_MULTIPLIER = 38_347_921
+SCRAMBLE_OFFSET = 52_910_467
+
+DEFAULT_BLOCK_SIZE = 1000
+SEQUENCE_NAME = 'tracking_number'
+
+TRACKING_NUMBER_PATTERN = re.compile(r'^[A-Z]{2}[0-9]{9}$')
+LEGACY_TRACKING_NUMBER_PATTERN = re.compile(r'^[A-Z]{2}[0-9]{8}$')
+
+_DOUBLED = [(d * 2) // 10 + (d * 2) % 10 for d in range(10)]
+
+
+def luhn_check_digit(digits):
+    """Compute the Luhn check digit for a string of digits"""
+    total = 0
+    double = True
+    for char in reversed(digits):
+        d = ord(char) - 48
+        total += _DOUBLED[d] if double else d
+        double = not double
+    return (10 - total % 10) % 10
+
+
+def _check_digits(letters, payload):
+    """Digits the check digit is computed over (A=10 .. Z=35)"""
+    return f"{ord(letters[0]) - 55}{ord(letters[1]) - 55}{payload}"
+
+
+def encode(value):
+    """Encode a sequence value as a tracking number"""
+    if not 0 <= value < CAPACITY:
+        raise ValueError("tracking number sequence exhausted")
+    high, low = divmod(value, PAYLOAD_MODULUS)
+    letters = string.ascii_uppercase[high // 26] + string.ascii_uppercase[high % 26]
+    payload = f"{(low * SCRAMBLE_MULTIPLIER + SCRAMBLE_OFFSET) % PAYLOAD_MODULUS:08d}"
+    return f"{letters}{payload}{luhn_check_digit(_check_digits(letters, payload))}"
+
+
+def is_valid_tracking_number(tracking_number):
+    """Check a tracking number's shape and check digit without touching the database.
+
+    Ten-character numbers issued before check digits were introduced are
+    accepted on shape alone.
+    """
+    if not isinstance(tracking_number, str):
+        return False
+    if LEGACY_TRACKING_NUMBER_PATTERN.match(tracking_number):
+        return True
+    if not TRACKING_NUMBER_PATTERN.match(tracking_number):
+        return False
+    letters, payload, check = tracking_number[:2], tracking_number[2:10], tracking_number[10]
+    return luhn_check_digit(_check_digits(letters, payload)) == int(check)
+
+
+class TrackingNumberGenerator:
+    """Issues tracking numbers from blocks reserved in the sequences table.
+
+    Blocks are reserved with an UPDATE under SQLite's write lock, so
+    several processes can share one database. Within a process the
+    generator is shared and guarded by a lock.
+    """
+
+    def __init__(self, db, block_size=DEFAULT_BLOCK_SIZE, name=SEQUENCE_NAME):
+        self.db = db
+        self.block_size = block_size
+        self.name = name
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next_number(self):
+        """Get the next tracking number"""
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        """Get ``count`` new tracking numbers"""
+        with self._lock:
+            values = []
+            cached = min(count, self._end - self._next)
+            if cached > 0:
+                values.extend(range(self._next, self._next + cached))
+                self._next += cached
+
+            needed = count - len(values)
+            if needed > 0:
+                conn = self.db.get_connection()
+                if conn.in_transaction:
+                    # The caller's transaction may still roll back, taking the
+                    # reservation with it, so reserve only what it will use
+                    start = self._reserve(needed)
+                    values.extend(range(start, start + needed))
+                else:
+                    size = max(needed, self.block_size)
+                    start = self._reserve(size)
+                    values.extend(range(start, start + needed))
+                    self._next, self._end = start + needed, start + size
+
+        return [encode(value) for value in values]
+
+    def _reserve(self, count):
+        """Reserve ``count`` sequence values and return the first"""
+        with self.db.transaction() as conn:
+            conn.execute(queries.INSERT_SEQUENCE, (self.name,))
+            cursor = conn.execute(queries.ADVANCE_SEQUENCE, (count, self.name))
+            return cursor.fetchone()[0] - count
+
+
+_generators = {}
+_generators_lock = threading.Lock()
+
+
+def get_generator(db):
+    """Get the process-wide tracking number generator for a database"""
+    with _generators_lock:
+        generator = _generators.get(db.manager)
+        if generator is None:
+            generator = TrackingNumberGenerator(db)
+            _generators[db.manager] = generator
+        return generator
@@ -0,0 +1,262 @@
+"""Headless HTTP service for public package tracking.
+
+    python manage.py --db courier_db.sqlite serve-tracking --port 8080
+
+    GET /track/<tracking number>           current status, location and ETA
+    GET /track?numbers=<n1>,<n2>,...       the same for many packages at once
+    GET /track/<tracking number>/history   tracking events, newest first
+    GET /health                            liveness check
+
+Connections are handled on an asyncio event loop speaking HTTP/1.1 with
+keep-alive. Lookups go through CourierController on a small thread pool
+whose workers each hold a read-only connection, so the service shares the
+tracking cache and never competes with the dashboards for the write lock.
+Responses carry an ETag, answer If-None-Match with 304 and are gzipped
+for clients that accept it.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from courier_controller import CourierController, TRACKING_CACHE_TTL
+from database import Database
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+GZIP_MIN_BYTES = 512
+GZIP_LEVEL = 6
+MAX_HEADER_BYTES = 16384
+MAX_BODY_BYTES = 16384
+KEEP_ALIVE_TIMEOUT = 15
+MAX_BULK_NUMBERS = 1000
+
+
+class HttpError(Exception):
+    """An error response with a status code"""
+
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.message = message or status.phrase
+
+
+def parse_request(head):
+    """Split a raw request head into (method, target, version, headers)"""
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(':')
+        if not separator:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed header")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def request_body_length(headers):
+    """Length of the body following a request head.
+
+    Tracking requests carry no body; a small one is read and ignored to keep
+    the connection in step, anything else is refused before it is read.
+    """
+    if 'transfer-encoding' in headers:
+        raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Chunked request bodies are not supported")
+    value = headers.get('content-length', '0')
+    if not (value.isascii() and value.isdigit()):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    length = int(value)
+    if length > MAX_BODY_BYTES:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request bodies are limited to {MAX_BODY_BYTES} bytes")
+    return length
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows a gzip response"""
+    for coding in (accept_encoding or '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def entity_tag(body):
+    """Strong ETag for a response body"""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etags):
+    """Whether an If-None-Match header names any of ``etags`` (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or not candidates.isdisjoint(etags)
+
+
+class TrackingService:
+    """Tracking lookups over HTTP on top of CourierController"""
+
+    def __init__(self, db_file, workers=DEFAULT_WORKERS):
+        self.db = Database(db_file, read_only=True)
+        self.courier_ctrl = CourierController(self.db)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tracking')
+        self.server = None
+
+    def lookup(self, tracking_number):
+        """Public view of a package's current state"""
+        details = self.courier_ctrl.get_tracking_details(tracking_number)
+        if details is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Unknown tracking number")
+        del details['package_id']
+        return details
+
+    def lookup_many(self, query):
+        """Public view of many packages' current state, keyed by tracking number"""
+        numbers = [
+            number for value in parse_qs(query).get('numbers', [])
+            for number in value.split(',') if number.strip()
+        ]
+        if not numbers:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "No tracking numbers given")
+        if len(numbers) > MAX_BULK_NUMBERS:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"At most {MAX_BULK_NUMBERS} tracking numbers per request")
+        found = self.courier_ctrl.get_tracking_details_bulk(numbers)
+        for details in found.values():
+            del details['package_id']
+        return {'packages': found}
+
+    def history(self, tracking_number):
+        """Public view of a package's tracking events"""
+        package = self.courier_ctrl.get_package_by_tracking_number(tracking_number)
+        if package is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Unknown tracking number")
+        events = self.courier_ctrl.get_tracking_history(package.id)
+        return {
+            'tracking_number': package.tracking_number,
+            'events': [
+                {'status': event.status, 'location': event.location,
+                 'timestamp': event.timestamp, 'notes': event.notes, 'repeats': event.repeats}
+                for event in events
+            ],
+        }
+
+    def route(self, target):
+        """Map a request target to its payload"""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        if parts == ['health']:
+            return {'status': 'ok'}
+        if parts == ['track']:
+            return self.lookup_many(url.query)
+        if len(parts) == 2 and parts[0] == 'track':
+            return self.lookup(parts[1])
+        if len(parts) == 3 and parts[0] == 'track' and parts[2] == 'history':
+            return self.history(parts[1].strip().upper())
+        raise HttpError(HTTPStatus.NOT_FOUND)
+
+    def render(self, method, target, headers):
+        """Build (status, headers, body) for one request; runs on a worker thread"""
+        extra = []
+        try:
+            if method not in ('GET', 'HEAD'):
+                extra.append(('Allow', 'GET, HEAD'))
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED)
+            status, payload = HTTPStatus.OK, self.route(target)
+        except HttpError as e:
+            status, payload = e.status, {'error': e.message}
+        except Exception:
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': HTTPStatus.INTERNAL_SERVER_ERROR.phrase}
+
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+        extra.append(('Content-Type', 'application/json; charset=utf-8'))
+        if status != HTTPStatus.OK:
+            extra.append(('Cache-Control', 'no-store'))
+            return status, extra, body
+
+        etag = entity_tag(body)
+        # The gzip variant is a different representation and gets its own tag
+        gzip_etag = f'{etag[:-1]}-gzip"'
+        compress = len(body) >= GZIP_MIN_BYTES and accepts_gzip(headers.get('accept-encoding'))
+        extra.append(('ETag', gzip_etag if compress else etag))
+        extra.append(('Cache-Control', f'public, max-age={TRACKING_CACHE_TTL}'))
+        extra.append(('Vary', 'Accept-Encoding'))
+        if etag_matches(headers.get('if-none-match'), (etag, gzip_etag)):
+            return HTTPStatus.NOT_MODIFIED, extra, b''
+        if compress:
+            body = gzip.compress(body, GZIP_LEVEL)
+            extra.append(('Content-Encoding', 'gzip'))
+        return status, extra, body
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                except asyncio.LimitOverrunError:
+                    self.write_response(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, [], b'', False, True)
+                    break
+
+                try:
+                    method, target, version, headers = parse_request(head)
+                    length = request_body_length(headers)
+                except HttpError as e:
+                    # The rest of the stream cannot be framed, so answer and close
+                    body = json.dumps({'error': e.message}).encode('utf-8')
+                    self.write_response(writer, e.status, [('Content-Type', 'application/json')], body, False, True)
+                    await writer.drain()
+                    break
+
+                if length:
+                    await reader.readexactly(length)
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                status, extra, body = await loop.run_in_executor(self.executor, self.render, method, target, headers)
+                self.write_response(writer, status, extra, body, keep_alive, method != 'HEAD')
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def write_response(self, writer, status, extra, body, keep_alive, send_body):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Date: {formatdate(usegmt=True)}"]
+        if status != HTTPStatus.NOT_MODIFIED:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        lines.extend(f"{name}: {value}" for name, value in extra)
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if send_body and body:
+            writer.write(body)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        """Accept connections until cancelled; ``ready`` is called with the bound (host, port)"""
+        self.server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_HEADER_BYTES, backlog=1024
+        )
+        if ready:
+            ready(self.server.sockets[0].getsockname()[:2])
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        """Stop the worker threads and close their connections"""
+        self.executor.shutdown(wait=True)
+        self.db.manager.close_all()
@@ -1,16 +1,23 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from auth_controller import AuthController
 from courier_controller import CourierController
-from views.auth_view import LoginView
+from kpi_controller import KpiController
 from styles import Styles
+from views.keyed_tree import KeyedTree
+
+PACKAGES_PAGE_SIZE = 100
+
+# Entities whose changes make each tab's contents stale, in tab order
+TAB_ENTITIES = [('package', 'courier'), ('user',), ('courier', 'user'), ('package',)]
+PACKAGES_TAB = 3
 
 class AdminDashboard(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.auth = AuthController()
-        self.courier_ctrl = CourierController()
+        self.auth = controller.auth
+        self.courier_ctrl = CourierController(controller.db)
+        self.kpi_ctrl = KpiController(controller.db)
         self.styles = Styles()
         
         self.configure(bg=self.styles.bg_color)
@@ -38,14 +45,155 @@ class AdminDashboard(tk.Frame):
         )
         logout_btn.pack(side='right')
         
+        # Loading Indicator
+        self.loading_label = tk.Label(
+            header_frame, 
+            text="", 
+            bg=self.styles.bg_color,
+            font=self.styles.label_font
+        )
+        self.loading_label.pack(side='right', padx=10)
+        
         # Main Content
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Create tabs
+        self.create_summary_tab()
         self.create_users_tab()
         self.create_couriers_tab()
         self.create_packages_tab()
+        
+        # Each tab loads its data the first time it is opened
+        self.tab_loaders = [self.load_summary, self.load_users, self.load_couriers, self.search_packages]
+        self.loaded_tabs = set()
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.on_tab_changed()
+    
+    def on_tab_changed(self, event=None):
+        index = self.notebook.index('current')
+        if index not in self.loaded_tabs:
+            self.loaded_tabs.add(index)
+            self.tab_loaders[index]()
+    
+    def on_data_changed(self, changes):
+        """Refresh the open tab if its data changed; other stale tabs reload when next opened"""
+        current = self.notebook.index('current')
+        for index, entities in enumerate(TAB_ENTITIES):
+            if index not in self.loaded_tabs or not any(changes.touches(entity) for entity in entities):
+                continue
+            if index == PACKAGES_TAB and not changes.resync:
+                # Patched in place, so pages loaded with Load More survive
+                self.refresh_packages(changes)
+            elif index == current:
+                self.tab_loaders[index]()
+            else:
+                self.loaded_tabs.discard(index)
+    
+    def create_summary_tab(self):
+        summary_tab = ttk.Frame(self.notebook)
+        self.notebook.add(summary_tab, text="Summary")
+        
+        # Headline figures
+        self.summary_label = tk.Label(
+            summary_tab, 
+            text="", 
+            justify='left',
+            font=self.styles.label_font
+        )
+        self.summary_label.pack(anchor='w', padx=10, pady=10)
+        
+        refresh_btn = ttk.Button(
+            summary_tab, 
+            text="Refresh", 
+            command=self.load_summary,
+            style='TButton'
+        )
+        refresh_btn.pack(anchor='ne', padx=10)
+        
+        tables_frame = tk.Frame(summary_tab)
+        tables_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Packages by status
+        self.status_tree = ttk.Treeview(
+            tables_frame, 
+            columns=('status', 'packages'), 
+            show='headings',
+            height=8
+        )
+        self.status_tree.heading('status', text='Status')
+        self.status_tree.heading('packages', text='Packages')
+        self.status_tree.column('status', width=120)
+        self.status_tree.column('packages', width=80)
+        self.status_tree.pack(side='left', fill='y', padx=(0, 10))
+        self.status_rows = KeyedTree(self.status_tree)
+        
+        # Courier utilization
+        columns = ('id', 'name', 'status', 'active', 'delivered', 'on_time')
+        self.courier_kpi_tree = ttk.Treeview(
+            tables_frame, 
+            columns=columns, 
+            show='headings'
+        )
+        self.courier_kpi_tree.heading('id', text='ID')
+        self.courier_kpi_tree.heading('name', text='Courier')
+        self.courier_kpi_tree.heading('status', text='Status')
+        self.courier_kpi_tree.heading('active', text='Active')
+        self.courier_kpi_tree.heading('delivered', text='Delivered')
+        self.courier_kpi_tree.heading('on_time', text='On Time %')
+        self.courier_kpi_tree.column('id', width=50)
+        self.courier_kpi_tree.column('name', width=150)
+        self.courier_kpi_tree.column('status', width=80)
+        self.courier_kpi_tree.column('active', width=70)
+        self.courier_kpi_tree.column('delivered', width=80)
+        self.courier_kpi_tree.column('on_time', width=80)
+        self.courier_kpi_tree.pack(side='left', fill='both', expand=True, padx=(0, 10))
+        self.courier_kpi_rows = KeyedTree(self.courier_kpi_tree)
+        
+        # Daily volumes
+        self.daily_tree = ttk.Treeview(
+            tables_frame, 
+            columns=('day', 'created', 'delivered', 'on_time'), 
+            show='headings'
+        )
+        self.daily_tree.heading('day', text='Day')
+        self.daily_tree.heading('created', text='Created')
+        self.daily_tree.heading('delivered', text='Delivered')
+        self.daily_tree.heading('on_time', text='On Time')
+        self.daily_tree.column('day', width=100)
+        self.daily_tree.column('created', width=70)
+        self.daily_tree.column('delivered', width=70)
+        self.daily_tree.column('on_time', width=70)
+        self.daily_tree.pack(side='left', fill='y')
+        self.daily_rows = KeyedTree(self.daily_tree)
+    
+    def load_summary(self):
+        self.controller.tasks.submit(self, self.kpi_ctrl.get_summary, on_success=self.show_summary)
+    
+    def show_summary(self, summary):
+        on_time_rate = summary['on_time_rate']
+        self.summary_label.configure(text=(
+            f"Total packages: {summary['total_packages']}\n"
+            f"Couriers with active packages: {summary['courier_utilization']:.0%}\n"
+            f"Delivered in the last {summary['days']} days: {summary['delivered']}"
+            f" ({'n/a' if on_time_rate is None else f'{on_time_rate:.0%}'} on time)"
+        ))
+        
+        self.status_rows.sync(summary['by_status'].items())
+        
+        self.courier_kpi_rows.sync(
+            (
+                courier['id'],
+                courier['full_name'],
+                courier['status'],
+                courier['active'],
+                courier['delivered'],
+                f"{courier['on_time'] / courier['delivered']:.0%}" if courier['delivered'] else ''
+            )
+            for courier in summary['couriers']
+        )
+        
+        self.daily_rows.sync(summary['daily'])
     
     def create_users_tab(self):
         users_tab = ttk.Frame(self.notebook)
@@ -83,24 +231,21 @@ class AdminDashboard(tk.Frame):
         self.users_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side='right', fill='y')
         self.users_tree.pack(fill='both', expand=True)
-        
-        # Load data
-        self.load_users()
+        self.users_rows = KeyedTree(self.users_tree)
+    
+    def set_loading(self, busy):
+        """Show or hide the loading indicator"""
+        self.loading_label.configure(text="Loading..." if busy else "")
     
     def load_users(self):
-        conn = self.auth.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
-        users = cursor.fetchall()
-        
-        # Clear existing data
-        for item in self.users_tree.get_children():
-            self.users_tree.delete(item)
-        
-        # Insert new data
-        for user in users:
-            self.users_tree.insert('', 'end', values=user)
+        self.controller.tasks.submit(self, self.auth.get_all_users, on_success=self.show_users)
+    
+    def show_users(self, users):
+        self.users_rows.sync(
+            (user['id'], user['username'], user['role'], user['full_name'],
+             user['email'], user['phone'], user['created_at'])
+            for user in users
+        )
     
     def create_couriers_tab(self):
         couriers_tab = ttk.Frame(self.notebook)
@@ -143,29 +288,13 @@ class AdminDashboard(tk.Frame):
         self.couriers_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side='right', fill='y')
         self.couriers_tree.pack(fill='both', expand=True)
-        
-        # Load data
-        self.load_couriers()
+        self.couriers_rows = KeyedTree(self.couriers_tree)
     
     def load_couriers(self):
-        conn = self.auth.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT c.id, u.full_name, c.vehicle_type, c.license_plate, c.status 
-            FROM couriers c
-            JOIN users u ON c.user_id = u.id
-            ORDER BY c.id
-        """)
-        couriers = cursor.fetchall()
-        
-        # Clear existing data
-        for item in self.couriers_tree.get_children():
-            self.couriers_tree.delete(item)
-        
-        # Insert new data
-        for courier in couriers:
-            self.couriers_tree.insert('', 'end', values=courier)
+        self.controller.tasks.submit(self, self.courier_ctrl.get_all_couriers, on_success=self.show_couriers)
+    
+    def show_couriers(self, couriers):
+        self.couriers_rows.sync(couriers)
     
     def show_add_courier_dialog(self):
         dialog = tk.Toplevel(self)
@@ -203,31 +332,21 @@ class AdminDashboard(tk.Frame):
                 messagebox.showerror("Error", "All fields are required")
                 return
             
-            conn = self.auth.db.get_connection()
-            cursor = conn.cursor()
+            def on_registered(result):
+                success, message = result
+                if success:
+                    messagebox.showinfo("Success", message)
+                    self.load_couriers()
+                    dialog.destroy()
+                else:
+                    messagebox.showerror("Error", message)
             
-            try:
-                # Insert user
-                hashed_password = self.auth.hash_password(password)
-                cursor.execute(
-                    "INSERT INTO users (username, password, role, full_name) VALUES (?, ?, ?, ?)",
-                    (username, hashed_password, 'courier', full_name)
-                )
-                user_id = cursor.lastrowid
-                
-                # Insert courier
-                cursor.execute(
-                    "INSERT INTO couriers (user_id, vehicle_type, license_plate) VALUES (?, ?, ?)",
-                    (user_id, vehicle, license_plate)
-                )
-                
-                conn.commit()
-                messagebox.showinfo("Success", "Courier added successfully")
-                self.load_couriers()
-                dialog.destroy()
-            except Exception as e:
-                conn.rollback()
-                messagebox.showerror("Error", str(e))
+            self.controller.tasks.submit(
+                self, 
+                self.auth.register_courier, 
+                username, password, full_name, vehicle, license_plate,
+                on_success=on_registered
+            )
         
         ttk.Button(dialog, text="Add Courier", command=add_courier).pack(pady=10)
     
@@ -235,6 +354,38 @@ class AdminDashboard(tk.Frame):
         packages_tab = ttk.Frame(self.notebook)
         self.notebook.add(packages_tab, text="Packages")
         
+        toolbar = tk.Frame(packages_tab, bg=self.styles.bg_color)
+        toolbar.pack(fill='x', pady=5, padx=10)
+        
+        # Search Box
+        tk.Label(toolbar, text="Search:", bg=self.styles.bg_color).pack(side='left')
+        self.search_entry = ttk.Entry(toolbar, width=40)
+        self.search_entry.pack(side='left', padx=5)
+        self.search_entry.bind('<Return>', lambda event: self.search_packages())
+        
+        ttk.Button(
+            toolbar, 
+            text="Search", 
+            command=self.search_packages,
+            style='TButton'
+        ).pack(side='left')
+        
+        ttk.Button(
+            toolbar, 
+            text="Clear", 
+            command=self.clear_search,
+            style='TButton'
+        ).pack(side='left', padx=5)
+        
+        # Auto Dispatch Button
+        dispatch_btn = ttk.Button(
+            toolbar, 
+            text="Auto Dispatch", 
+            command=self.auto_dispatch,
+            style='TButton'
+        )
+        dispatch_btn.pack(side='right')
+        
         # Treeview for packages
         columns = ('id', 'tracking', 'sender', 'receiver', 'courier', 'status', 'created', 'estimated')
         self.packages_tree = ttk.Treeview(
@@ -264,42 +415,143 @@ class AdminDashboard(tk.Frame):
         self.packages_tree.column('created', width=120)
         self.packages_tree.column('estimated', width=120)
         
+        # Load More Button
+        self.packages_cursor = None
+        self.load_more_btn = ttk.Button(
+            packages_tab, 
+            text="Load More", 
+            command=self.load_more_packages,
+            style='TButton'
+        )
+        self.load_more_btn.pack(side='bottom', pady=5)
+        
         # Add scrollbar
         scrollbar = ttk.Scrollbar(packages_tab, orient='vertical', command=self.packages_tree.yview)
         self.packages_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side='right', fill='y')
         self.packages_tree.pack(fill='both', expand=True)
-        
-        # Load data
-        self.load_packages()
+        self.packages_rows = KeyedTree(self.packages_tree)
+        self.showing_search = False
     
     def load_packages(self):
-        conn = self.auth.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT p.id, p.tracking_number, 
-                   s.full_name as sender, r.full_name as receiver,
-                   c.full_name as courier, p.status, p.created_at, p.estimated_delivery
-            FROM packages p
-            JOIN customers s ON p.sender_id = s.id
-            JOIN customers r ON p.receiver_id = r.id
-            JOIN users sender ON s.user_id = sender.id
-            JOIN users receiver ON r.user_id = receiver.id
-            LEFT JOIN couriers courier ON p.courier_id = courier.id
-            LEFT JOIN users c ON courier.user_id = c.id
-            ORDER BY p.created_at DESC
-        """)
-        packages = cursor.fetchall()
-        
-        # Clear existing data
-        for item in self.packages_tree.get_children():
-            self.packages_tree.delete(item)
-        
-        # Insert new data
-        for pkg in packages:
-            self.packages_tree.insert('', 'end', values=pkg)
+        """Reload the first page of packages"""
+        self.showing_search = False
+        self.packages_cursor = None
+        self.load_more_btn.configure(state='disabled')
+        self.controller.tasks.submit(
+            self, 
+            self.courier_ctrl.get_packages_page, 
+            PACKAGES_PAGE_SIZE,
+            on_success=lambda page: self.show_packages_page(page, replace=True)
+        )
+    
+    def load_more_packages(self):
+        """Append the next page of packages"""
+        self.load_more_btn.configure(state='disabled')
+        self.controller.tasks.submit(
+            self, 
+            self.courier_ctrl.get_packages_page, 
+            PACKAGES_PAGE_SIZE, 
+            self.packages_cursor,
+            on_success=self.show_packages_page
+        )
+    
+    def show_packages_page(self, page, replace=False):
+        """Show a page of packages, replacing the list or adding to it"""
+        packages, self.packages_cursor = page
+        rows = (self.package_row(pkg) for pkg in packages)
+        if replace:
+            self.packages_rows.sync(rows)
+        else:
+            self.packages_rows.append(rows)
+        
+        self.load_more_btn.configure(state='normal' if self.packages_cursor else 'disabled')
+    
+    def package_row(self, pkg):
+        return (
+            pkg['id'],
+            pkg['tracking_number'],
+            pkg['sender_name'],
+            pkg['receiver_name'],
+            pkg['courier_name'],
+            pkg['status'],
+            pkg['created_at'],
+            pkg['estimated_delivery']
+        )
+    
+    def refresh_packages(self, changes):
+        """Update, add or remove just the packages that changed"""
+        deleted = changes.ids('package', ('delete',))
+        self.packages_rows.remove(deleted)
+        
+        shown = {
+            package_id for package_id in changes.ids('package', ('update',))
+            if package_id in self.packages_rows
+        }
+        # New packages go on top of the newest-first list, but are not search results
+        added = set() if self.showing_search else changes.ids('package', ('insert',))
+        wanted = (shown | added) - deleted
+        if wanted:
+            self.controller.tasks.submit(
+                self, 
+                self.courier_ctrl.get_packages_by_ids, 
+                wanted,
+                on_success=lambda packages: self.show_changed_packages(packages, added)
+            )
+    
+    def show_changed_packages(self, packages, added):
+        rows = [self.package_row(pkg) for pkg in packages]
+        self.packages_rows.update(row for row in rows if row[0] not in added)
+        self.packages_rows.prepend(
+            sorted((row for row in rows if row[0] in added), key=lambda row: (row[6], row[0]), reverse=True)
+        )
+    
+    def search_packages(self):
+        """Show the best matches for the search box, or the newest packages when it is empty"""
+        text = self.search_entry.get().strip()
+        if not text:
+            self.load_packages()
+            return
+        
+        self.load_more_btn.configure(state='disabled')
+        self.controller.tasks.submit(
+            self, 
+            self.courier_ctrl.search_packages, 
+            text, 
+            PACKAGES_PAGE_SIZE,
+            on_success=self.show_search_results
+        )
+    
+    def show_search_results(self, packages):
+        # Results are ranked, not paged
+        self.showing_search = True
+        self.show_packages_page((packages, None), replace=True)
+    
+    def clear_search(self):
+        self.search_entry.delete(0, 'end')
+        self.load_packages()
+    
+    def auto_dispatch(self):
+        """Assign every pending package to an available courier"""
+        if not messagebox.askyesno("Auto Dispatch", "Assign all pending packages to couriers with spare capacity?"):
+            return
+        
+        def on_dispatched(result):
+            success, outcome = result
+            if not success:
+                messagebox.showerror("Error", outcome)
+                return
+            couriers = len({courier_id for _, courier_id in outcome['assigned']})
+            messagebox.showinfo(
+                "Auto Dispatch", 
+                f"Assigned {len(outcome['assigned'])} packages to {couriers} couriers.\n"
+                f"{len(outcome['unassigned'])} packages left pending."
+            )
+            self.load_packages()
+            self.load_couriers()
+            self.load_summary()
+        
+        self.controller.tasks.submit(self, self.courier_ctrl.dispatch_pending_packages, on_success=on_dispatched)
     
     def logout(self):
-        self.auth.logout()
-        self.controller.show_frame(LoginView)
\ No newline at end of file
+        self.controller.logout()
\ No newline at end of file
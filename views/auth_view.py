@@ -1,17 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from auth_controller import AuthController
-from views.admin_view import AdminDashboard
-from views.courier_view import CourierDashboard
 from styles import Styles
 
-CustomerDashboard = None
 class LoginView(tk.Frame):
-    def __init__(self, parent, controller, customer_dashboard_class):
-        self.customer_dashboard_class = customer_dashboard_class
+    def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.auth = AuthController()
+        self.auth = controller.auth
         self.styles = Styles()
         
         self.configure(bg=self.styles.bg_color)
@@ -71,16 +66,8 @@ class LoginView(tk.Frame):
             font=self.styles.link_font
         )
         register_label.grid(row=3, column=0, columnspan=2, pady=10)
-        register_label.bind("<Button-1>", lambda e: controller.show_frame(RegisterView))
+        register_label.bind("<Button-1>", lambda e: controller.show_frame('RegisterView'))
     
-    def login_successful(self):
-        global CustomerDashboard
-        if CustomerDashboard is None:  # Load ONLY when needed
-            from views.customer_view import CustomerDashboard
-        # Now use CustomerDashboard normally
-        self.controller.show_frame(CustomerDashboard)
-
-
     def login(self):
         username = self.username_entry.get()
         password = self.password_entry.get()
@@ -89,14 +76,19 @@ class LoginView(tk.Frame):
             messagebox.showerror("Error", "Please enter both username and password")
             return
         
-        if self.auth.login(username, password):
-            user = self.auth.get_current_user()
-            if user.role == 'admin':
-                self.controller.show_frame(AdminDashboard)
-            elif user.role == 'courier':
-                self.controller.show_frame(CourierDashboard)
-            else:
-                self.controller.show_frame(self.customer_dashboard_class)
+        # The password hash is deliberately slow; keep it off the Tk thread
+        self.controller.tasks.submit(
+            self, 
+            self.auth.login, 
+            username, 
+            password,
+            on_success=self.login_finished
+        )
+    
+    def login_finished(self, success):
+        if success:
+            self.password_entry.delete(0, 'end')
+            self.controller.show_dashboard()
         else:
             messagebox.showerror("Error", "Invalid username or password")
 
@@ -104,7 +96,7 @@ class RegisterView(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.auth = AuthController()
+        self.auth = controller.auth
         self.styles = Styles()
         
         self.configure(bg=self.styles.bg_color)
@@ -177,7 +169,7 @@ class RegisterView(tk.Frame):
             font=self.styles.link_font
         )
         login_label.grid(row=len(fields)+1, column=0, columnspan=2, pady=10)
-        login_label.bind("<Button-1>", lambda e: controller.show_frame(LoginView))
+        login_label.bind("<Button-1>", lambda e: controller.show_frame('LoginView'))
     
     def register(self):
         data = {field: self.entries[field].get() for field in self.entries}
@@ -189,7 +181,9 @@ class RegisterView(tk.Frame):
                 messagebox.showerror("Error", f"Please enter {field.replace('_', ' ')}")
                 return
         
-        success, message = self.auth.register_customer(
+        self.controller.tasks.submit(
+            self,
+            self.auth.register_customer,
             data['username'],
             data['password'],
             data['full_name'],
@@ -198,11 +192,14 @@ class RegisterView(tk.Frame):
             data['address'],
             data['city'],
             data['state'],
-            data['zip_code']
+            data['zip_code'],
+            on_success=self.register_finished
         )
-        
+    
+    def register_finished(self, result):
+        success, message = result
         if success:
             messagebox.showinfo("Success", message)
-            self.controller.show_frame(LoginView)
+            self.controller.show_frame('LoginView')
         else:
             messagebox.showerror("Error", message)
\ No newline at end of file
@@ -0,0 +1,123 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+DEFAULT_WORKERS = 4
+POLL_INTERVAL_MS = 25
+
+
+class Task:
+    """Handle for a call submitted to BackgroundTasks"""
+
+    def __init__(self, owner, on_success, on_error):
+        self.owner = owner
+        self.on_success = on_success
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Discard the result; the call is skipped if it has not started yet"""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class BackgroundTasks:
+    """Runs controller calls on worker threads and hands results back to Tk.
+
+    Tk widgets may only be touched from the thread running mainloop, so
+    workers put finished calls on a queue that the Tk thread drains with
+    ``after()``. Tasks belong to an owner frame. While an owner has work
+    in flight it shows a busy cursor, and ``cancel(owner)`` drops its
+    pending results when the user navigates away.
+    """
+
+    def __init__(self, root, max_workers=DEFAULT_WORKERS):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='db-worker')
+        self.results = queue.SimpleQueue()
+        self.pending = {}
+        self._polling = False
+
+    def submit(self, owner, fn, *args, on_success=None, on_error=None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on a worker and deliver the outcome on the Tk thread"""
+        task = Task(owner, on_success, on_error)
+        self._track(owner, task)
+        task.future = self.executor.submit(self._run, task, fn, args, kwargs)
+        self._schedule_poll()
+        return task
+
+    def cancel(self, owner):
+        """Cancel every task started by ``owner``"""
+        for task in self.pending.pop(owner, []):
+            task.cancel()
+        self._set_busy(owner, False)
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker threads"""
+        for owner in list(self.pending):
+            self.cancel(owner)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, fn, args, kwargs):
+        if task.cancelled:
+            return
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.results.put((task, False, e))
+        else:
+            self.results.put((task, True, result))
+
+    def _track(self, owner, task):
+        tasks = self.pending.setdefault(owner, [])
+        tasks.append(task)
+        if len(tasks) == 1:
+            self._set_busy(owner, True)
+
+    def _untrack(self, task):
+        tasks = self.pending.get(task.owner)
+        if tasks and task in tasks:
+            tasks.remove(task)
+            if not tasks:
+                del self.pending[task.owner]
+                self._set_busy(task.owner, False)
+
+    def _set_busy(self, owner, busy):
+        try:
+            owner.configure(cursor='watch' if busy else '')
+            loading = getattr(owner, 'set_loading', None)
+            if loading:
+                loading(busy)
+        except Exception:
+            # The owner may already have been destroyed
+            pass
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        """Deliver finished calls; keeps polling only while work is outstanding"""
+        while True:
+            try:
+                task, ok, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if task.cancelled:
+                continue
+            self._untrack(task)
+            if ok:
+                if task.on_success:
+                    task.on_success(value)
+            elif task.on_error:
+                task.on_error(value)
+            else:
+                messagebox.showerror("Error", str(value))
+
+        if self.pending:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
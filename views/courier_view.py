@@ -1,16 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from auth_controller import AuthController
 from courier_controller import CourierController
-from views.auth_view import LoginView
+from models import PACKAGE_STATUSES
 from styles import Styles
+from views.keyed_tree import KeyedTree
+
+PACKAGES_PAGE_SIZE = 100
 
 class CourierDashboard(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.auth = AuthController()
-        self.courier_ctrl = CourierController()
+        self.auth = controller.auth
+        self.courier_ctrl = CourierController(controller.db)
         self.styles = Styles()
         
         self.configure(bg=self.styles.bg_color)
@@ -40,6 +42,15 @@ class CourierDashboard(tk.Frame):
         )
         logout_btn.pack(side='right')
         
+        # Loading Indicator
+        self.loading_label = tk.Label(
+            header_frame, 
+            text="", 
+            bg=self.styles.bg_color,
+            font=self.styles.label_font
+        )
+        self.loading_label.pack(side='right', padx=10)
+        
         # Status Frame
         status_frame = tk.Frame(self, bg=self.styles.bg_color)
         status_frame.pack(fill='x', padx=10, pady=10)
@@ -93,11 +104,22 @@ class CourierDashboard(tk.Frame):
         self.packages_tree.column('pickup', width=200)
         self.packages_tree.column('delivery', width=200)
         
+        # Load More Button
+        self.packages_cursor = None
+        self.load_more_btn = ttk.Button(
+            packages_frame, 
+            text="Load More", 
+            command=self.load_more_packages,
+            style='TButton'
+        )
+        self.load_more_btn.pack(side='bottom', pady=5)
+        
         # Add scrollbar
         scrollbar = ttk.Scrollbar(packages_frame, orient='vertical', command=self.packages_tree.yview)
         self.packages_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side='right', fill='y')
         self.packages_tree.pack(fill='both', expand=True)
+        self.packages_rows = KeyedTree(self.packages_tree)
         
         # Action Buttons
         btn_frame = tk.Frame(self, bg=self.styles.bg_color)
@@ -118,45 +140,124 @@ class CourierDashboard(tk.Frame):
             style='TButton'
         )
         self.view_btn.pack(side='left', padx=5)
+        
+        self.route_btn = ttk.Button(
+            btn_frame, 
+            text="Plan Route", 
+            command=self.show_route,
+            style='TButton'
+        )
+        self.route_btn.pack(side='left', padx=5)
+    
+    def set_loading(self, busy):
+        """Show or hide the loading indicator"""
+        self.loading_label.configure(text="Loading..." if busy else "")
     
     def load_packages(self):
+        """Reload the first page of this courier's packages"""
         user = self.auth.get_current_user()
-        packages = self.courier_ctrl.get_courier_packages(user.courier_id)
-        
-        # Clear existing data
-        for item in self.packages_tree.get_children():
-            self.packages_tree.delete(item)
-        
-        # Insert new data
-        for pkg in packages:
-            self.packages_tree.insert('', 'end', values=(
-                pkg['id'],
-                pkg['tracking_number'],
-                pkg['sender_name'],
-                pkg['receiver_name'],
-                pkg['status'],
-                pkg['pickup_address'],
-                pkg['delivery_address']
-            ))
+        self.packages_cursor = None
+        self.load_more_btn.configure(state='disabled')
+        self.controller.tasks.submit(
+            self, 
+            self.courier_ctrl.get_courier_packages_page, 
+            user.courier_id, 
+            PACKAGES_PAGE_SIZE,
+            on_success=lambda page: self.show_packages_page(page, replace=True)
+        )
+    
+    def load_more_packages(self):
+        """Append the next page of packages"""
+        user = self.auth.get_current_user()
+        self.load_more_btn.configure(state='disabled')
+        self.controller.tasks.submit(
+            self, 
+            self.courier_ctrl.get_courier_packages_page, 
+            user.courier_id, 
+            PACKAGES_PAGE_SIZE, 
+            self.packages_cursor,
+            on_success=self.show_packages_page
+        )
+    
+    def show_packages_page(self, page, replace=False):
+        """Show a page of packages, replacing the list or adding to it"""
+        packages, self.packages_cursor = page
+        rows = (self.package_row(pkg) for pkg in packages)
+        if replace:
+            self.packages_rows.sync(rows)
+        else:
+            self.packages_rows.append(rows)
+        
+        self.load_more_btn.configure(state='normal' if self.packages_cursor else 'disabled')
+    
+    def package_row(self, pkg):
+        return (
+            pkg['id'],
+            pkg['tracking_number'],
+            pkg['sender_name'],
+            pkg['receiver_name'],
+            pkg['status'],
+            pkg['pickup_address'],
+            pkg['delivery_address']
+        )
+    
+    def on_data_changed(self, changes):
+        """Patch the packages that changed in place, so pages loaded with Load More survive"""
+        if changes.resync:
+            self.load_packages()
+            return
+        
+        deleted = changes.ids('package', ('delete',))
+        self.packages_rows.remove(deleted)
+        changed = changes.ids('package', ('insert', 'update')) - deleted
+        if changed:
+            self.refresh_packages(changed)
+    
+    def refresh_packages(self, package_ids):
+        """Update, add or drop the given packages as they are now assigned"""
+        user = self.auth.get_current_user()
+        
+        def fetch_packages():
+            assigned = self.courier_ctrl.filter_courier_packages(user.courier_id, package_ids)
+            return assigned, self.courier_ctrl.get_packages_by_ids(assigned) if assigned else []
+        
+        self.controller.tasks.submit(
+            self, 
+            fetch_packages,
+            on_success=lambda result: self.show_changed_packages(package_ids, *result)
+        )
+    
+    def show_changed_packages(self, package_ids, assigned, packages):
+        # Packages handed to another courier leave the list
+        self.packages_rows.remove(set(package_ids) - assigned)
+        self.packages_rows.update(self.package_row(pkg) for pkg in packages)
+        self.packages_rows.prepend(
+            self.package_row(pkg) for pkg in sorted(
+                (pkg for pkg in packages if pkg['id'] not in self.packages_rows),
+                key=lambda pkg: (pkg['created_at'], pkg['id']),
+                reverse=True
+            )
+        )
     
     def update_status(self, *args):
         new_status = self.status_var.get()
         user = self.auth.get_current_user()
         
-        conn = self.auth.db.get_connection()
-        cursor = conn.cursor()
+        def on_updated(result):
+            success, message = result
+            if success:
+                user.status = new_status
+                messagebox.showinfo("Success", message)
+            else:
+                messagebox.showerror("Error", message)
         
-        try:
-            cursor.execute(
-                "UPDATE couriers SET status=? WHERE id=?",
-                (new_status, user.courier_id)
-            )
-            conn.commit()
-            user.status = new_status
-            messagebox.showinfo("Success", "Status updated successfully")
-        except Exception as e:
-            conn.rollback()
-            messagebox.showerror("Error", str(e))
+        self.controller.tasks.submit(
+            self, 
+            self.courier_ctrl.set_courier_status, 
+            user.courier_id, 
+            new_status,
+            on_success=on_updated
+        )
     
     def update_package_status(self):
         selected = self.packages_tree.focus()
@@ -174,7 +275,7 @@ class CourierDashboard(tk.Frame):
         tk.Label(dialog, text="Select New Status:").pack(pady=10)
         
         status_var = tk.StringVar(value=package_data[4])
-        status_options = ['pending', 'assigned', 'in_transit', 'out_for_delivery', 'delivered', 'failed']
+        status_options = list(PACKAGE_STATUSES)
         ttk.OptionMenu(dialog, status_var, package_data[4], *status_options).pack(pady=5)
         
         tk.Label(dialog, text="Location:").pack()
@@ -190,19 +291,74 @@ class CourierDashboard(tk.Frame):
             location = location_entry.get()
             notes = notes_entry.get()
             
-            success, message = self.courier_ctrl.update_package_status(
-                package_id, status, location, notes
-            )
+            def on_updated(result):
+                success, message = result
+                if success:
+                    messagebox.showinfo("Success", message)
+                    self.refresh_packages({int(package_id)})
+                    dialog.destroy()
+                else:
+                    messagebox.showerror("Error", message)
             
-            if success:
-                messagebox.showinfo("Success", message)
-                self.load_packages()
-                dialog.destroy()
-            else:
-                messagebox.showerror("Error", message)
+            self.controller.tasks.submit(
+                self, 
+                self.courier_ctrl.update_package_status, 
+                package_id, status, location, notes,
+                on_success=on_updated
+            )
         
         ttk.Button(dialog, text="Update", command=update_status).pack(pady=10)
     
+    def show_route(self):
+        user = self.auth.get_current_user()
+        self.controller.tasks.submit(
+            self, 
+            self.courier_ctrl.get_courier_route, 
+            user.courier_id,
+            on_success=self.show_route_dialog
+        )
+    
+    def show_route_dialog(self, route):
+        if not route:
+            messagebox.showinfo("Route", "No stops remaining")
+            return
+        
+        dialog = tk.Toplevel(self)
+        dialog.title("Planned Route")
+        dialog.geometry("700x400")
+        
+        columns = ('seq', 'stop', 'tracking', 'address', 'leg')
+        route_tree = ttk.Treeview(dialog, columns=columns, show='headings')
+        route_tree.heading('seq', text='#')
+        route_tree.heading('stop', text='Stop')
+        route_tree.heading('tracking', text='Tracking #')
+        route_tree.heading('address', text='Address')
+        route_tree.heading('leg', text='Leg (km)')
+        route_tree.column('seq', width=40)
+        route_tree.column('stop', width=80)
+        route_tree.column('tracking', width=110)
+        route_tree.column('address', width=320)
+        route_tree.column('leg', width=80)
+        
+        scrollbar = ttk.Scrollbar(dialog, orient='vertical', command=route_tree.yview)
+        route_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        route_tree.pack(fill='both', expand=True)
+        
+        total = 0.0
+        for seq, stop in enumerate(route, start=1):
+            leg = stop['leg_km']
+            total += leg or 0.0
+            route_tree.insert('', 'end', values=(
+                seq,
+                stop['stop'].title(),
+                stop['tracking_number'],
+                stop['address'],
+                '' if leg is None else f"{leg:.1f}"
+            ))
+        
+        dialog.title(f"Planned Route - {len(route)} stops, {total:.1f} km")
+    
     def view_package_details(self):
         selected = self.packages_tree.focus()
         if not selected:
@@ -212,9 +368,19 @@ class CourierDashboard(tk.Frame):
         package_data = self.packages_tree.item(selected, 'values')
         package_id = package_data[0]
         
-        package = self.courier_ctrl.get_package_by_id(package_id)
-        history = self.courier_ctrl.get_tracking_history(package_id)
+        def load_details():
+            return (
+                self.courier_ctrl.get_package_by_id(package_id),
+                self.courier_ctrl.get_tracking_history(package_id)
+            )
         
+        self.controller.tasks.submit(
+            self, 
+            load_details,
+            on_success=lambda details: self.show_package_details(package_data, *details)
+        )
+    
+    def show_package_details(self, package_data, package, history):
         dialog = tk.Toplevel(self)
         dialog.title("Package Details")
         dialog.geometry("600x400")
@@ -263,5 +429,4 @@ class CourierDashboard(tk.Frame):
         history_text.config(state='disabled')
     
     def logout(self):
-        self.auth.logout()
-        self.controller.show_frame(LoginView)
\ No newline at end of file
+        self.controller.logout()
\ No newline at end of file
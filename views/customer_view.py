@@ -1,20 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from auth_controller import AuthController
 from courier_controller import CourierController
 from customer_controller import CustomerController
-from views.auth_view import LoginView
 from styles import Styles
+from views.keyed_tree import KeyedTree
 
-LoginView = None
+PACKAGES_PAGE_SIZE = 100
 
 class CustomerDashboard(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.auth = AuthController()
-        self.courier_ctrl = CourierController()
-        self.customer_ctrl = CustomerController()
+        self.auth = controller.auth
+        self.courier_ctrl = CourierController(controller.db)
+        self.customer_ctrl = CustomerController(controller.db)
         self.styles = Styles()
         
         self.configure(bg=self.styles.bg_color)
@@ -45,6 +44,15 @@ class CustomerDashboard(tk.Frame):
         )
         logout_btn.pack(side='right')
         
+        # Loading Indicator
+        self.loading_label = tk.Label(
+            header_frame, 
+            text="", 
+            bg=self.styles.bg_color,
+            font=self.styles.label_font
+        )
+        self.loading_label.pack(side='right', padx=10)
+        
         # Notebook for tabs
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
@@ -92,12 +100,6 @@ class CustomerDashboard(tk.Frame):
         self.packages_tree.column('created', width=120)
         self.packages_tree.column('estimated', width=120)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(packages_tab, orient='vertical', command=self.packages_tree.yview)
-        self.packages_tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side='right', fill='y')
-        self.packages_tree.pack(fill='both', expand=True)
-        
         # View Button
         view_btn = ttk.Button(
             packages_tab, 
@@ -105,27 +107,107 @@ class CustomerDashboard(tk.Frame):
             command=self.view_package_details,
             style='TButton'
         )
-        view_btn.pack(pady=10)
+        view_btn.pack(side='bottom', pady=10)
+        
+        # Load More Button
+        self.packages_cursor = None
+        self.load_more_btn = ttk.Button(
+            packages_tab, 
+            text="Load More", 
+            command=self.load_more_packages,
+            style='TButton'
+        )
+        self.load_more_btn.pack(side='bottom', pady=5)
+        
+        # Add scrollbar
+        scrollbar = ttk.Scrollbar(packages_tab, orient='vertical', command=self.packages_tree.yview)
+        self.packages_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.packages_tree.pack(fill='both', expand=True)
+        self.packages_rows = KeyedTree(self.packages_tree)
+    
+    def set_loading(self, busy):
+        """Show or hide the loading indicator"""
+        self.loading_label.configure(text="Loading..." if busy else "")
     
     def load_packages(self):
+        """Reload the first page of this customer's packages"""
         user = self.auth.get_current_user()
-        customer = self.customer_ctrl.get_customer_by_id(user.customer_id)
-        packages = self.customer_ctrl.get_customer_packages(customer.customer_id)
-        
-        # Clear existing data
-        for item in self.packages_tree.get_children():
-            self.packages_tree.delete(item)
-        
-        # Insert new data
-        for pkg in packages:
-            self.packages_tree.insert('', 'end', values=(
-                pkg['id'],
-                pkg['tracking_number'],
-                pkg['receiver_name'],
-                pkg['status'],
-                pkg['created_at'],
-                pkg['estimated_delivery']
-            ))
+        self.packages_cursor = None
+        self.load_more_btn.configure(state='disabled')
+        self.controller.tasks.submit(
+            self, 
+            self.customer_ctrl.get_customer_packages_page, 
+            user.customer_id, 
+            PACKAGES_PAGE_SIZE,
+            on_success=lambda page: self.show_packages_page(page, replace=True)
+        )
+    
+    def load_more_packages(self):
+        """Append the next page of packages"""
+        user = self.auth.get_current_user()
+        self.load_more_btn.configure(state='disabled')
+        self.controller.tasks.submit(
+            self, 
+            self.customer_ctrl.get_customer_packages_page, 
+            user.customer_id, 
+            PACKAGES_PAGE_SIZE, 
+            self.packages_cursor,
+            on_success=self.show_packages_page
+        )
+    
+    def show_packages_page(self, page, replace=False):
+        """Show a page of packages, replacing the list or adding to it"""
+        packages, self.packages_cursor = page
+        rows = (self.package_row(pkg) for pkg in packages)
+        if replace:
+            self.packages_rows.sync(rows)
+        else:
+            self.packages_rows.append(rows)
+        
+        self.load_more_btn.configure(state='normal' if self.packages_cursor else 'disabled')
+    
+    def package_row(self, pkg):
+        return (
+            pkg['id'],
+            pkg['tracking_number'],
+            pkg['receiver_name'],
+            pkg['status'],
+            pkg['created_at'],
+            pkg['estimated_delivery']
+        )
+    
+    def on_data_changed(self, changes):
+        """Patch the packages that changed in place, so pages loaded with Load More survive"""
+        if changes.resync:
+            self.load_packages()
+            return
+        
+        deleted = changes.ids('package', ('delete',))
+        self.packages_rows.remove(deleted)
+        changed = changes.ids('package', ('insert', 'update')) - deleted
+        if changed:
+            self.refresh_packages(changed)
+    
+    def refresh_packages(self, package_ids):
+        """Update or add the given packages if this customer sent or receives them"""
+        user = self.auth.get_current_user()
+        
+        def fetch_packages():
+            involved = self.customer_ctrl.filter_customer_packages(user.customer_id, package_ids)
+            return self.courier_ctrl.get_packages_by_ids(involved) if involved else []
+        
+        self.controller.tasks.submit(self, fetch_packages, on_success=self.show_changed_packages)
+    
+    def show_changed_packages(self, packages):
+        self.packages_rows.update(self.package_row(pkg) for pkg in packages)
+        self.packages_rows.prepend(
+            self.package_row(pkg) for pkg in sorted(
+                (pkg for pkg in packages if pkg['id'] not in self.packages_rows),
+                key=lambda pkg: (pkg['created_at'], pkg['id']),
+                reverse=True
+            )
+        )
     
     def show_new_package_dialog(self):
         dialog = tk.Toplevel(self)
@@ -168,46 +250,49 @@ class CustomerDashboard(tk.Frame):
                     messagebox.showerror("Error", f"Please enter {field.replace('_', ' ')}")
                     return
             
-            try:
+            def save_package():
                 # First create receiver customer (simplified for demo)
-                conn = self.auth.db.get_connection()
-                cursor = conn.cursor()
-                
-                cursor.execute(
-                    "INSERT INTO users (username, password, role, full_name) VALUES (?, ?, ?, ?)",
-                    (f"temp_{data['receiver_name'].lower().replace(' ', '_')}", 'temp123', 'customer', data['receiver_name'])
-                )
-                user_id = cursor.lastrowid
-                
-                cursor.execute(
-                    "INSERT INTO customers (user_id, address, city, state, zip_code) VALUES (?, ?, ?, ?, ?)",
-                    (user_id, data['receiver_address'], data['receiver_city'], data['receiver_state'], data['receiver_zip'])
-                )
-                receiver_id = cursor.lastrowid
-                
-                # Now create package
-                sender_id = user.customer_id
-                success, result = self.courier_ctrl.create_package(
-                    sender_id,
-                    receiver_id,
-                    data['description'],
-                    float(data['weight']) if data['weight'] else 0.5,
-                    data['dimensions'],
-                    "My Address",  # Simplified pickup address
-                    f"{data['receiver_address']}, {data['receiver_city']}, {data['receiver_state']} {data['receiver_zip']}"
-                )
-                
-                if success:
+                conn = self.customer_ctrl.db.get_connection()
+                try:
+                    receiver_id = self.customer_ctrl.add_receiver(
+                        data['receiver_name'],
+                        data['receiver_address'],
+                        data['receiver_city'],
+                        data['receiver_state'],
+                        data['receiver_zip']
+                    )
+                    
+                    # Now create package
+                    sender_id = user.customer_id
+                    success, result = self.courier_ctrl.create_package(
+                        sender_id,
+                        receiver_id,
+                        data['description'],
+                        float(data['weight']) if data['weight'] else 0.5,
+                        data['dimensions'],
+                        "My Address",  # Simplified pickup address
+                        f"{data['receiver_address']}, {data['receiver_city']}, {data['receiver_state']} {data['receiver_zip']}"
+                    )
+                    
+                    if not success:
+                        conn.rollback()
+                        return False, result
                     conn.commit()
-                    messagebox.showinfo("Success", f"Package created! Tracking #: {self.courier_ctrl.get_package_by_id(result).tracking_number}")
+                    return True, self.courier_ctrl.get_package_by_id(result).tracking_number
+                except Exception as e:
+                    conn.rollback()
+                    return False, str(e)
+            
+            def on_saved(outcome):
+                success, result = outcome
+                if success:
+                    messagebox.showinfo("Success", f"Package created! Tracking #: {result}")
                     self.load_packages()
                     dialog.destroy()
                 else:
-                    conn.rollback()
                     messagebox.showerror("Error", result)
-            except Exception as e:
-                conn.rollback()
-                messagebox.showerror("Error", str(e))
+            
+            self.controller.tasks.submit(self, save_package, on_success=on_saved)
         
         ttk.Button(dialog, text="Create Package", command=create_package).grid(row=len(fields), column=1, pady=10)
     
@@ -220,9 +305,19 @@ class CustomerDashboard(tk.Frame):
         package_data = self.packages_tree.item(selected, 'values')
         package_id = package_data[0]
         
-        package = self.courier_ctrl.get_package_by_id(package_id)
-        history = self.courier_ctrl.get_tracking_history(package_id)
+        def load_details():
+            return (
+                self.courier_ctrl.get_package_by_id(package_id),
+                self.courier_ctrl.get_tracking_history(package_id)
+            )
         
+        self.controller.tasks.submit(
+            self, 
+            load_details,
+            on_success=lambda details: self.show_package_details(package_data, *details)
+        )
+    
+    def show_package_details(self, package_data, package, history):
         dialog = tk.Toplevel(self)
         dialog.title("Package Details")
         dialog.geometry("600x400")
@@ -278,13 +373,19 @@ class CustomerDashboard(tk.Frame):
         # Will be populated by load_profile()
     
     def load_profile(self):
+        user = self.auth.get_current_user()
+        self.controller.tasks.submit(
+            self, 
+            self.customer_ctrl.get_customer_by_id, 
+            user.customer_id,
+            on_success=self.show_profile
+        )
+    
+    def show_profile(self, customer):
         # Clear existing widgets
         for widget in self.profile_frame.winfo_children():
             widget.destroy()
         
-        user = self.auth.get_current_user()
-        customer = self.customer_ctrl.get_customer_by_id(user.customer_id)
-        
         # Form fields
         fields = [
             ("Username:", "username", customer.username, True),
@@ -350,7 +451,18 @@ class CustomerDashboard(tk.Frame):
         }
         
         user = self.auth.get_current_user()
-        success, message = self.customer_ctrl.update_customer_profile(
+        
+        def on_updated(result):
+            success, message = result
+            if success:
+                messagebox.showinfo("Success", message)
+                self.load_profile()  # Refresh profile view
+            else:
+                messagebox.showerror("Error", message)
+        
+        self.controller.tasks.submit(
+            self, 
+            self.customer_ctrl.update_customer_profile,
             user.customer_id,
             data['full_name'],
             data['email'],
@@ -358,14 +470,9 @@ class CustomerDashboard(tk.Frame):
             data['address'],
             data['city'],
             data['state'],
-            data['zip_code']
+            data['zip_code'],
+            on_success=on_updated
         )
-        
-        if success:
-            messagebox.showinfo("Success", message)
-            self.load_profile()  # Refresh profile view
-        else:
-            messagebox.showerror("Error", message)
     
     def create_tracking_tab(self):
         tracking_tab = ttk.Frame(self.notebook)
@@ -403,13 +510,23 @@ class CustomerDashboard(tk.Frame):
             messagebox.showwarning("Warning", "Please enter a tracking number")
             return
         
-        package = self.courier_ctrl.get_package_by_tracking_number(tracking_number)
-        if not package:
+        def lookup():
+            details = self.courier_ctrl.get_tracking_details(tracking_number)
+            if not details:
+                return None, []
+            return details, self.courier_ctrl.get_tracking_history(details['package_id'])
+        
+        self.controller.tasks.submit(
+            self, 
+            lookup,
+            on_success=lambda found: self.show_tracking_results(*found)
+        )
+    
+    def show_tracking_results(self, details, history):
+        if not details:
             messagebox.showerror("Error", "Package not found")
             return
         
-        history = self.courier_ctrl.get_tracking_history(package.id)
-        
         # Clear previous results
         for widget in self.track_results.winfo_children():
             widget.destroy()
@@ -420,25 +537,33 @@ class CustomerDashboard(tk.Frame):
         
         tk.Label(
             info_frame, 
-            text=f"Tracking Number: {package.tracking_number}", 
+            text=f"Tracking Number: {details['tracking_number']}", 
             font=('Arial', 12, 'bold'),
             bg=self.styles.bg_color
         ).pack(anchor='w')
         
         tk.Label(
             info_frame, 
-            text=f"Status: {package.status.upper()}", 
+            text=f"Status: {details['status'].upper()}", 
             font=('Arial', 12),
             bg=self.styles.bg_color
         ).pack(anchor='w')
         
         tk.Label(
             info_frame, 
-            text=f"Estimated Delivery: {package.estimated_delivery}", 
+            text=f"Estimated Delivery: {details['estimated_delivery']}", 
             font=('Arial', 12),
             bg=self.styles.bg_color
         ).pack(anchor='w')
         
+        if details['last_event_at']:
+            tk.Label(
+                info_frame, 
+                text=f"Last Location: {details['current_location'] or 'N/A'} ({details['last_event_at']})", 
+                font=('Arial', 12),
+                bg=self.styles.bg_color
+            ).pack(anchor='w')
+        
         # Tracking History
         history_frame = tk.Frame(self.track_results, bg=self.styles.bg_color)
         history_frame.pack(fill='both', expand=True, padx=10, pady=10)
@@ -470,13 +595,5 @@ class CustomerDashboard(tk.Frame):
         
         history_text.config(state='disabled')
     
-    def some_method_that_needs_loginview(self):
-        global LoginView
-        if LoginView is None:  # Load ONLY when needed
-            from views.auth_view import LoginView
-        # Now use LoginView normally
-        self.controller.show_frame(LoginView)
-
     def logout(self):
-        self.auth.logout()
-        self.controller.show_frame(LoginView)
\ No newline at end of file
+        self.controller.logout()
\ No newline at end of file
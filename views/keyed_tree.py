@@ -0,0 +1,77 @@
+class KeyedTree:
+    """Keeps a ttk.Treeview in step with a result set keyed by id.
+
+    Each row's key becomes its item id, so a refresh can diff the new rows
+    against what is on screen: only rows that appeared, changed or
+    disappeared touch Tk, and the order is fixed with a single
+    set_children call. Items that survive keep their selection and focus,
+    and the scroll position is restored afterwards.
+    """
+
+    def __init__(self, tree, key=lambda values: values[0]):
+        self.tree = tree
+        self.key = key
+        self._values = {}
+
+    def sync(self, rows):
+        """Show exactly ``rows`` (sequences of column values) in order"""
+        rows = self._keyed(rows)
+        top = self.tree.yview()[0]
+
+        self.remove([iid for iid in self._values if iid not in rows])
+        self._upsert(rows)
+        order = tuple(rows)
+        if self.tree.get_children() != order:
+            self.tree.set_children('', *order)
+        self.tree.yview_moveto(top)
+
+    def append(self, rows):
+        """Add ``rows`` after those shown, updating any that are already there"""
+        self._upsert(self._keyed(rows))
+
+    def prepend(self, rows):
+        """Add ``rows`` above those shown, updating any that are already there"""
+        self._upsert(self._keyed(rows), index=0)
+
+    def update(self, rows):
+        """Refresh the rows in ``rows`` that are shown; others are ignored"""
+        self._upsert({iid: values for iid, values in self._keyed(rows).items() if iid in self._values})
+
+    def remove(self, keys):
+        """Remove the rows with these keys, if shown"""
+        removed = [iid for iid in map(str, keys) if iid in self._values]
+        if removed:
+            self.tree.delete(*removed)
+            for iid in removed:
+                del self._values[iid]
+
+    def __contains__(self, key):
+        return str(key) in self._values
+
+    def clear(self):
+        """Remove every row"""
+        if self._values:
+            self.tree.delete(*self._values)
+        self._values.clear()
+
+    def _keyed(self, rows):
+        keyed = {}
+        for values in rows:
+            values = tuple(values)
+            keyed[str(self.key(values))] = values
+        return keyed
+
+    def _upsert(self, rows, index='end'):
+        new = 0
+        for iid, values in rows.items():
+            shown = self._values.get(iid)
+            if shown is None:
+                # Keep new rows in the given order when inserting at an index
+                position = index if index == 'end' else index + new
+                self.tree.insert('', position, iid=iid, values=values)
+                new += 1
+            elif shown != values:
+                self.tree.item(iid, values=values)
+            else:
+                continue
+            self._values[iid] = values
@@ -7,7 +7,7 @@ class TrackingView(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.courier_ctrl = CourierController()
+        self.courier_ctrl = CourierController(controller.db)
         self.styles = Styles()
         
         self.configure(bg=self.styles.bg_color)
@@ -66,8 +66,14 @@ class TrackingView(tk.Frame):
             ).pack()
             return
 
-        tracking_info = self.courier_ctrl.get_tracking_details(tracking_number)
+        self.controller.tasks.submit(
+            self,
+            self.courier_ctrl.get_tracking_details,
+            tracking_number,
+            on_success=self.show_tracking_info
+        )
 
+    def show_tracking_info(self, tracking_info):
         if tracking_info:
             tk.Label(
                 self.results_frame,